@@ -0,0 +1,150 @@
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+from model.position import init_position_pool
+import configparser
+import os
+
+DEFAULT_PROPERTIES = Path(os.path.dirname(os.path.dirname(__file__))) / "resources" / "mm27.properties"
+
+# Properties at or after this marker are fixed and can't be overridden by another file
+FIXED_MARKER = "CANNOT BE CHANGED DURING RUNTIME"
+
+# Tile types are spelled differently in the properties file than in TileType
+TILE_PROPERTY_NAMES = {
+    'GREEN_GROCER': 'greengrocer',
+    'GRASS': 'grass',
+    'ARID': 'arid',
+    'SOIL': 'soil',
+    'F_BAND_OUTER': 'fband_outer',
+    'F_BAND_MID': 'fband_mid',
+    'F_BAND_INNER': 'fband_inner',
+}
+
+CROP_NAMES = ('NONE', 'GRAPE', 'CORN', 'POTATO', 'JOGAN_FRUIT', 'PEANUT', 'QUADROTRITICALE',
+              'DUCHAM_FRUIT', 'GOLDEN_CORN')
+
+# Item name -> (effect radius property, multiplier property), None where an item has no such value
+ITEM_PROPERTIES = {
+    'RAIN_TOTEM': ('item.rain_totem.effect_radius', 'item.rain_totem.growth_multiplier'),
+    'FERTILITY_IDOL': ('item.fertility_idol.effect_radius', 'item.fertility_idol.fertility_multiplier'),
+    'PESTICIDE': ('item.pesticide.effect_radius', 'item.pesticide.crop_value_decrease'),
+    'SCARECROW': ('item.scarecrow.effect_radius', None),
+    'DELIVERY_DRONE': (None, None),
+    'COFFEE_THERMOS': (None, 'items.coffee_thermos.movement_multiplier'),
+    'NONE': (None, None),
+}
+
+# Upgrade name -> (player field in the engine's JSON it replaces, property holding the new value)
+UPGRADE_PROPERTIES = {
+    'SCYTHE': ('harvestRadius', 'upgrades.scythe_harvest_radius'),
+    'LOYALTY_CARD': ('discount', 'upgrades.green_grocer_loyalty_card_discount'),
+    'LONGER_LEGS': ('maxMovement', 'upgrades.longer_legs_max_movement'),
+    'RABBITS_FOOT': ('doubleDropChance', 'upgrades.rabbits_foot_double_drop_chance'),
+    'SEED_A_PULT': ('plantRadius', 'upgrades.seed_a_pult_plant_radius'),
+    'SPYGLASS': ('protectionRadius', 'upgrades.spyglass_protection_radius'),
+    'BACKPACK': ('carryingCapacity', 'upgrades.backpack_carrying_capacity'),
+}
+
+
+@dataclass(frozen=True)
+class CropStats:
+    seed_price: float
+    growth_time: int
+    fertility_sensitivity: float
+    growth_value: float
+
+
+@dataclass(frozen=True)
+class ItemStats:
+    effect_radius: int
+    # Growth, fertility or movement multiplier, or the pesticide's value decrease
+    multiplier: float
+
+
+@dataclass(frozen=True)
+class GameConfig:
+    """
+    Parsed game properties. Built once, never changed afterwards; the tables
+    are keyed by enum member name so this module doesn't depend on the model.
+    """
+    properties: Mapping[str, str]
+    crops: Mapping[str, CropStats]
+    tile_fertility: Mapping[str, float]
+    items: Mapping[str, ItemStats]
+    upgrades: Mapping[str, Tuple[str, float]]
+
+    def get_int(self, key: str) -> int:
+        return int(self.properties[key])
+
+    def get_float(self, key: str) -> float:
+        return float(self.properties[key])
+
+
+def _read_properties(path) -> Tuple[dict, set]:
+    with open(path) as f:
+        file_content = f.read()
+    config_parser = configparser.RawConfigParser()
+    config_parser.read_string('[dummy_section]\n' + file_content)
+    properties = dict(config_parser['dummy_section'])
+
+    fixed_content = file_content.split(FIXED_MARKER, 1)[1] if FIXED_MARKER in file_content else ''
+    fixed_parser = configparser.RawConfigParser()
+    fixed_parser.read_string('[dummy_section]\n' + fixed_content.split('\n', 1)[-1])
+    return properties, set(fixed_parser['dummy_section'])
+
+
+def load_config(override_path: Optional[str] = None) -> GameConfig:
+    """
+    Parses mm27.properties, optionally overlaid with another properties file the
+    way the engine applies runtime overrides
+    :param override_path: Properties file whose values replace the defaults
+    :return: GameConfig
+    """
+    properties, fixed = _read_properties(DEFAULT_PROPERTIES)
+    if override_path is not None:
+        overrides, _ = _read_properties(override_path)
+        changed_fixed = sorted(key for key in overrides if key in fixed and overrides[key] != properties[key])
+        if changed_fixed:
+            raise ValueError(f"{override_path} overrides properties that can't change at runtime: {changed_fixed}")
+        properties.update(overrides)
+    return _build_config(properties)
+
+
+def override_config(base: GameConfig, overrides: Mapping[str, str]) -> GameConfig:
+    """
+    Returns a copy of a config with some properties replaced, e.g. a bigger board for load tests
+    :param base: Config to start from
+    :param overrides: Property name -> new value, as it would be written in a properties file
+    :return: GameConfig
+    """
+    properties = dict(base.properties)
+    properties.update({key: str(value) for key, value in overrides.items()})
+    return _build_config(properties)
+
+
+def _build_config(properties: dict) -> GameConfig:
+    def get(key):
+        if key is None:
+            return 0
+        value = float(properties[key])
+        return int(value) if value.is_integer() else value
+
+    crops = {name: CropStats(float(properties[f"croptype.{name.lower()}.seedprice"]),
+                             int(properties[f"croptype.{name.lower()}.growthtime"]),
+                             float(properties[f"croptype.{name.lower()}.fertilitysens"]),
+                             float(properties[f"croptype.{name.lower()}.growthvalue"]))
+             for name in CROP_NAMES}
+    tile_fertility = {name: float(properties[f"tiletype.{key}.fertility"])
+                      for name, key in TILE_PROPERTY_NAMES.items()}
+    items = {name: ItemStats(get(radius), get(multiplier))
+             for name, (radius, multiplier) in ITEM_PROPERTIES.items()}
+    upgrades = {name: (field, get(key)) for name, (field, key) in UPGRADE_PROPERTIES.items()}
+    return GameConfig(MappingProxyType(properties), MappingProxyType(crops), MappingProxyType(tile_fertility),
+                      MappingProxyType(items), MappingProxyType(upgrades))
+
+
+# Shared by every module; MM27_PROPERTIES points at an override file if the engine was started with one
+config = load_config(os.environ.get("MM27_PROPERTIES"))
+init_position_pool(int(config.properties['board.width']), int(config.properties['board.height']))
@@ -1,16 +1,12 @@
-from pathlib import Path
-import configparser
-import os
+from typing import Optional
+from api.config import GameConfig, config as default_config
 
 
 class Constants:
-    def __init__(self) -> None:
-        with open(Path(os.path.dirname(os.path.dirname(__file__))) / "resources" / "mm27.properties") as f:
-            file_content = '[dummy_section]\n' + f.read()
-        config_parser = configparser.RawConfigParser()
-        config_parser.read_string(file_content)
-        config = config_parser['dummy_section']
-        
+    def __init__(self, config: Optional[GameConfig] = None) -> None:
+        # Values come from the shared, already parsed config rather than re-reading the file
+        config = (config if config is not None else default_config).properties
+
         self.BOARD_WIDTH                            = int(config['board.width'])
         self.BOARD_HEIGHT                           = int(config['board.height'])
         self.GRASS_ROWS                             = int(config['board.grass.rows'])
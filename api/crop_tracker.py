@@ -0,0 +1,119 @@
+from array import array
+from typing import Iterable, List, Optional, Set, Tuple
+from model.game_state import GameState
+from model.crop_type import CropType
+from model.decisions.plant_decision import PlantDecision
+from api.constants import Constants
+from api.fertility_schedule import FertilitySchedule
+from api.forecast import planted_value
+from api.reach import reach
+from api import game_util
+
+# Owner codes
+NOBODY = 0
+US = 1
+OPPONENT = 2
+
+
+class CropTracker:
+    """
+    Remembers who planted each crop on the board. The engine doesn't say, so a
+    crop is ours if it shows up where we sent a PlantDecision, and the
+    opponent's otherwise.
+
+    Per-tile state lives in flat arrays indexed by y * width + x, and the
+    indices of our crops, our ripe crops and the opponent's crops are kept as
+    sets so the common questions don't need a board scan.
+    """
+
+    def __init__(self, constants: Optional[Constants] = None, schedule: Optional[FertilitySchedule] = None) -> None:
+        constants = constants if constants is not None else game_util.constants
+        # None uses the shared schedule, which only covers the default board
+        self.schedule = schedule
+        self.width = constants.BOARD_WIDTH
+        self.height = constants.BOARD_HEIGHT
+        size = self.width * self.height
+        self.owner = array('b', bytes(size))
+        self.crop_type = array('b', bytes(size))
+        self.planted_turn = array('i', bytes(4 * size))
+        self.expected_value = array('d', bytes(8 * size))
+        self.ours: Set[int] = set()
+        self.ours_ripe: Set[int] = set()
+        self.theirs: Set[int] = set()
+        # Tiles we tried to plant on that haven't shown up in a game state yet
+        self.pending: Set[int] = set()
+        self.pending_turn = -1
+
+    def record_plant(self, decision: PlantDecision, turn: int) -> None:
+        """
+        Notes the tiles we are about to plant on, so the crops are claimed as ours when they appear
+        """
+        self.pending = {pos.y * self.width + pos.x for pos in decision.coords}
+        self.pending_turn = turn
+
+    def update(self, game_state: GameState, dirty: Optional[Iterable[Tuple[int, int]]] = None) -> None:
+        """
+        Brings ownership up to date with a game state
+        :param game_state: Current GameState
+        :param dirty: Coordinates that changed since the last call, None to check every tile
+        """
+        tile_map = game_state.tile_map
+        if dirty is None:
+            dirty = [(x, y) for y in range(tile_map.map_height) for x in range(tile_map.map_width)]
+        for x, y in dirty:
+            self._update_tile(game_state, x, y, tile_map.get_tile(x, y))
+        # A plant shows up in the first state after it was sent, or not at all
+        if game_state.turn > self.pending_turn:
+            self.pending = set()
+
+    def _update_tile(self, game_state: GameState, x: int, y: int, tile) -> None:
+        index = y * self.width + x
+        crop = tile.crop
+        if crop.type == CropType.NONE.name:
+            if self.owner[index] != NOBODY:
+                self.owner[index] = NOBODY
+                self.crop_type[index] = 0
+                self.expected_value[index] = 0
+                self.ours.discard(index)
+                self.ours_ripe.discard(index)
+                self.theirs.discard(index)
+            return
+
+        crop_type = CropType[crop.type]
+        if self.owner[index] == NOBODY or self.crop_type[index] != crop_type.value:
+            owner = US if index in self.pending else OPPONENT
+            self.owner[index] = owner
+            self.crop_type[index] = crop_type.value
+            planted_turn = game_state.turn - (crop_type.get_growth_time() - crop.growth_timer)
+            self.planted_turn[index] = planted_turn
+            self.expected_value[index] = planted_value(crop_type, y, planted_turn, schedule=self.schedule)
+            if owner == US:
+                self.ours.add(index)
+                self.theirs.discard(index)
+            else:
+                self.theirs.add(index)
+                self.ours.discard(index)
+                self.ours_ripe.discard(index)
+
+        if self.owner[index] == US and crop.growth_timer <= 0:
+            self.ours_ripe.add(index)
+
+    def our_ripe_crops(self) -> List[Tuple[int, int]]:
+        """
+        Returns the (x, y) of our crops that can be harvested
+        """
+        return [(index % self.width, index // self.width) for index in self.ours_ripe]
+
+    def opponent_crops_within(self, x: int, y: int, radius: int) -> List[Tuple[int, int]]:
+        """
+        Returns the (x, y) of the opponent's crops within radius of (x, y)
+        """
+        width = self.width
+        if len(self.theirs) < 2 * radius * (radius + 1) + 1:
+            return [(index % width, index // width) for index in self.theirs
+                    if abs(index % width - x) + abs(index // width - y) <= radius]
+        owner = self.owner
+        return [(i, j) for i, j in reach.coords(x, y, radius) if owner[j * width + i] == OPPONENT]
+
+    def owner_at(self, x: int, y: int) -> int:
+        return self.owner[y * self.width + x]
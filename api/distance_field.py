@@ -0,0 +1,189 @@
+from array import array
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+from model.game_state import GameState
+from model.tile_type import TileType
+from api.constants import Constants
+from api import game_util
+
+# Used for tiles that no target can be reached from (no targets at all)
+UNREACHABLE = 1 << 30
+
+
+def turns_to_cover(dist: int, max_movement: int, first_move_multiplier: int = 1) -> int:
+    """
+    Returns how many turns it takes to travel a Manhattan distance
+    :param dist: Distance to travel
+    :param max_movement: Tiles the player can move each turn (longer legs already applied)
+    :param first_move_multiplier: Multiplier on the first move, e.g. for the coffee thermos
+    :return: Number of turns, 0 if already there
+    """
+    if dist <= 0:
+        return 0
+    first = max_movement * first_move_multiplier
+    if dist <= first:
+        return 1
+    return 1 + -(-(dist - first) // max_movement)
+
+
+def step_toward(x: int, y: int, target_x: int, target_y: int, max_movement: int) -> Tuple[int, int]:
+    """
+    Returns the tile max_movement closer to a target, or the target itself if it is in range
+    """
+    dx = target_x - x
+    dy = target_y - y
+    if abs(dx) + abs(dy) <= max_movement:
+        return target_x, target_y
+    # Spend the move on the longer axis first, which keeps both axes open for the next turn
+    step_x = max(-max_movement, min(max_movement, dx)) if abs(dx) >= abs(dy) else 0
+    left = max_movement - abs(step_x)
+    step_y = max(-left, min(left, dy))
+    left -= abs(step_y)
+    step_x += max(-left, min(left, dx - step_x))
+    return x + step_x, y + step_y
+
+
+class DistanceField:
+    """
+    Manhattan distance from every tile to the nearest of a set of target tiles,
+    plus which target that is. Built with a two-pass distance transform, which
+    is exact on an open grid.
+    """
+
+    def __init__(self, targets: Iterable[Tuple[int, int]], constants: Optional[Constants] = None) -> None:
+        constants = constants if constants is not None else game_util.constants
+        self.width = constants.BOARD_WIDTH
+        self.height = constants.BOARD_HEIGHT
+        # None until the first update, so that it builds the field even for no targets
+        self.targets: Optional[FrozenSet[Tuple[int, int]]] = None
+        self.update(targets)
+
+    def update(self, targets: Iterable[Tuple[int, int]]) -> None:
+        """
+        Recomputes the field for a new set of targets; does nothing if the set didn't change
+        """
+        targets = frozenset(targets)
+        if targets == self.targets:
+            return
+        self.targets = targets
+        width = self.width
+        size = width * self.height
+        dist = array('i', [UNREACHABLE]) * size
+        nearest = array('i', [-1]) * size
+        for x, y in targets:
+            dist[y * width + x] = 0
+            nearest[y * width + x] = y * width + x
+
+        # Forward pass pulls distances from above and the left, backward pass from below and the right
+        for i in range(size):
+            if i >= width and dist[i - width] + 1 < dist[i]:
+                dist[i] = dist[i - width] + 1
+                nearest[i] = nearest[i - width]
+            if i % width and dist[i - 1] + 1 < dist[i]:
+                dist[i] = dist[i - 1] + 1
+                nearest[i] = nearest[i - 1]
+        for i in range(size - 1, -1, -1):
+            if i + width < size and dist[i + width] + 1 < dist[i]:
+                dist[i] = dist[i + width] + 1
+                nearest[i] = nearest[i + width]
+            if (i + 1) % width and dist[i + 1] + 1 < dist[i]:
+                dist[i] = dist[i + 1] + 1
+                nearest[i] = nearest[i + 1]
+        self.distance = dist
+        self.nearest = nearest
+
+    def distance_at(self, x: int, y: int) -> int:
+        return self.distance[y * self.width + x]
+
+    def nearest_target(self, x: int, y: int) -> Optional[Tuple[int, int]]:
+        index = self.nearest[y * self.width + x]
+        if index < 0:
+            return None
+        return index % self.width, index // self.width
+
+    def turns(self, x: int, y: int, max_movement: int, first_move_multiplier: int = 1) -> int:
+        """
+        Returns the number of turns needed to reach the nearest target from (x, y)
+        """
+        return turns_to_cover(self.distance[y * self.width + x], max_movement, first_move_multiplier)
+
+    def turns_field(self, max_movement: int, first_move_multiplier: int = 1) -> array:
+        """
+        Returns the turns-to-reach for every tile, indexed by y * width + x
+        """
+        return array('i', [turns_to_cover(dist, max_movement, first_move_multiplier) for dist in self.distance])
+
+    def step_toward(self, x: int, y: int, max_movement: int) -> Tuple[int, int]:
+        """
+        Returns the tile to move to this turn to get as close as possible to the
+        nearest target. Vertical distance is covered first, since the rows are
+        what the fertility bands and the Green Grocer are about.
+        :return: (x, y) to move to, the current tile if there are no targets
+        """
+        target = self.nearest_target(x, y)
+        if target is None:
+            return x, y
+        dy = target[1] - y
+        step_y = max(-max_movement, min(max_movement, dy))
+        leftover = max_movement - abs(step_y)
+        dx = target[0] - x
+        step_x = max(-leftover, min(leftover, dx))
+        return x + step_x, y + step_y
+
+
+class RowDistanceField:
+    """
+    Distance from every row to the nearest of a set of target rows. The column
+    doesn't matter for rows, so this is a single array of board height that is
+    cheap to rebuild whenever the rows move, e.g. every band shift.
+    """
+
+    def __init__(self, rows: Iterable[int], constants: Optional[Constants] = None) -> None:
+        constants = constants if constants is not None else game_util.constants
+        self.height = constants.BOARD_HEIGHT
+        self.rows: Tuple[int, ...] = ()
+        self.distance = array('i', [UNREACHABLE]) * self.height
+        self.nearest = array('i', [-1]) * self.height
+        self.update(rows)
+
+    def update(self, rows: Iterable[int]) -> None:
+        rows = tuple(sorted(set(rows)))
+        if rows == self.rows:
+            return
+        self.rows = rows
+        for y in range(self.height):
+            if rows:
+                row = min(rows, key=lambda r: abs(r - y))
+                self.distance[y] = abs(row - y)
+                self.nearest[y] = row
+            else:
+                self.distance[y] = UNREACHABLE
+                self.nearest[y] = -1
+
+    def turns(self, y: int, max_movement: int, first_move_multiplier: int = 1) -> int:
+        return turns_to_cover(self.distance[y], max_movement, first_move_multiplier)
+
+    def step_toward(self, x: int, y: int, max_movement: int) -> Tuple[int, int]:
+        """
+        Returns the tile to move to this turn to get as close as possible to the nearest target row
+        """
+        row = self.nearest[y]
+        if row < 0:
+            return x, y
+        return x, y + max(-max_movement, min(max_movement, row - y))
+
+
+_grocer_fields: Dict[FrozenSet[Tuple[int, int]], DistanceField] = {}
+
+
+def grocer_distance_field(game_state: GameState) -> DistanceField:
+    """
+    Returns the distance field to the Green Grocer tiles, which are all on the
+    first row. The grocer never moves, so the field is built once and shared.
+    """
+    tile_map = game_state.tile_map
+    targets = frozenset((x, 0) for x in range(tile_map.map_width)
+                        if tile_map.get_tile(x, 0).type == TileType.GREEN_GROCER)
+    field = _grocer_fields.get(targets)
+    if field is None:
+        field = _grocer_fields[targets] = DistanceField(targets)
+    return field
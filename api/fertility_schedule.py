@@ -0,0 +1,97 @@
+from typing import Dict, List, Optional, Tuple
+from model.tile_type import TileType
+from model.position import Position
+from api.constants import Constants
+from api import game_util
+
+# Turns to tabulate; every row is arid by then and stays that way
+DEFAULT_TURNS = 180
+
+FERTILE_TYPES = (TileType.F_BAND_OUTER, TileType.F_BAND_MID, TileType.F_BAND_INNER)
+
+
+class FertilitySchedule:
+    """
+    Turn x row lookup table of the fertility bands. The band only depends on the
+    row and the number of shifts so far, so each distinct shift is computed once
+    with game_util.tile_type_on_turn and shared by every turn that has it.
+
+    Rows above the grass line are always GRASS (the Green Grocer columns on row 0
+    are not distinguished, they are not plantable either way).
+    """
+
+    def __init__(self, turns: int = DEFAULT_TURNS, constants: Optional[Constants] = None) -> None:
+        self.constants = constants if constants is not None else game_util.constants
+        self.turns = turns
+        self.height = self.constants.BOARD_HEIGHT
+        fertility = {tile_type: tile_type.get_fertility() for tile_type in TileType}
+
+        # Index 0 is unused so that the tables can be indexed by turn directly
+        self.types: List[Tuple[TileType, ...]] = [()]
+        self.fertilities: List[Tuple[float, ...]] = [()]
+        self.rows_by_type: List[Dict[TileType, Tuple[int, ...]]] = [{}]
+        by_shift = {}
+        for turn in range(1, turns + 1):
+            shift = max(0, (turn - 1 - self.constants.FBAND_INIT_DELAY) // self.constants.FBAND_MOVE_DELAY)
+            if shift not in by_shift:
+                types = tuple(TileType.GRASS if y < self.constants.GRASS_ROWS
+                              else game_util.tile_type_on_turn(turn, None, Position(0, y))
+                              for y in range(self.height))
+                rows = {tile_type: tuple(y for y in range(self.height) if types[y] == tile_type)
+                        for tile_type in TileType}
+                by_shift[shift] = (types, tuple(fertility[tile_type] for tile_type in types), rows)
+            types, fertilities, rows = by_shift[shift]
+            self.types.append(types)
+            self.fertilities.append(fertilities)
+            self.rows_by_type.append(rows)
+
+        # next_fertile[turn][y] is the first turn >= turn on which row y is fertile, or None
+        self.next_fertile: List[Tuple[Optional[int], ...]] = [()] * (turns + 2)
+        self.next_fertile[turns + 1] = (None,) * self.height
+        for turn in range(turns, 0, -1):
+            later = self.next_fertile[turn + 1]
+            fertilities = self.fertilities[turn]
+            self.next_fertile[turn] = tuple(turn if fertilities[y] > 0 else later[y] for y in range(self.height))
+
+    def _turn(self, turn: int) -> int:
+        # The bands have left the board by the last tabulated turn, so later turns look the same
+        return min(max(turn, 1), self.turns)
+
+    def tile_type(self, turn: int, y: int) -> TileType:
+        return self.types[self._turn(turn)][y]
+
+    def fertility(self, turn: int, y: int) -> float:
+        return self.fertilities[self._turn(turn)][y]
+
+    def fertility_row(self, turn: int) -> Tuple[float, ...]:
+        """
+        Returns the fertility of every row on a turn, indexed by y
+        """
+        return self.fertilities[self._turn(turn)]
+
+    def rows_of_type(self, turn: int, tile_type: TileType) -> Tuple[int, ...]:
+        """
+        Returns the rows that have the given type on a turn, in ascending order
+        """
+        return self.rows_by_type[self._turn(turn)][tile_type]
+
+    def fertile_rows(self, turn: int) -> Tuple[int, ...]:
+        """
+        Returns the rows inside any fertility band on a turn, in ascending order
+        """
+        rows = self.rows_by_type[self._turn(turn)]
+        return tuple(sorted(rows[TileType.F_BAND_OUTER] + rows[TileType.F_BAND_MID] + rows[TileType.F_BAND_INNER]))
+
+    def first_fertile_turn(self, y: int, from_turn: int = 1) -> Optional[int]:
+        """
+        Returns the first turn at or after from_turn on which row y is inside a band
+        :param y: Row to check
+        :param from_turn: Earliest turn to consider
+        :return: Turn, or None if the row will not be fertile again
+        """
+        if from_turn > self.turns:
+            return None
+        return self.next_fertile[max(from_turn, 1)][y]
+
+
+schedule = FertilitySchedule()
@@ -0,0 +1,157 @@
+from array import array
+from typing import List, Optional
+from model.game_state import GameState
+from model.crop_type import CropType
+from model.tile_type import TileType
+from api.constants import Constants
+from api.fertility_schedule import FertilitySchedule, schedule as default_schedule
+from api import game_util
+
+
+def growth_per_step(crop_type: CropType, fertility: float) -> float:
+    """
+    Returns the value a crop gains in one growth step at a given fertility
+    """
+    sensitivity = crop_type.get_fertility_sensitivity()
+    return crop_type.get_growth_value() * (1 - sensitivity + sensitivity * fertility)
+
+
+class CropForecast:
+    """
+    Projected value of every crop on the board for the next `horizon` turns.
+
+    values[k][y * width + x] is what the crop on (x, y) is worth at the start of
+    turn game_state.turn + k, i.e. if harvested k turns from now; values[0] is
+    today's value. Crops grow at the end of each turn with that turn's band
+    fertility, doubled under a fertility idol, and take several growth steps a
+    turn under a rain totem, stopping once ripe. Tiles without a crop are 0.
+
+    The board is read once; each turn of the horizon is then one pass over
+    parallel lists holding the crops still growing, rather than a loop per tile.
+    """
+
+    def __init__(self, game_state: GameState, horizon: int, schedule: Optional[FertilitySchedule] = None,
+                 constants: Optional[Constants] = None) -> None:
+        schedule = schedule if schedule is not None else default_schedule
+        constants = constants if constants is not None else game_util.constants
+        tile_map = game_state.tile_map
+        width = tile_map.map_width
+        height = tile_map.map_height
+        self.turn = game_state.turn
+        self.horizon = horizon
+        self.width = width
+        # Later turns are filled in as copies of the turn before
+        self.values: List[array] = [array('d', bytes(8 * width * height))] * (horizon + 1)
+        # Turn on which each crop is ripe, 0 where there is no crop
+        self.ripe_turn = array('i', bytes(4 * width * height))
+
+        rain_steps = constants.RAIN_TOTEM_GROWTH_MULTIPLIER
+        idol_multiplier = constants.FERTILITY_IDOL_FERTILITY_MULTIPLIER
+        # Fertility of every row on each turn of the horizon, shared by all the crops in a row
+        fertility_rows = [schedule.fertility_row(self.turn + k) for k in range(horizon)]
+        # The grocer and grass never change, whatever the band does
+        fixed = {TileType.GREEN_GROCER: TileType.GREEN_GROCER.get_fertility(),
+                 TileType.GRASS: TileType.GRASS.get_fertility()}
+
+        # Every crop on the board, gathered once so that each turn of the horizon is a
+        # single pass over parallel lists of the crops still growing
+        none = CropType.NONE.name
+        first = self.values[0]
+        indices, rows, crop_values, timers, steps = [], [], [], [], []
+        growth_values, sensitivities, multipliers, fixed_fertility = [], [], [], []
+        for y in range(height):
+            for x in range(width):
+                tile = tile_map.get_tile(x, y)
+                crop = tile.crop
+                if crop.type == none:
+                    continue
+                index = y * width + x
+                first[index] = crop.value
+                step = rain_steps if tile.rain_totem_effect else 1
+                # Growing takes every turn until ripe, so the turn a crop ripens follows from its timer
+                turns = -(-crop.growth_timer // step) if crop.growth_timer > 0 else 0
+                self.ripe_turn[index] = self.turn + turns if turns <= horizon else self.turn + horizon + 1
+                if turns == 0:
+                    continue
+                crop_type = CropType[crop.type]
+                indices.append(index)
+                rows.append(y)
+                crop_values.append(crop.value)
+                timers.append(crop.growth_timer)
+                steps.append(step)
+                growth_values.append(crop_type.get_growth_value())
+                sensitivities.append(crop_type.get_fertility_sensitivity())
+                multipliers.append(idol_multiplier if tile.fertility_idol_effect else 1)
+                # None where the tile follows the band
+                fixed_fertility.append(fixed.get(tile.type))
+
+        values = self.values
+        for k in range(horizon):
+            # Ripe crops keep their value, so only the growing ones are written over the copy
+            board = values[k + 1] = values[k][:]
+            if not indices:
+                continue
+            row_fertility = fertility_rows[k]
+            grown = [min(timer, step) for timer, step in zip(timers, steps)]
+            # Same arithmetic as growth_per_step and the simulator, so the values agree exactly
+            crop_values = [value + growth_value * (1 - sensitivity + sensitivity
+                                                   * ((row_fertility[y] if fertility is None else fertility)
+                                                      * multiplier)) * count
+                           for value, growth_value, sensitivity, fertility, y, multiplier, count
+                           in zip(crop_values, growth_values, sensitivities, fixed_fertility, rows, multipliers,
+                                  grown)]
+            for index, value in zip(indices, crop_values):
+                board[index] = value
+            timers = [timer - count for timer, count in zip(timers, grown)]
+            if min(timers) <= 0:
+                keep = [i for i, timer in enumerate(timers) if timer > 0]
+                indices, rows, crop_values, timers, steps, growth_values, sensitivities, multipliers, \
+                    fixed_fertility = [[column[i] for i in keep] for column in
+                                       (indices, rows, crop_values, timers, steps, growth_values, sensitivities,
+                                        multipliers, fixed_fertility)]
+
+    def value_at(self, x: int, y: int, k: int) -> float:
+        """
+        Returns the value of the crop on (x, y) if harvested k turns from now
+        """
+        return self.values[min(k, self.horizon)][y * self.width + x]
+
+    def ripe_in(self, x: int, y: int) -> int:
+        """
+        Returns how many turns until the crop on (x, y) can be harvested
+        """
+        return self.ripe_turn[y * self.width + x] - self.turn
+
+    def total_value(self, k: int, mask=None) -> float:
+        """
+        Returns the summed projected value k turns from now, optionally only over a board mask
+        """
+        values = self.values[min(k, self.horizon)]
+        if mask is None:
+            return sum(values)
+        return sum([value for value, bit in zip(values, mask) if bit])
+
+
+def planted_value(crop_type: CropType, y: int, plant_turn: int, fertility_multiplier: float = 1,
+                  rain_steps: int = 1, schedule: Optional[FertilitySchedule] = None) -> float:
+    """
+    Returns what a crop planted on row y on plant_turn is worth once ripe, following
+    the band as it moves over the row while the crop grows
+    :param crop_type: Crop to plant
+    :param y: Row to plant on
+    :param plant_turn: Turn the seed is planted
+    :param fertility_multiplier: Fertility idol multiplier if the tile has one
+    :param rain_steps: Growth steps per turn, above 1 under a rain totem
+    :param schedule: Band schedule to use
+    :return: Value when ripe
+    """
+    schedule = schedule if schedule is not None else default_schedule
+    timer = crop_type.get_growth_time()
+    value = 0.0
+    turn = plant_turn
+    while timer > 0:
+        grown = min(timer, rain_steps)
+        value += growth_per_step(crop_type, schedule.fertility(turn, y) * fertility_multiplier) * grown
+        timer -= grown
+        turn += 1
+    return value
@@ -4,6 +4,7 @@ from model.game_state import GameState
 from model.player import Player
 from model.position import Position
 from api.constants import Constants
+from api.reach import reach
 
 import sys
 
@@ -48,16 +49,7 @@ def within_move_range(game_state: GameState, name: str) -> List[Position]:
     :return: List of positions that the player can move to
     """
     my_player = get_player_from_name(game_state, name)
-    speed = my_player.max_movement
-    res = []
-
-    for i in range(my_player.position.y - speed, my_player.position.y + speed):
-        leftover_travel = max(0, speed - abs(my_player.position.y - i));
-        for j in range(my_player.position.x - leftover_travel, my_player.position.x + leftover_travel):
-            pos = Position(j, i)
-            if valid_position(pos):
-                res.append(pos)
-    return res
+    return list(reach.positions(my_player.position.x, my_player.position.y, my_player.max_movement))
 
 
 def within_harvest_range(game_state: GameState, name: str) -> List[Position]:
@@ -68,15 +60,7 @@ def within_harvest_range(game_state: GameState, name: str) -> List[Position]:
     :return: List of positions that the player can harvest
     """
     my_player = get_player_from_name(game_state, name)
-    radius = my_player.harvest_radius
-    res = []
-
-    for i in range(my_player.position.y - radius, my_player.position.y + radius + 1):
-        for j in range(my_player.position.x - radius, my_player.position.x + radius + 1):
-            pos = Position(j, i)
-            if distance(my_player.position, pos) <= my_player.harvest_radius and valid_position(pos):
-                res.append(pos)
-    return res
+    return list(reach.positions(my_player.position.x, my_player.position.y, my_player.harvest_radius))
 
 
 def tile_type_on_turn(turn: int, game_state: GameState, coord: Position) -> TileType:
@@ -88,7 +72,7 @@ def tile_type_on_turn(turn: int, game_state: GameState, coord: Position) -> Tile
     :param coord: Coordinate to check at
     :return: TileType corresponding to the tile type of the tile given by coord
     """
-    shifts = (turn - 1 - constants.F_BAND_INIT_DELAY) / constants.F_BAND_MOVE_DELAY;
+    shifts = (turn - 1 - constants.FBAND_INIT_DELAY) // constants.FBAND_MOVE_DELAY;
     shifts = max(0, shifts);
 
     row = coord.y
@@ -97,23 +81,23 @@ def tile_type_on_turn(turn: int, game_state: GameState, coord: Position) -> Tile
     # Offset records how far into the fertility zone a row is (negative indicates below)
     # Init position indicates the first row that will * become * part of a band after the first shift
     # e.g. 0 = > fertility band starts off the map while 1 = > fertility band starts with 1 row on the map int
-    offset = shifts - row - 1 + constants.F_BAND_INIT_POSITION;
+    offset = shifts - row - 1 + constants.FBAND_INIT_POSITION;
     if (offset < 0):
         # Below fertility band
         newType = TileType.SOIL
-    elif offset < constants.F_BAND_OUTER_HEIGHT:
+    elif offset < constants.FBAND_OUTER_HEIGHT:
         # Within first outer band
         newType = TileType.F_BAND_OUTER
-    elif offset < constants.F_BAND_OUTER_HEIGHT + constants.F_BAND_MID_HEIGHT:
+    elif offset < constants.FBAND_OUTER_HEIGHT + constants.FBAND_MID_HEIGHT:
         # Within first mid band
         newType = TileType.F_BAND_MID
-    elif offset < constants.F_BAND_OUTER_HEIGHT + constants.F_BAND_MID_HEIGHT + constants.F_BAND_INNER_HEIGHT:
+    elif offset < constants.FBAND_OUTER_HEIGHT + constants.FBAND_MID_HEIGHT + constants.FBAND_INNER_HEIGHT:
         # Within inner band
         newType = TileType.F_BAND_INNER
-    elif offset < constants.F_BAND_OUTER_HEIGHT + 2 * constants.F_BAND_MID_HEIGHT + constants.F_BAND_INNER_HEIGHT:
+    elif offset < constants.FBAND_OUTER_HEIGHT + 2 * constants.FBAND_MID_HEIGHT + constants.FBAND_INNER_HEIGHT:
         # Within second mid band
         newType = TileType.F_BAND_MID
-    elif offset < 2 * constants.F_BAND_OUTER_HEIGHT + 2 * constants.F_BAND_MID_HEIGHT + constants.F_BAND_INNER_HEIGHT:
+    elif offset < 2 * constants.FBAND_OUTER_HEIGHT + 2 * constants.FBAND_MID_HEIGHT + constants.FBAND_INNER_HEIGHT:
         # Within second outer band
         newType = TileType.F_BAND_OUTER
     else:
@@ -0,0 +1,275 @@
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
+from model.game_state import GameState
+from model.position import position_at
+from model.tile_type import TileType
+from model.crop_type import CropType
+from model.decisions.harvest_decision import HarvestDecision
+from model.array_tile_map import and_not_mask, mask_indices
+from api.constants import Constants
+from api.distance_field import DistanceField, grocer_distance_field, step_toward, turns_to_cover
+from api.legal_moves import LegalMoves
+from api.reach import ReachIndex, reach as default_reach
+from api.simulator import MAX_TURNS
+from api import game_util
+
+import heapq
+import itertools
+
+# Stops ranked before dropping the ones that reach the same crops, as a multiple of max_stops
+STOP_POOL = 4
+
+
+class HarvestStop:
+    __slots__ = ("x", "y", "turn", "crops", "value")
+
+    def __init__(self, x: int, y: int, turn: int, crops: List[Tuple[int, int]], value: float) -> None:
+        self.x = x
+        self.y = y
+        # Turn whose action phase harvests here
+        self.turn = turn
+        self.crops = crops
+        self.value = value
+
+    def harvest_decision(self) -> HarvestDecision:
+        return HarvestDecision([position_at(x, y) for x, y in self.crops])
+
+    def __repr__(self) -> str:
+        return f"HarvestStop(({self.x},{self.y}), turn {self.turn}, {len(self.crops)} crops, {self.value:.1f})"
+
+
+class HarvestRoute:
+    """
+    Standing positions to harvest from, in order, followed by the trip to the
+    Green Grocer to sell on sell_turn. An empty route means going straight there.
+
+    A route can be followed over several turns: it holds until its next stop
+    (or the grocer) is reached, falls behind schedule, or loses a crop it was
+    going to harvest there.
+    """
+
+    def __init__(self, stops: List[HarvestStop], value: float, sell_turn: int,
+                 grocer: Optional[DistanceField] = None) -> None:
+        self.stops = stops
+        self.value = value
+        self.sell_turn = sell_turn
+        self.grocer = grocer
+
+    def next_move(self, game_state: GameState, x: int, y: int, max_movement: int) -> Tuple[int, int]:
+        """
+        Returns the tile to move to this turn: toward the first stop, or toward the grocer once there are none
+        """
+        if not self.stops:
+            grocer = self.grocer if self.grocer is not None else grocer_distance_field(game_state)
+            return grocer.step_toward(x, y, max_movement)
+        stop = self.stops[0]
+        return step_toward(x, y, stop.x, stop.y, max_movement)
+
+    def holds(self, game_state: GameState, player_id: int) -> bool:
+        """
+        Returns whether the route can still be followed from this move phase, or should be planned again
+        """
+        player = game_state.player1 if player_id == 1 else game_state.player2
+        pos = player.position
+        if not self.stops:
+            return game_state.turn <= self.sell_turn \
+                and game_state.tile_map.get_tile(pos.x, pos.y).type != TileType.GREEN_GROCER
+        stop = self.stops[0]
+        if game_state.turn > stop.turn or (pos.x == stop.x and pos.y == stop.y):
+            return False
+        opponent = game_state.player2 if player_id == 1 else game_state.player1
+        ox, oy, radius = opponent.position.x, opponent.position.y, opponent.protection_radius
+        none = CropType.NONE.name
+        tile_map = game_state.tile_map
+        for x, y in stop.crops:
+            tile = tile_map.get_tile(x, y)
+            if tile.crop.type == none or tile.crop.growth_timer > 0 or tile.has_scarecrow_effect(player_id) \
+                    or abs(ox - x) + abs(oy - y) <= radius:
+                return False
+        return True
+
+    def __repr__(self) -> str:
+        return f"HarvestRoute({self.stops}, value {self.value:.1f}, sell on turn {self.sell_turn})"
+
+
+class HarvestRoutePlanner:
+    """
+    Orienteering-style planner for harvest trips: picks a sequence of standing
+    positions that collects the most ripe value that fits in the free carrying
+    capacity, and still sells it at the Green Grocer by a deadline.
+
+    Candidate stops are the tiles within harvest radius of a harvestable crop,
+    worth the crops they reach; only the best max_stops of them are kept. A
+    beam search then extends partial routes one stop at a time, each stop
+    costing the turns to walk there (at least one, for the action). Beams are
+    ranked by value per turn including the trip to sell, and a partial route
+    is pruned when even filling its free capacity with the most valuable crops
+    left could not beat the best route found so far.
+    """
+
+    def __init__(self, constants: Optional[Constants] = None, reach: Optional[ReachIndex] = None,
+                 beam_width: int = 6, max_stops: int = 48) -> None:
+        self.constants = constants if constants is not None else game_util.constants
+        self.reach = reach if reach is not None else default_reach
+        self.beam_width = beam_width
+        self.max_stops = max_stops
+        self._grocer: Optional[DistanceField] = None
+
+    def grocer_field(self, game_state: GameState) -> DistanceField:
+        """
+        Returns the distance field to the Green Grocer, which never moves, so it is looked up once
+        """
+        if self._grocer is None:
+            self._grocer = grocer_distance_field(game_state)
+        return self._grocer
+
+    def harvestable(self, game_state: GameState, player_id: int,
+                    legal: Optional[LegalMoves] = None) -> List[Tuple[int, int, float]]:
+        """
+        Returns (x, y, value) of every ripe crop the player may harvest, leaving out
+        the opponent's protection radius and scarecrow
+        :param legal: LegalMoves for the same state, whose masks are reused; built here if None
+        """
+        if legal is None:
+            legal = LegalMoves(game_state, self.constants, self.reach)
+        opponent = game_state.player2 if player_id == 1 else game_state.player1
+        protected = self.reach.mask(opponent.position.x, opponent.position.y, opponent.protection_radius)
+        mask = and_not_mask(and_not_mask(legal.ripe, protected), legal.scarecrow[player_id])
+        width = legal.width
+        tile_map = game_state.tile_map
+        res = []
+        for index in mask_indices(mask):
+            x, y = index % width, index // width
+            res.append((x, y, tile_map.get_tile(x, y).crop.value))
+        return res
+
+    def plan(self, game_state: GameState, player_id: int, deadline: int = MAX_TURNS,
+             max_detour: Optional[int] = None, legal: Optional[LegalMoves] = None) -> HarvestRoute:
+        """
+        Plans a harvest trip for the player from its current position, starting with this turn's move
+        :param game_state: GameState at the start of the move phase
+        :param player_id: 1 or 2
+        :param deadline: Last turn the crops can be sold on
+        :param max_detour: Most turns the trip may add to going straight to the grocer, no limit if None
+        :param legal: LegalMoves for the same state, whose masks are reused; built here if None
+        :return: HarvestRoute, with no stops if nothing is worth the detour
+        """
+        player = game_state.player1 if player_id == 1 else game_state.player2
+        turn = game_state.turn
+        movement = player.max_movement
+        grocer = self.grocer_field(game_state)
+        capacity = player.carring_capacity - sum(player.seed_inventory.values()) - len(player.harvested_inventory)
+        start_x, start_y = player.position.x, player.position.y
+        # Selling happens in a move phase, so even standing on the grocer it takes this turn's move
+        direct = turn + max(1, grocer.turns(start_x, start_y, movement)) - 1
+        if max_detour is not None:
+            deadline = min(deadline, direct + max_detour)
+        empty = HarvestRoute([], 0.0, direct, grocer)
+        crops = self.harvestable(game_state, player_id, legal)
+        if capacity <= 0 or not crops or direct > deadline:
+            return empty
+
+        # Drop crops that no stop near them could reach and still sell from in time. Each leg takes at
+        # least its distance over max_movement turns, so the two legs together cover at most this much
+        radius = player.harvest_radius
+        width = game_state.tile_map.map_width
+        reach_limit = (deadline - turn + 1) * movement + 2 * radius
+        grocer_distance = grocer.distance
+        crops = [crop for crop in crops if abs(crop[0] - start_x) + abs(crop[1] - start_y)
+                 + grocer_distance[crop[1] * width + crop[0]] <= reach_limit]
+        if not crops:
+            return empty
+        # Crops indexed most valuable first, so each stop's list of the crops it reaches comes out sorted
+        crops.sort(key=lambda crop: -crop[2])
+        values = [value for _, _, value in crops]
+        coords = self.reach.coords
+        # Board index of each stop to the crops it reaches and what they are worth together
+        reached: Dict[int, List[int]] = {}
+        worth: Dict[int, float] = {}
+        for n, (x, y, value) in enumerate(crops):
+            for cx, cy in coords(x, y, radius):
+                index = cy * width + cx
+                if index in worth:
+                    worth[index] += value
+                    reached[index].append(n)
+                else:
+                    worth[index] = value
+                    reached[index] = [n]
+        # Of the stops reaching the same crops only the one nearest to us is kept, ranked by what
+        # the crops that fit in our capacity are worth
+        nearest: Dict[Tuple[int, ...], Tuple[float, int, int]] = {}
+        for index in heapq.nlargest(self.max_stops * STOP_POOL, worth, key=worth.__getitem__):
+            members = reached[index]
+            key = tuple(members)
+            distance = abs(index % width - start_x) + abs(index // width - start_y)
+            kept = nearest.get(key)
+            if kept is None or distance < kept[1]:
+                value = worth[index] if len(members) <= capacity else sum(values[n] for n in members[:capacity])
+                nearest[key] = (value, distance, index)
+        ranked = sorted(nearest.values(), key=lambda kept: (-kept[0], kept[1]))[:self.max_stops]
+        stops = [((index % width, index // width), reached[index]) for _, _, index in ranked]
+        # best_left[k] is the most k more crops could be worth
+        best_left = list(itertools.accumulate(values[:capacity], initial=0.0))
+        # (x, y, crops reached, the same as bits, turns from there until the sale)
+        candidates = []
+        for (sx, sy), members in stops:
+            bits = 0
+            for n in members:
+                bits |= 1 << n
+            candidates.append((sx, sy, members, bits, max(1, grocer.turns(sx, sy, movement)) - 1))
+        # Turns to walk each distance and take the action at the end of it
+        travel = [max(1, turns_to_cover(distance, movement))
+                  for distance in range(width + game_state.tile_map.map_height)]
+
+        # A partial route: (value, turns elapsed, x, y, collected crop bits, capacity left, stops so far)
+        best = (0.0, direct, ())
+        beam = [(0.0, 0, start_x, start_y, 0, capacity, ())]
+        while beam:
+            # Children are scored first and only the ones kept in the beam are built
+            children = []
+            for parent in beam:
+                value, elapsed, x, y, collected, left, path = parent
+                for candidate in candidates:
+                    sx, sy, members, bits, sell_after = candidate
+                    if not bits & ~collected:
+                        continue
+                    arrive = elapsed + travel[abs(sx - x) + abs(sy - y)]
+                    sell = turn + arrive + sell_after
+                    if sell > deadline:
+                        continue
+                    gained = []
+                    child_value = value
+                    for n in members:
+                        if not collected >> n & 1:
+                            gained.append(n)
+                            child_value += values[n]
+                            if len(gained) == left:
+                                break
+                    if child_value > best[0] or (child_value == best[0] and sell < best[1]):
+                        best = (child_value, sell, path + ((sx, sy, turn + arrive - 1, gained),))
+                    # Nothing left to gain can lift this route above the best one
+                    child_left = left - len(gained)
+                    if child_left == 0 or child_value + best_left[min(child_left, len(best_left) - 1)] <= best[0]:
+                        continue
+                    children.append((child_value / (sell - turn + 1), child_value, arrive, parent, candidate, gained))
+            children.sort(key=itemgetter(0), reverse=True)
+            beam = []
+            seen = set()
+            for _, child_value, arrive, parent, (sx, sy, _, _, _), gained in children:
+                collected = parent[4]
+                for n in gained:
+                    collected |= 1 << n
+                # Routes ending on the same stop with the same crops are the same for what follows
+                key = (sx, sy, collected)
+                if key in seen:
+                    continue
+                seen.add(key)
+                beam.append((child_value, arrive, sx, sy, collected, parent[5] - len(gained),
+                             parent[6] + ((sx, sy, turn + arrive - 1, gained),)))
+                if len(beam) == self.beam_width:
+                    break
+
+        value, sell_turn, path = best
+        return HarvestRoute([HarvestStop(x, y, stop_turn, [crops[n][:2] for n in gained],
+                                         sum(values[n] for n in gained))
+                             for x, y, stop_turn, gained in path], value, sell_turn, grocer)
@@ -0,0 +1,113 @@
+from collections import deque
+from typing import Dict, Optional
+from api.constants import Constants
+from networking.io import Logger
+
+import json
+
+constants = Constants()
+logger = Logger()
+
+# Phases of a request from the engine, in the order they happen
+PHASES = ("stdin_wait", "json_decode", "model_build", "speculation_wait", "decision", "serialize")
+
+
+class PhaseTimer:
+    """
+    Keeps a rolling window of timings for each phase of the game loop and
+    warns when a response gets close to the engine's player timeout.
+
+    A response is everything from the moment the game state arrives on stdin
+    to the moment the decision has been written back, which is the span the
+    engine's timeout applies to.
+    """
+
+    def __init__(self, window: int = 200, warn_fraction: float = 0.8,
+                 timeout_ms: Optional[int] = None) -> None:
+        self.samples = {phase: deque(maxlen=window) for phase in PHASES}
+        self.samples["response"] = deque(maxlen=window)
+        self.totals = {phase: 0.0 for phase in self.samples}
+        self.counts = {phase: 0 for phase in self.samples}
+        self.maxima = {phase: 0.0 for phase in self.samples}
+        self.timeout = (timeout_ms if timeout_ms is not None else constants.PLAYER_TIMEOUT) / 1000
+        self.warn_fraction = warn_fraction
+        self.slow_responses = 0
+        # Speculative action decisions that were reused, those thrown away, and those given up on
+        # because they ran too long (also counted as misses)
+        self.speculation_hits = 0
+        self.speculation_misses = 0
+        self.speculation_timeouts = 0
+
+    def record(self, phase: str, seconds: float) -> None:
+        self.samples[phase].append(seconds)
+        self.totals[phase] += seconds
+        self.counts[phase] += 1
+        if seconds > self.maxima[phase]:
+            self.maxima[phase] = seconds
+
+    def record_response(self, seconds: float, turn: int) -> None:
+        """
+        Records the time taken to answer the engine and warns if it is close to the timeout
+        :param seconds: Time from receiving the game state to sending the decision
+        :param turn: Turn the response was for
+        """
+        self.record("response", seconds)
+        if seconds >= self.warn_fraction * self.timeout:
+            self.slow_responses += 1
+            logger.warning("[Turn %d] response took %.1fms of the %.0fms timeout",
+                           turn, seconds * 1000, self.timeout * 1000)
+
+    def record_speculation(self, hit: bool, turn: int, timed_out: bool = False) -> None:
+        """
+        Records whether the speculative action decision for a turn could be sent
+        :param hit: True if the real state matched the prediction
+        :param turn: Turn the decision was for
+        :param timed_out: True if the speculation was given up on before it finished
+        """
+        if hit:
+            self.speculation_hits += 1
+        else:
+            self.speculation_misses += 1
+        if timed_out:
+            self.speculation_timeouts += 1
+            logger.warning("[Turn %d] speculation still running at the deadline, deciding without it", turn)
+        else:
+            logger.debug("[Turn %d] speculation %s, %d hits and %d misses so far", turn, "hit" if hit else "missed",
+                         self.speculation_hits, self.speculation_misses)
+
+    def percentile(self, phase: str, fraction: float) -> float:
+        """
+        Returns a percentile of the rolling window for a phase
+        :param phase: Phase to look at
+        :param fraction: Percentile as a fraction, e.g. 0.95
+        :return: Seconds, or 0 if nothing was recorded yet
+        """
+        samples = sorted(self.samples[phase])
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+    def summary(self) -> Dict:
+        """
+        Returns the statistics for every phase, in milliseconds
+        """
+        res = {}
+        for phase in self.samples:
+            count = self.counts[phase]
+            res[phase] = {
+                'count': count,
+                'mean_ms': self.totals[phase] / count * 1000 if count else 0.0,
+                'p50_ms': self.percentile(phase, 0.5) * 1000,
+                'p95_ms': self.percentile(phase, 0.95) * 1000,
+                'max_ms': self.maxima[phase] * 1000,
+            }
+        res['slow_responses'] = self.slow_responses
+        res['speculation_hits'] = self.speculation_hits
+        res['speculation_misses'] = self.speculation_misses
+        res['speculation_timeouts'] = self.speculation_timeouts
+        res['timeout_ms'] = self.timeout * 1000
+        return res
+
+    def write_summary(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
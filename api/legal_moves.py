@@ -0,0 +1,285 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from model.game_state import GameState
+from model.player import Player
+from model.position import Position, position_at
+from model.tile_type import TileType
+from model.crop_type import CropType
+from model.item_type import ItemType
+from model.decisions.move_decision import MoveDecision
+from model.decisions.action_decision import ActionDecision
+from model.decisions.buy_decision import BuyDecision
+from model.decisions.harvest_decision import HarvestDecision
+from model.decisions.plant_decision import PlantDecision
+from model.decisions.use_item_decision import UseItemDecision
+from model.decisions.do_nothing_decision import DoNothingDecision
+from model.array_tile_map import ArrayTileMap, and_masks, and_not_mask, mask_indices
+from api.constants import Constants
+from api.reach import ReachIndex, reach as default_reach
+from api.simulator import UNPLANTABLE_TILES
+from api import game_util
+
+import random
+
+SEEDS = [crop for crop in CropType if crop != CropType.NONE]
+
+# Below this many tiles in reach, and with no mask built yet, checking the tiles
+# one by one is cheaper than building a board-wide mask
+DIRECT_LOOKUP_TILES = 64
+
+
+class LegalMoves:
+    """
+    Legal decisions for both players in one game state, following the rules the
+    simulator enforces.
+
+    The board is summarised into masks (one 0/1 byte per tile, index
+    y * width + x): free plantable tiles, ripe crops, the Green Grocer and each
+    player's scarecrow protection. A query ANDs those with the reach mask of the
+    player's radius, so its cost is a few big-integer operations no matter the
+    radius. Money and carrying capacity bound buy quantities and harvest sizes.
+    Masks are built on first use and kept; a search that changes a few tiles
+    can call update() instead of building a new LegalMoves. A one-off query over
+    a small radius skips the masks and checks its tiles directly.
+    """
+
+    def __init__(self, game_state: GameState, constants: Optional[Constants] = None,
+                 reach: Optional[ReachIndex] = None) -> None:
+        self.game_state = game_state
+        self.constants = constants if constants is not None else game_util.constants
+        self.reach = reach if reach is not None else default_reach
+        tile_map = game_state.tile_map
+        self.width = tile_map.map_width
+        self.height = tile_map.map_height
+
+        # Masks are built on first use, so a query only pays for the ones it needs
+        self._free: Optional[bytearray] = None
+        self._ripe: Optional[bytearray] = None
+        self._grocer: Optional[bytearray] = None
+        self._scarecrow: Optional[Dict[int, bytearray]] = None
+
+    @property
+    def free(self) -> bytearray:
+        """
+        Mask of the tiles that can be planted on: plantable type and no crop
+        """
+        if self._free is None:
+            tile_map = self.game_state.tile_map
+            if isinstance(tile_map, ArrayTileMap):
+                plantable = and_not_mask(b"\x01" * len(tile_map.tile_type),
+                                         tile_map.mask_tile_types(UNPLANTABLE_TILES))
+                self._free = bytearray(and_not_mask(plantable, tile_map.mask_planted()))
+            else:
+                none = CropType.NONE.name
+                self._free = bytearray([tile.crop.type == none and tile.type not in UNPLANTABLE_TILES
+                                        for row in tile_map.tiles for tile in row])
+        return self._free
+
+    @property
+    def ripe(self) -> bytearray:
+        """
+        Mask of the tiles holding a crop that can be harvested
+        """
+        if self._ripe is None:
+            tile_map = self.game_state.tile_map
+            if isinstance(tile_map, ArrayTileMap):
+                self._ripe = tile_map.mask_ripe()
+            else:
+                none = CropType.NONE.name
+                self._ripe = bytearray([tile.crop.type != none and tile.crop.growth_timer <= 0
+                                        for row in tile_map.tiles for tile in row])
+        return self._ripe
+
+    @property
+    def grocer(self) -> bytearray:
+        """
+        Mask of the Green Grocer tiles
+        """
+        if self._grocer is None:
+            tile_map = self.game_state.tile_map
+            if isinstance(tile_map, ArrayTileMap):
+                self._grocer = tile_map.mask_tile_types([TileType.GREEN_GROCER])
+            else:
+                self._grocer = bytearray([tile.type == TileType.GREEN_GROCER
+                                          for row in tile_map.tiles for tile in row])
+        return self._grocer
+
+    @property
+    def scarecrow(self) -> Dict[int, bytearray]:
+        """
+        Masks of the tiles each player may not harvest because of the other's scarecrow, by player id
+        """
+        if self._scarecrow is None:
+            tile_map = self.game_state.tile_map
+            if isinstance(tile_map, ArrayTileMap):
+                effects = tile_map.scarecrow_effect
+            else:
+                effects = [tile.scarecrow_effect for row in tile_map.tiles for tile in row]
+            # An effect holds the index (0 or 1) of the player it protects, -1 for none
+            self._scarecrow = {player_id: bytearray([effect >= 0 and effect + 1 != player_id for effect in effects])
+                               for player_id in (1, 2)}
+        return self._scarecrow
+
+    def update(self, coords: Iterable[Tuple[int, int]]) -> None:
+        """
+        Refreshes the masks built so far for tiles that changed since
+        :param coords: (x, y) of the changed tiles
+        """
+        none = CropType.NONE.name
+        tile_map = self.game_state.tile_map
+        for x, y in coords:
+            tile = tile_map.get_tile(x, y)
+            index = y * self.width + x
+            if self._free is not None:
+                self._free[index] = tile.crop.type == none and tile.type not in UNPLANTABLE_TILES
+            if self._ripe is not None:
+                self._ripe[index] = tile.crop.type != none and tile.crop.growth_timer <= 0
+            if self._grocer is not None:
+                self._grocer[index] = tile.type == TileType.GREEN_GROCER
+            if self._scarecrow is not None:
+                for player_id in (1, 2):
+                    self._scarecrow[player_id][index] = tile.has_scarecrow_effect(player_id)
+
+    def _player(self, player_id: int) -> Player:
+        return self.game_state.player1 if player_id == 1 else self.game_state.player2
+
+    def _positions(self, mask: bytes) -> List[Position]:
+        width = self.width
+        return [position_at(index % width, index // width) for index in mask_indices(mask)]
+
+    def free_capacity(self, player_id: int) -> int:
+        player = self._player(player_id)
+        return player.carring_capacity - sum(player.seed_inventory.values()) - len(player.harvested_inventory)
+
+    def move_targets(self, player_id: int) -> Tuple[Position, ...]:
+        """
+        Returns every position the player can move to, including staying put.
+        The Positions are shared with the reach cache and must not be modified.
+        """
+        player = self._player(player_id)
+        movement = player.max_movement
+        if player.has_coffee_thermos:
+            movement *= self.constants.COFFEE_THERMOS_MOVEMENT_MULTIPLIER
+        return self.reach.positions(player.position.x, player.position.y, movement)
+
+    def harvest_targets(self, player_id: int) -> List[Position]:
+        """
+        Returns the ripe crops in the player's harvest radius that are not
+        protected by the opponent's protection radius or scarecrow
+        """
+        player = self._player(player_id)
+        opponent = self._player(3 - player_id)
+        pos = player.position
+        coords = self.reach.coords(pos.x, pos.y, player.harvest_radius)
+        if self._ripe is None and len(coords) <= DIRECT_LOOKUP_TILES:
+            tile_map = self.game_state.tile_map
+            none = CropType.NONE.name
+            ox, oy, radius = opponent.position.x, opponent.position.y, opponent.protection_radius
+            res = []
+            for x, y in coords:
+                tile = tile_map.get_tile(x, y)
+                if tile.crop.type != none and tile.crop.growth_timer <= 0 and abs(ox - x) + abs(oy - y) > radius \
+                        and not tile.has_scarecrow_effect(player_id):
+                    res.append(position_at(x, y))
+            return res
+        protected = self.reach.mask(opponent.position.x, opponent.position.y, opponent.protection_radius)
+        mask = and_masks(self.reach.mask(pos.x, pos.y, player.harvest_radius), self.ripe)
+        mask = and_not_mask(and_not_mask(mask, protected), self.scarecrow[player_id])
+        return self._positions(mask)
+
+    def plant_targets(self, player_id: int) -> List[Position]:
+        """
+        Returns the empty, plantable tiles in the player's plant radius
+        """
+        player = self._player(player_id)
+        pos = player.position
+        coords = self.reach.coords(pos.x, pos.y, player.plant_radius)
+        if self._free is None and len(coords) <= DIRECT_LOOKUP_TILES:
+            tile_map = self.game_state.tile_map
+            none = CropType.NONE.name
+            res = []
+            for x, y in coords:
+                tile = tile_map.get_tile(x, y)
+                if tile.crop.type == none and tile.type not in UNPLANTABLE_TILES:
+                    res.append(position_at(x, y))
+            return res
+        return self._positions(and_masks(self.reach.mask(pos.x, pos.y, player.plant_radius), self.free))
+
+    def at_grocer(self, player_id: int) -> bool:
+        pos = self._player(player_id).position
+        if self._grocer is None:
+            return self.game_state.tile_map.get_tile(pos.x, pos.y).type == TileType.GREEN_GROCER
+        return bool(self._grocer[pos.y * self.width + pos.x])
+
+    def buy_limits(self, player_id: int) -> Dict[CropType, int]:
+        """
+        Returns the most seeds of each type the player can buy on its own, given its
+        money, loyalty discount and free carrying capacity; empty away from the grocer
+        """
+        if not self.at_grocer(player_id):
+            return {}
+        player = self._player(player_id)
+        capacity = self.free_capacity(player_id)
+        res = {}
+        for crop in SEEDS:
+            price = crop.get_seed_price()
+            quantity = int(player.money // price)
+            if player.discount > 0:
+                discounted = int(player.money // (price * (1 - player.discount)))
+                if discounted * price >= self.constants.GREEN_GROCER_LOYALTY_CARD_MINIMUM:
+                    quantity = max(quantity, discounted)
+            quantity = min(quantity, capacity)
+            if quantity > 0:
+                res[crop] = quantity
+        return res
+
+    def harvest_decision(self, player_id: int) -> Optional[HarvestDecision]:
+        """
+        Returns a decision harvesting every harvestable crop that fits in the
+        player's inventory, None if there is nothing to harvest
+        """
+        positions = self.harvest_targets(player_id)[:max(0, self.free_capacity(player_id))]
+        return HarvestDecision(positions) if positions else None
+
+    def plant_decision(self, player_id: int, crop_types: Optional[Iterable[CropType]] = None,
+                       positions: Optional[List[Position]] = None) -> Optional[PlantDecision]:
+        """
+        Returns a decision planting the player's seeds on free tiles in reach,
+        None if there are no seeds or no tiles
+        :param player_id: 1 or 2
+        :param crop_types: Seed types to plant, every type the player holds if None
+        :param positions: Tiles to plant on, in order of preference; every free tile in reach if None
+        """
+        inventory = self._player(player_id).seed_inventory
+        crop_types = list(crop_types) if crop_types is not None else list(inventory)
+        seeds = [crop for crop in crop_types for _ in range(inventory.get(crop, 0))]
+        positions = positions if positions is not None else self.plant_targets(player_id)
+        count = min(len(seeds), len(positions))
+        return PlantDecision(seeds[:count], positions[:count]) if count else None
+
+    def actions(self, player_id: int) -> List[ActionDecision]:
+        """
+        Returns one representative of each legal kind of action: doing nothing,
+        using the item, harvesting everything in reach, planting each seed type
+        held, and buying the most of each affordable seed type
+        """
+        player = self._player(player_id)
+        res: List[ActionDecision] = [DoNothingDecision()]
+        if not player.used_item and player.item != ItemType.NONE:
+            res.append(UseItemDecision())
+        harvest = self.harvest_decision(player_id)
+        if harvest is not None:
+            res.append(harvest)
+        positions = self.plant_targets(player_id)
+        if positions:
+            for crop, count in player.seed_inventory.items():
+                if count > 0:
+                    res.append(self.plant_decision(player_id, [crop], positions))
+        for crop, quantity in self.buy_limits(player_id).items():
+            res.append(BuyDecision([crop], [quantity]))
+        return res
+
+    def sample_move(self, player_id: int, rng: random.Random = random) -> MoveDecision:
+        return MoveDecision(rng.choice(self.move_targets(player_id)))
+
+    def sample_action(self, player_id: int, rng: random.Random = random) -> ActionDecision:
+        return rng.choice(self.actions(player_id))
@@ -0,0 +1,174 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from model.item_type import ItemType
+from model.upgrade_type import UpgradeType
+from api.config import config
+from api.tournament import Strategy, GameResult, _play_game, _quiet_worker
+
+import argparse
+import ast
+import hashlib
+import importlib.util
+import json
+import os
+
+ITEMS = [item for item in ItemType if item != ItemType.NONE]
+UPGRADES = [upgrade for upgrade in UpgradeType if upgrade != UpgradeType.NONE]
+# Strategies and the modules they use live under here; anything else is the standard library or a dependency
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def properties_hash() -> str:
+    """
+    Returns a hash of the game properties in use, so cached results are dropped when the rules change
+    """
+    content = "\n".join(f"{key}={value}" for key, value in sorted(config.properties.items()))
+    return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+
+def strategy_sources(module_name: str) -> List[str]:
+    """
+    Returns the source files of a strategy module and of every module of this
+    repository it imports, directly or through other repository modules
+    :param module_name: Strategy module
+    :return: Absolute paths, sorted
+    """
+    seen = set()
+    pending = [module_name]
+    while pending:
+        name = pending.pop()
+        try:
+            spec = importlib.util.find_spec(name)
+        except (ImportError, ValueError):
+            # e.g. the name of a function imported from a module
+            continue
+        if spec is None or not spec.has_location or not spec.origin.endswith(".py"):
+            continue
+        path = os.path.abspath(spec.origin)
+        if not path.startswith(REPO_ROOT + os.sep) or path in seen:
+            continue
+        seen.add(path)
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                pending.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                # "from api import game_util" imports a module by the second name
+                pending.append(node.module)
+                pending.extend(f"{node.module}.{alias.name}" for alias in node.names)
+    return sorted(seen)
+
+
+def strategy_version(module_name: str) -> str:
+    """
+    Returns a hash of the source of a strategy module and of every repository
+    module it imports, so cached results are dropped when the bot or any of the
+    code it uses changes
+    """
+    digest = hashlib.sha256()
+    for path in strategy_sources(module_name):
+        digest.update(os.path.relpath(path, REPO_ROOT).encode())
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()[:16]
+
+
+def cell_key(module_name: str, version: str, item: ItemType, upgrade: UpgradeType, opponent: Strategy,
+             opponent_version: str, games: int, seed: int) -> str:
+    return "|".join([module_name, version, item.name, upgrade.name, opponent.module_name, opponent_version,
+                     opponent.item.name, opponent.upgrade.name, properties_hash(), str(games), str(seed)])
+
+
+def _cell_stats(results: List[GameResult]) -> Dict:
+    n = len(results)
+    diffs = [result.a_money - result.b_money for result in results]
+    mean = sum(diffs) / n
+    return {
+        'games': n,
+        'mean_money': sum(result.a_money for result in results) / n,
+        'mean_money_diff': mean,
+        'variance': sum((diff - mean) ** 2 for diff in diffs) / (n - 1) if n > 1 else 0.0,
+        'win_rate': sum(result.a_money > result.b_money for result in results) / n,
+    }
+
+
+def sweep(module_name: str, opponent: Strategy, games: int, seed: int = 0, workers: Optional[int] = None,
+          cache_path: str = "loadout_cache.json", version: Optional[str] = None) -> Dict[Tuple[str, str], Dict]:
+    """
+    Plays every item x upgrade loadout of a strategy against a fixed opponent.
+    Cells already in the cache for the same strategy version, opponent,
+    properties, game count and seed are reused; the rest are played in one
+    batch across the process pool.
+    :param module_name: Strategy module to evaluate
+    :param opponent: Opponent strategy and its loadout
+    :param games: Games per cell
+    :param seed: Base seed; every cell plays the same seeds
+    :param workers: Worker processes, all available cores by default
+    :param cache_path: JSON file holding results from earlier sweeps
+    :param version: Strategy version, by default a hash of the module's source and the repository modules it uses
+    :return: {(item name, upgrade name): statistics}
+    """
+    version = version if version is not None else strategy_version(module_name)
+    opponent_version = strategy_version(opponent.module_name)
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cache = json.load(f)
+
+    keys = {(item, upgrade): cell_key(module_name, version, item, upgrade, opponent, opponent_version, games, seed)
+            for item in ITEMS for upgrade in UPGRADES}
+    missing = [cell for cell, key in keys.items() if key not in cache]
+    if missing:
+        args = [(Strategy(module_name, item, upgrade), opponent, i, seed + i, 1 + i % 2)
+                for item, upgrade in missing for i in range(games)]
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(workers, initializer=_quiet_worker) as pool:
+            results = list(pool.map(_play_game, args, chunksize=max(1, len(args) // (8 * workers))))
+        for n, cell in enumerate(missing):
+            cache[keys[cell]] = _cell_stats(results[n * games:(n + 1) * games])
+        with open(cache_path, "w") as f:
+            json.dump(cache, f, indent=1)
+
+    return {(item.name, upgrade.name): cache[key] for (item, upgrade), key in keys.items()}
+
+
+def format_matrix(results: Dict[Tuple[str, str], Dict]) -> str:
+    """
+    Returns the mean money difference as an item x upgrade table followed by the
+    loadouts ranked by it, with their standard deviation
+    """
+    width = max(len(upgrade.name) for upgrade in UPGRADES) + 2
+    lines = ["".ljust(16) + "".join(upgrade.name.rjust(width) for upgrade in UPGRADES)]
+    for item in ITEMS:
+        lines.append(item.name.ljust(16) + "".join(
+            f"{results[(item.name, upgrade.name)]['mean_money_diff']:.0f}".rjust(width) for upgrade in UPGRADES))
+    lines.append("")
+    ranked = sorted(results.items(), key=lambda entry: -entry[1]['mean_money_diff'])
+    for rank, ((item, upgrade), stats) in enumerate(ranked, 1):
+        lines.append(f"{rank:2d}. {item:16s} {upgrade:14s} diff {stats['mean_money_diff']:10.1f} "
+                     f"sd {stats['variance'] ** 0.5:9.1f} money {stats['mean_money']:10.1f} "
+                     f"win {stats['win_rate']:.2f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank every item x upgrade loadout of a strategy offline")
+    parser.add_argument("strategy", help="Module with get_move_decision/get_action_decision, e.g. bot")
+    parser.add_argument("--opponent", default="bot")
+    parser.add_argument("--opponent-item", default="COFFEE_THERMOS")
+    parser.add_argument("--opponent-upgrade", default="LONGER_LEGS")
+    parser.add_argument("--games", type=int, default=20, help="Games per loadout")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache", default="loadout_cache.json")
+    parser.add_argument("--version", default=None, help="Strategy version, defaults to a hash of its source")
+    args = parser.parse_args()
+
+    opponent = Strategy(args.opponent, ItemType[args.opponent_item], UpgradeType[args.opponent_upgrade])
+    results = sweep(args.strategy, opponent, args.games, args.seed, args.workers, args.cache, args.version)
+    print(format_matrix(results))
+
+
+if __name__ == "__main__":
+    main()
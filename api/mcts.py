@@ -0,0 +1,525 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from model.game_state import GameState
+from model.player import Player
+from model.position import Position
+from model.tile_type import TileType
+from model.crop_type import CropType
+from model.item_type import ItemType
+from model.decisions.move_decision import MoveDecision
+from model.decisions.action_decision import ActionDecision
+from model.decisions.buy_decision import BuyDecision
+from model.decisions.harvest_decision import HarvestDecision
+from model.decisions.plant_decision import PlantDecision
+from model.decisions.use_item_decision import UseItemDecision
+from model.decisions.do_nothing_decision import DoNothingDecision
+from api.simulator import Simulator, UNPLANTABLE_TILES
+from api.distance_field import RowDistanceField, grocer_distance_field, step_toward, turns_to_cover
+from api.fertility_schedule import schedule
+from api.forecast import planted_value
+from api.reach import reach
+from api.legal_moves import LegalMoves
+from api.transposition import TranspositionTable, LRU
+from api import game_util
+from networking.io import Logger
+
+import math
+import os
+import time
+
+logger = Logger()
+
+# Kinds of action a macro decision can end with; the concrete ActionDecision is
+# built after the move, when the tiles in reach are known
+HARVEST = "harvest"
+PLANT = "plant"
+BUY = "buy"
+USE_ITEM = "use_item"
+NOTHING = "nothing"
+
+# Rollouts a transposition table entry averages before leaves that reach its state reuse it
+MIN_SAMPLES = 4
+
+# How much more than its price a seed must be expected to sell for before rollouts buy it. The
+# estimate leaves out the turns spent planting and harvesting, and the opponent, so thin margins lose
+MIN_SEED_MARGIN = 1.2
+
+# Expected seed values by (turn, movement, last turn of the game), shared by all rollouts
+_seed_values: Dict[Tuple[int, int, int], Dict[CropType, float]] = {}
+
+
+def _player(game_state: GameState, player_id: int) -> Player:
+    return game_state.player1 if player_id == 1 else game_state.player2
+
+
+def _opponent(game_state: GameState, player_id: int) -> Player:
+    return game_state.player2 if player_id == 1 else game_state.player1
+
+
+def _free_capacity(player: Player) -> int:
+    return player.carring_capacity - sum(player.seed_inventory.values()) - len(player.harvested_inventory)
+
+
+def _free_planting_tile(game_state: GameState, player_id: int) -> Optional[Tuple[int, int]]:
+    """
+    Returns the nearest empty tile to plant on, on the inner band if it has one and
+    anywhere on the fertility band otherwise
+    :return: (x, y), None if the band is full or not on the board yet
+    """
+    pos = _player(game_state, player_id).position
+    tile_map = game_state.tile_map
+    for rows in (schedule.rows_of_type(game_state.turn, TileType.F_BAND_INNER), schedule.fertile_rows(game_state.turn)):
+        best = None
+        best_dist = None
+        for y in rows:
+            for x in range(tile_map.map_width):
+                dist = abs(pos.x - x) + abs(pos.y - y)
+                if best_dist is not None and dist >= best_dist:
+                    continue
+                tile = tile_map.get_tile(x, y)
+                if tile.type not in UNPLANTABLE_TILES and tile.crop.type == CropType.NONE.name:
+                    best, best_dist = (x, y), dist
+        if best is not None:
+            return best
+    return None
+
+
+def seed_values(turn: int, max_movement: int, max_turns: int) -> Dict[CropType, float]:
+    """
+    Returns the expected sale value of one seed of each type bought at the grocer
+    on a turn: the best row to plant it on, walking there and back from the grocer
+    :param turn: Turn the seeds are bought
+    :param max_movement: Tiles the player moves per turn
+    :param max_turns: Last turn of the game
+    :return: {crop: value}, 0 for seeds that can't ripen and be sold in time
+    """
+    key = (turn, max_movement, max_turns)
+    res = _seed_values.get(key)
+    if res is None:
+        res = {crop: 0.0 for crop in CropType if crop != CropType.NONE}
+        constants = game_util.constants
+        for y in range(constants.GRASS_ROWS, constants.BOARD_HEIGHT):
+            # The grocer is on the first row, so the trip is the same both ways; the crop
+            # is harvested the turn after it ripens
+            trip = turns_to_cover(y, max_movement)
+            plant_turn = turn + trip
+            for crop in res:
+                if plant_turn + crop.get_growth_time() + 1 + trip <= max_turns:
+                    res[crop] = max(res[crop], planted_value(crop, y, plant_turn))
+        _seed_values[key] = res
+    return res
+
+
+def viable_seeds(game_state: GameState, player: Player, max_turns: Optional[int] = None) -> List[CropType]:
+    """
+    Returns the seed types worth buying, best first. With max_turns, only those
+    expected to ripen, be carried back and sell for MIN_SEED_MARGIN times what they
+    cost by then, the most profitable first; otherwise every type, dearest first.
+    :param game_state: Current GameState
+    :param player: Player buying the seeds, for its movement
+    :param max_turns: Last turn of the game, None to skip the estimate
+    """
+    res = [crop for crop in sorted(CropType, key=lambda c: -c.get_seed_price()) if crop != CropType.NONE]
+    if max_turns is None:
+        return res
+    values = seed_values(game_state.turn, player.max_movement, max_turns)
+    res = [crop for crop in res if values[crop] > crop.get_seed_price() * MIN_SEED_MARGIN]
+    res.sort(key=lambda crop: crop.get_seed_price() - values[crop])
+    return res
+
+
+def _soonest_crop(game_state: GameState, player_id: int,
+                  coords: Optional[Iterable[Tuple[int, int]]] = None) -> Optional[Tuple[int, int]]:
+    """
+    Returns the crop the player could harvest soonest, walking there while it ripens,
+    the most valuable one among equals. Ripe crops in the opponent's protection
+    radius are left out; growing ones aren't, the opponent may have moved on by then.
+    :param coords: Tiles to look at, the whole board if None
+    :return: (x, y), None if there is no crop the player may harvest
+    """
+    player = _player(game_state, player_id)
+    pos = player.position
+    opponent = _opponent(game_state, player_id)
+    ox, oy, radius = opponent.position.x, opponent.position.y, opponent.protection_radius
+    none = CropType.NONE.name
+    tile_map = game_state.tile_map
+    if coords is None:
+        coords = ((x, y) for y in range(tile_map.map_height) for x in range(tile_map.map_width))
+    best = None
+    best_key = None
+    for x, y in coords:
+        tile = tile_map.get_tile(x, y)
+        crop = tile.crop
+        if crop.type == none or tile.has_scarecrow_effect(player_id) \
+                or (crop.growth_timer <= 0 and abs(ox - x) + abs(oy - y) <= radius):
+            continue
+        key = (max(turns_to_cover(abs(pos.x - x) + abs(pos.y - y), player.max_movement), crop.growth_timer),
+               -crop.value)
+        if best_key is None or key < best_key:
+            best, best_key = (x, y), key
+    return best
+
+
+def build_action(game_state: GameState, player_id: int, kind: str, max_turns: Optional[int] = None) -> ActionDecision:
+    """
+    Turns an action kind into a concrete decision for the player's current position
+    :param game_state: GameState after the move phase
+    :param player_id: 1 or 2
+    :param kind: One of HARVEST, PLANT, BUY, USE_ITEM, NOTHING
+    :param max_turns: Last turn of the game; if given, only seeds that can turn a profit by then are bought
+    :return: ActionDecision, DoNothingDecision if the kind has nothing to do
+    """
+    player = _player(game_state, player_id)
+    pos = player.position
+    tile_map = game_state.tile_map
+    if kind == HARVEST:
+        opponent = _opponent(game_state, player_id)
+        positions = []
+        for x, y in reach.coords(pos.x, pos.y, player.harvest_radius):
+            tile = tile_map.get_tile(x, y)
+            if tile.crop.type != CropType.NONE.name and tile.crop.growth_timer <= 0 \
+                    and abs(opponent.position.x - x) + abs(opponent.position.y - y) > opponent.protection_radius \
+                    and not tile.has_scarecrow_effect(player_id):
+                positions.append(Position(x, y))
+        positions = positions[:max(0, player.carring_capacity - len(player.harvested_inventory))]
+        if positions:
+            return HarvestDecision(positions)
+    elif kind == PLANT:
+        # The dearest seeds go on the most fertile tiles, in case not all of them fit
+        seeds = sorted((crop for crop, count in player.seed_inventory.items() for _ in range(count)),
+                       key=lambda crop: -crop.get_seed_price())
+        free = []
+        for x, y in reach.coords(pos.x, pos.y, player.plant_radius):
+            tile = tile_map.get_tile(x, y)
+            if tile.type not in UNPLANTABLE_TILES and tile.crop.type == CropType.NONE.name:
+                free.append((-tile.type.get_fertility(), x, y))
+        free.sort()
+        coords = [Position(x, y) for _, x, y in free[:len(seeds)]]
+        if coords:
+            return PlantDecision(seeds[:len(coords)], coords)
+    elif kind == BUY:
+        if tile_map.get_tile(pos.x, pos.y).type == TileType.GREEN_GROCER:
+            # As many of the best seed as fit, then the next best with what is left. Cheaper than an
+            # exact knapsack, which rollouts would have to rebuild for every amount of money
+            money = player.money
+            capacity = _free_capacity(player)
+            crops, quantities = [], []
+            for crop in viable_seeds(game_state, player, max_turns):
+                quantity = min(int(money // crop.get_seed_price()), capacity)
+                if quantity > 0:
+                    crops.append(crop)
+                    quantities.append(quantity)
+                    money -= quantity * crop.get_seed_price()
+                    capacity -= quantity
+            if crops:
+                return BuyDecision(crops, quantities)
+    elif kind == USE_ITEM:
+        if not player.used_item and player.item != ItemType.NONE:
+            return UseItemDecision()
+    return DoNothingDecision()
+
+
+class GreedyRolloutPolicy:
+    """
+    Cheap default policy for rollouts: plant any seeds held on the nearest free
+    band tiles, the inner band first, then collect its own ripe crops, then sell
+    what it carries and buy seeds at the grocer that can still ripen before the
+    game ends; it harvests whatever is ripe in reach. With nothing to plant or
+    buy, or with its own crops ripening sooner than a trip to the grocer, it
+    walks to the crop of its own it can harvest soonest and waits for it there,
+    where the protection radius keeps the opponent off it; before it has planted
+    anything in the rollout, any crop will do.
+    """
+
+    def __init__(self) -> None:
+        # Tiles each player planted on since the last reset
+        self.planted: Dict[int, Set[Tuple[int, int]]] = {1: set(), 2: set()}
+
+    def reset(self) -> None:
+        for coords in self.planted.values():
+            coords.clear()
+
+    def record_action(self, player_id: int, decision: ActionDecision) -> None:
+        """
+        Notes an action the player takes, whoever decided it, so crops it plants count as its own
+        """
+        if isinstance(decision, PlantDecision):
+            self.planted[player_id].update((pos.x, pos.y) for pos in decision.coords)
+
+    def move(self, simulator: Simulator, game_state: GameState, player_id: int) -> MoveDecision:
+        player = _player(game_state, player_id)
+        pos = player.position
+        x, y = pos.x, pos.y
+        seeds = viable_seeds(game_state, player, simulator.max_turns)
+        free = _free_planting_tile(game_state, player_id) if sum(player.seed_inventory.values()) > 0 else None
+        planted = self.planted[player_id]
+        target = _soonest_crop(game_state, player_id, planted) if planted else None
+        timer = game_state.tile_map.get_tile(*target).crop.growth_timer if target is not None else None
+        ripe = timer is not None and timer <= 0
+        grocer = grocer_distance_field(game_state)
+        # Crops that ripen before a round trip to the grocer would be back are worth waiting for
+        waiting = timer is not None and timer <= 2 * grocer.turns(pos.x, pos.y, player.max_movement)
+        # Whatever is carried once the walk to the grocer takes the turns left would go unsold
+        last_trip = game_state.turn + grocer.turns(pos.x, pos.y, player.max_movement) + 1 >= simulator.max_turns
+        if player.harvested_inventory and last_trip:
+            x, y = grocer.step_toward(pos.x, pos.y, player.max_movement)
+        elif sum(player.seed_inventory.values()) > 0 and free is not None:
+            x, y = step_toward(pos.x, pos.y, free[0], free[1], player.max_movement)
+        elif ripe and _free_capacity(player) > 0:
+            x, y = step_toward(pos.x, pos.y, target[0], target[1], player.max_movement)
+        elif not waiting and (player.harvested_inventory or (seeds and player.money >= seeds[-1].get_seed_price())):
+            x, y = grocer.step_toward(pos.x, pos.y, player.max_movement)
+        else:
+            if target is None:
+                target = _soonest_crop(game_state, player_id)
+            if target is not None:
+                x, y = step_toward(pos.x, pos.y, target[0], target[1], player.max_movement)
+        return MoveDecision(Position(x, y))
+
+    def action(self, simulator: Simulator, game_state: GameState, player_id: int) -> ActionDecision:
+        # Seeds are only planted once on the band; on the way there the rows are arid
+        kinds = (HARVEST, BUY, PLANT) \
+            if schedule.fertility(game_state.turn, _player(game_state, player_id).position.y) > 0 else (HARVEST, BUY)
+        for kind in kinds:
+            decision = build_action(game_state, player_id, kind, simulator.max_turns)
+            if not isinstance(decision, DoNothingDecision):
+                self.record_action(player_id, decision)
+                return decision
+        return DoNothingDecision()
+
+
+class RandomRolloutPolicy:
+    """
+    Uniformly random legal decisions, drawn from the simulator's seeded RNG
+    """
+
+    def reset(self) -> None:
+        pass
+
+    def record_action(self, player_id: int, decision: ActionDecision) -> None:
+        pass
+
+    def move(self, simulator: Simulator, game_state: GameState, player_id: int) -> MoveDecision:
+        return LegalMoves(game_state).sample_move(player_id, simulator.random)
+
+    def action(self, simulator: Simulator, game_state: GameState, player_id: int) -> ActionDecision:
+        return LegalMoves(game_state).sample_action(player_id, simulator.random)
+
+
+def candidate_macros(game_state: GameState, player_id: int) -> List[Tuple[Tuple[int, int], str]]:
+    """
+    Returns the (move target, action kind) pairs the tree expands from a state:
+    staying, heading for the grocer or heading for the inner band, each followed
+    by every action kind
+    """
+    player = _player(game_state, player_id)
+    pos = player.position
+    targets = {(pos.x, pos.y), grocer_distance_field(game_state).step_toward(pos.x, pos.y, player.max_movement)}
+    rows = schedule.rows_of_type(game_state.turn, TileType.F_BAND_INNER)
+    if rows:
+        targets.add(RowDistanceField(rows).step_toward(pos.x, pos.y, player.max_movement))
+    kinds = [HARVEST, PLANT, BUY, NOTHING]
+    if not player.used_item and player.item != ItemType.NONE:
+        kinds.append(USE_ITEM)
+    return [(target, kind) for target in sorted(targets) for kind in kinds]
+
+
+class Node:
+    def __init__(self) -> None:
+        self.visits = 0
+        self.total = 0.0
+        self.children: Optional[Dict[Tuple[Tuple[int, int], str], "Node"]] = None
+
+
+def _rollout(simulator: Simulator, game_state: GameState, player_id: int, policy, horizon: Optional[int]) -> float:
+    end_turn = simulator.max_turns if horizon is None else min(simulator.max_turns, game_state.turn + horizon)
+    while game_state.turn <= end_turn:
+        simulator.apply_moves(game_state, policy.move(simulator, game_state, 1), policy.move(simulator, game_state, 2))
+        simulator.apply_actions(game_state, policy.action(simulator, game_state, 1),
+                                policy.action(simulator, game_state, 2))
+    player = _player(game_state, player_id)
+    # Crops still being carried count at their sale value
+    return player.money + sum(crop['value'] for crop in player.harvested_inventory)
+
+
+def _apply_macro(simulator: Simulator, game_state: GameState, player_id: int, macro, policy) -> None:
+    other = 2 if player_id == 1 else 1
+    moves = {player_id: MoveDecision(Position(*macro[0])), other: policy.move(simulator, game_state, other)}
+    simulator.apply_moves(game_state, moves[1], moves[2])
+    actions = {player_id: build_action(game_state, player_id, macro[1], simulator.max_turns),
+               other: policy.action(simulator, game_state, other)}
+    # The rollout that follows should tend the crops the macros planted
+    policy.record_action(player_id, actions[player_id])
+    simulator.apply_actions(game_state, actions[1], actions[2])
+
+
+def search(game_state: GameState, player_id: int, policy, seconds: Optional[float], iterations: Optional[int],
+           exploration: float, horizon: Optional[int], seed: int, table_size: int = 0, replacement: str = LRU,
+           min_samples: int = MIN_SAMPLES):
+    """
+    Runs one open-loop UCT search from game_state. Only the sequence of macro
+    decisions is stored in the tree; every iteration replays it on a fresh copy
+    of the root, so chance outcomes are averaged over rather than branched on.
+
+    With a transposition table, leaves are keyed by their Zobrist hash and a
+    leaf state reached again by another sequence of macros (many action kinds
+    do nothing where they are tried) is still rolled out, adding to its table
+    entry, until the entry averages min_samples rollouts; after that the leaf
+    reuses the average instead of rolling out.
+    :return: ({macro: (visits, total reward)} for the root's children, rollouts played, iterations that
+        reused a table entry instead)
+    """
+    simulator = Simulator(seed)
+    table = TranspositionTable(table_size, replacement) if table_size > 0 else None
+    if table is not None:
+        # Clones of the root carry its hash, and the simulator keeps theirs up to date
+        simulator.zobrist.hash(game_state)
+    root = Node()
+    deadline = time.perf_counter() + seconds if seconds is not None else None
+    low, high = math.inf, -math.inf
+    rollouts = reused = 0
+    while (iterations is None or rollouts + reused < iterations) \
+            and (deadline is None or time.perf_counter() < deadline):
+        state = game_state.clone()
+        policy.reset()
+        node = root
+        path = [node]
+        while not simulator.is_game_over(state):
+            if node.children is None:
+                node.children = {macro: Node() for macro in candidate_macros(state, player_id)}
+                macro = simulator.random.choice(list(node.children))
+                node = node.children[macro]
+                path.append(node)
+                _apply_macro(simulator, state, player_id, macro, policy)
+                break
+            scale = (high - low) if high > low else 1.0
+            log_visits = math.log(node.visits + 1)
+
+            def ucb(item):
+                child = item[1]
+                if child.visits == 0:
+                    return math.inf
+                return child.total / child.visits + exploration * scale * math.sqrt(log_visits / child.visits)
+
+            macro, node = max(node.children.items(), key=ucb)
+            path.append(node)
+            _apply_macro(simulator, state, player_id, macro, policy)
+            if node.visits == 0:
+                break
+        if table is None:
+            reward = _rollout(simulator, state, player_id, policy, horizon)
+            rollouts += 1
+        else:
+            key = state.zobrist
+            depth = (simulator.max_turns if horizon is None else state.turn + horizon) - state.turn
+            entry = table.get(key, depth)
+            if entry is not None and entry.count >= min_samples:
+                reward = entry.value
+                reused += 1
+            else:
+                # Rollout states are never looked up, so they skip the hashing
+                state.zobrist = None
+                reward = _rollout(simulator, state, player_id, policy, horizon)
+                table.store(key, depth, reward)
+                rollouts += 1
+        low, high = min(low, reward), max(high, reward)
+        for visited in path:
+            visited.visits += 1
+            visited.total += reward
+    children = root.children or {}
+    return {macro: (child.visits, child.total) for macro, child in children.items()}, rollouts, reused
+
+
+class MCTSPlanner:
+    """
+    Monte Carlo tree search over joint move + action decisions, scored by our
+    money at the end of simulated games. The search is root-parallel: each
+    worker process grows its own tree from the current state with its own seed,
+    and the root statistics are summed to pick the decision.
+    """
+
+    def __init__(self, policy=None, workers: Optional[int] = None, exploration: float = 0.7,
+                 horizon: Optional[int] = None, seed: int = 0, table_size: int = 1 << 16,
+                 replacement: str = LRU, min_samples: int = MIN_SAMPLES) -> None:
+        """
+        :param policy: Rollout policy with move(), action(), record_action() and reset(), GreedyRolloutPolicy by default
+        :param workers: Worker processes, all available cores by default; 1 searches in this process
+        :param exploration: UCT exploration constant, relative to the observed reward range
+        :param horizon: Turns to roll out before scoring, None to play to the end of the game
+        :param seed: Base seed, each worker and turn gets a different one derived from it
+        :param table_size: Entries in each worker's transposition table, 0 to roll out every leaf
+        :param replacement: LRU or DEPTH_PREFERRED, from api.transposition
+        :param min_samples: Rollouts a table entry averages before a leaf reuses it instead of rolling out
+        """
+        self.policy = policy if policy is not None else GreedyRolloutPolicy()
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.exploration = exploration
+        self.horizon = horizon
+        self.seed = seed
+        self.table_size = table_size
+        self.replacement = replacement
+        self.min_samples = min_samples
+        self.pool = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+        self.planned_kind = NOTHING
+        self.stats = {'rollouts': 0, 'reused': 0, 'seconds': 0.0, 'rollouts_per_second': 0.0,
+                      'workers': self.workers}
+
+    def plan(self, game_state: GameState, seconds: Optional[float] = None,
+             iterations: Optional[int] = None) -> Tuple[Tuple[int, int], str]:
+        """
+        Searches for the best macro decision for the player the state is addressed to
+        :param game_state: GameState at the start of the move phase
+        :param seconds: Time budget per worker
+        :param iterations: Iteration budget per worker, counting both rollouts and reused table entries
+        :return: (move target, action kind)
+        """
+        if seconds is None and iterations is None:
+            raise ValueError("MCTSPlanner.plan needs a time or iteration budget")
+        start = time.perf_counter()
+        args = [(game_state, game_state.player_num, self.policy, seconds, iterations, self.exploration,
+                 self.horizon, hash((self.seed, game_state.turn, worker)), self.table_size, self.replacement,
+                 self.min_samples)
+                for worker in range(self.workers)]
+        if self.pool is None:
+            results = [search(*args[0])]
+        else:
+            results = list(self.pool.map(search, *zip(*args)))
+
+        totals: Dict[Tuple[Tuple[int, int], str], List[float]] = {}
+        rollouts = reused = 0
+        for children, count, hits in results:
+            rollouts += count
+            reused += hits
+            for macro, (visits, total) in children.items():
+                entry = totals.setdefault(macro, [0, 0.0])
+                entry[0] += visits
+                entry[1] += total
+        elapsed = time.perf_counter() - start
+        self.stats = {'rollouts': rollouts, 'reused': reused, 'seconds': elapsed,
+                      'rollouts_per_second': rollouts / elapsed if elapsed > 0 else 0.0, 'workers': self.workers}
+        logger.debug("[Turn %d] MCTS ran %d rollouts and reused %d table entries on %d workers, %.0f/s",
+                     game_state.turn, rollouts, reused, self.workers, self.stats['rollouts_per_second'])
+
+        if not totals:
+            pos = game_state.get_my_player().position
+            return (pos.x, pos.y), NOTHING
+        # Most visited is the usual robust choice; mean reward breaks ties
+        return max(totals, key=lambda macro: (totals[macro][0], totals[macro][1] / max(1, totals[macro][0])))
+
+    def get_move_decision(self, game_state: GameState, seconds: Optional[float] = None,
+                          iterations: Optional[int] = None) -> MoveDecision:
+        """
+        Plans the turn and returns its move; the matching action is kept for get_action_decision
+        """
+        target, self.planned_kind = self.plan(game_state, seconds, iterations)
+        return MoveDecision(Position(*target))
+
+    def get_action_decision(self, game_state: GameState) -> ActionDecision:
+        """
+        Returns the action planned with the last move, built for the post-move state
+        """
+        return build_action(game_state, game_state.player_num, self.planned_kind)
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
@@ -0,0 +1,85 @@
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from model.position import Position, position_at
+from api.constants import Constants
+
+
+@lru_cache(maxsize=None)
+def diamond_offsets(radius: int) -> Tuple[Tuple[int, int], ...]:
+    """
+    Returns every (dx, dy) with |dx| + |dy| <= radius, ordered by dy then dx
+    :param radius: Manhattan radius
+    :return: Tuple of offsets
+    """
+    res = []
+    for dy in range(-radius, radius + 1):
+        leftover = radius - abs(dy)
+        for dx in range(-leftover, leftover + 1):
+            res.append((dx, dy))
+    return tuple(res)
+
+
+class ReachIndex:
+    """
+    Cache of the tiles within a Manhattan radius of a tile, clipped to the board.
+    Each (x, y, radius) is worked out once; afterwards a query is a dict lookup
+    returning a shared, immutable result. Callers must not modify the returned
+    Positions.
+    """
+
+    def __init__(self, constants: Optional[Constants] = None) -> None:
+        constants = constants if constants is not None else Constants()
+        self.width = constants.BOARD_WIDTH
+        self.height = constants.BOARD_HEIGHT
+        self._coords: Dict[Tuple[int, int, int], Tuple[Tuple[int, int], ...]] = {}
+        self._positions: Dict[Tuple[int, int, int], Tuple[Position, ...]] = {}
+        self._masks: Dict[Tuple[int, int, int], bytes] = {}
+
+    def coords(self, x: int, y: int, radius: int) -> Tuple[Tuple[int, int], ...]:
+        """
+        Returns the (x, y) coordinates on the board within radius of (x, y)
+        """
+        key = (x, y, radius)
+        res = self._coords.get(key)
+        if res is None:
+            width = self.width
+            height = self.height
+            res = self._coords[key] = tuple((x + dx, y + dy) for dx, dy in diamond_offsets(radius)
+                                            if 0 <= x + dx < width and 0 <= y + dy < height)
+        return res
+
+    def positions(self, x: int, y: int, radius: int) -> Tuple[Position, ...]:
+        """
+        Returns the Positions on the board within radius of (x, y)
+        """
+        key = (x, y, radius)
+        res = self._positions.get(key)
+        if res is None:
+            res = self._positions[key] = tuple(position_at(i, j) for i, j in self.coords(x, y, radius))
+        return res
+
+    def mask(self, x: int, y: int, radius: int) -> bytes:
+        """
+        Returns a board mask (index j * width + i) of the tiles within radius of (x, y)
+        """
+        key = (x, y, radius)
+        res = self._masks.get(key)
+        if res is None:
+            mask = bytearray(self.width * self.height)
+            for i, j in self.coords(x, y, radius):
+                mask[j * self.width + i] = 1
+            res = self._masks[key] = bytes(mask)
+        return res
+
+    def warm(self, radii) -> None:
+        """
+        Fills the cache for every tile of the board for the given radii, so that
+        no query during the game has to build anything
+        """
+        for radius in radii:
+            for y in range(self.height):
+                for x in range(self.width):
+                    self.positions(x, y, radius)
+
+
+reach = ReachIndex()
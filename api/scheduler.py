@@ -0,0 +1,120 @@
+from typing import Callable, Iterator, Optional
+from model.game_state import GameState
+from model.position import Position
+from model.decisions.move_decision import MoveDecision
+from model.decisions.action_decision import ActionDecision
+from model.decisions.do_nothing_decision import DoNothingDecision
+from api.constants import Constants
+from api.instrumentation import PhaseTimer
+from networking.io import Logger
+
+import time
+
+constants = Constants()
+logger = Logger()
+
+# A search takes the game state and yields better and better decisions.
+# Yielding None means "still working, nothing better yet" and lets the
+# scheduler check the clock during long stretches without an improvement.
+Search = Callable[[GameState], Iterator]
+# Phases of the game loop between a game state arriving and a search starting on it
+PARSE_PHASES = ("json_decode", "model_build", "speculation_wait")
+
+
+def one_shot(decide: Callable, game) -> Search:
+    """
+    Returns a search that yields decide(game) once, for deciding code that can't stop
+    part way. The scheduler then only adds its fallback.
+    :param decide: Function of the game returning a decision
+    :param game: Game to pass to decide
+    """
+    def search(game_state: GameState) -> Iterator:
+        yield decide(game)
+    return search
+
+
+class DecisionScheduler:
+    """
+    Runs an anytime search until a per-phase deadline and returns the best
+    decision it produced. The deadline is measured from when the game state
+    arrived, since the engine's timeout covers parsing as well as deciding.
+
+    Python can't interrupt a running search, so the clock is only checked each
+    time the search yields; searches should yield often. A search that yields
+    once, like the bot's greedy decisions wrapped by one_shot, runs to the end
+    and only gains the fallback if it crashes or produces nothing.
+    """
+
+    def __init__(self, timeout_fraction: float = 0.5, max_seconds: Optional[float] = None) -> None:
+        """
+        :param timeout_fraction: Fraction of networking.timeout.player each phase may use,
+            before taking out the measured time spent around the search
+        :param max_seconds: Optional hard cap on each phase, whatever the timeout
+        """
+        self.budget = constants.PLAYER_TIMEOUT / 1000 * timeout_fraction
+        if max_seconds is not None:
+            self.budget = min(self.budget, max_seconds)
+
+    def deadline(self, start: Optional[float] = None, timer: Optional[PhaseTimer] = None) -> float:
+        """
+        Returns the perf_counter time a search has to stop by
+        :param start: perf_counter time the game state arrived. Defaults to now, in which
+            case the time spent parsing it is estimated from timer
+        :param timer: PhaseTimer of the game loop; the 95th percentile of every phase
+            outside the search is taken out of the budget
+        :return: Deadline in perf_counter seconds
+        """
+        overhead = 0.0
+        if timer is not None:
+            phases = ("serialize",) if start is not None else PARSE_PHASES + ("serialize",)
+            overhead = sum(timer.percentile(phase, 0.95) for phase in phases)
+        return (start if start is not None else time.perf_counter()) + self.budget - overhead
+
+    def run(self, search: Search, game_state: GameState, fallback, start: Optional[float] = None,
+            timer: Optional[PhaseTimer] = None):
+        """
+        Runs search until it finishes or the deadline passes
+        :param search: Anytime search to run
+        :param game_state: GameState to decide for
+        :param fallback: Decision returned if the search produced nothing
+        :param start: perf_counter time the game state arrived, defaults to now
+        :param timer: PhaseTimer of the game loop, to take its measured overhead out of the budget
+        :return: Best decision found, or fallback
+        """
+        deadline = self.deadline(start, timer)
+        best = fallback
+        try:
+            for decision in search(game_state):
+                if decision is not None:
+                    best = decision
+                if time.perf_counter() >= deadline:
+                    logger.debug("[Turn %d] Search stopped at the deadline with %s", game_state.turn, best)
+                    break
+        except Exception as e:
+            # A crashing search must not cost us the turn
+            logger.warning("[Turn %d] Search failed, using %s: %r", game_state.turn, best, e)
+        return best
+
+    def get_move_decision(self, game, search: Search) -> MoveDecision:
+        """
+        Runs a move search for the current game state, staying in place if it finds nothing
+        :param game: Game holding the current game state
+        :param search: Anytime search yielding MoveDecisions
+        :return: MoveDecision to send
+        """
+        game_state = game.get_game_state()
+        pos = game_state.get_my_player().position
+        fallback = MoveDecision(Position(pos.x, pos.y))
+        return self.run(search, game_state, fallback, getattr(game, "received_at", None),
+                        getattr(game, "timer", None))
+
+    def get_action_decision(self, game, search: Search) -> ActionDecision:
+        """
+        Runs an action search for the current game state, doing nothing if it finds nothing
+        :param game: Game holding the current game state
+        :param search: Anytime search yielding ActionDecisions
+        :return: ActionDecision to send
+        """
+        game_state = game.get_game_state()
+        return self.run(search, game_state, DoNothingDecision(), getattr(game, "received_at", None),
+                        getattr(game, "timer", None))
@@ -0,0 +1,189 @@
+from math import gcd
+from typing import Dict, List, Optional, Tuple
+from model.crop_type import CropType
+from api.constants import Constants
+from api.distance_field import turns_to_cover
+from api.fertility_schedule import FertilitySchedule, schedule as default_schedule
+from api.forecast import planted_value
+from api.simulator import MAX_TURNS
+from api import game_util
+
+SEEDS = [crop for crop in CropType if crop != CropType.NONE]
+
+# Knapsack tables kept for reuse; a turn needs at most one undiscounted and one discounted table
+CACHED_TABLES = 4
+
+
+class KnapsackTable:
+    """
+    Bounded knapsack over seed types with two limits, the number of seeds and
+    the money spent. best[k][u] is the most profit from at most k seeds costing
+    at most u budget units, where a unit is the gcd of the prices involved, so
+    the table stays small (with only Golden Corn and Ducham Fruit worth buying
+    a unit is 100). Once built, any money up to the budget it was built for and
+    any count up to its limit is answered by a lookup and a short backtrack.
+    """
+
+    def __init__(self, profits: Dict[CropType, float], prices: Dict[CropType, float], max_count: int,
+                 max_budget: float) -> None:
+        """
+        :param profits: Expected profit of one seed of each type, only positive ones are considered
+        :param prices: Price of one seed of each type
+        :param max_count: Most seeds a query may ask for
+        :param max_budget: Most money a query may spend
+        """
+        self.items: List[Tuple[CropType, int, float]] = []
+        unit = 0
+        for crop, profit in profits.items():
+            if profit > 0:
+                unit = gcd(unit, int(round(prices[crop])))
+        self.unit = max(unit, 1)
+        for crop, profit in profits.items():
+            if profit > 0:
+                self.items.append((crop, int(round(prices[crop])) // self.unit, profit))
+        self.max_count = max_count
+        # Budget beyond the price of max_count of the dearest seed buys nothing more
+        cap = max((weight for _, weight, _ in self.items), default=0) * max_count
+        self.max_units = min(int(max_budget // self.unit), cap)
+        # True when no budget would change the answer
+        self.unbounded = self.max_units == cap
+
+        size = self.max_units + 1
+        self.best: List[List[float]] = [[0.0] * size]
+        for _ in range(max_count):
+            prev = self.best[-1]
+            cur = list(prev)
+            for _, weight, profit in self.items:
+                if weight >= size:
+                    continue
+                shifted = prev[:size - weight]
+                cur[weight:] = [c if c >= s + profit else s + profit for c, s in zip(cur[weight:], shifted)]
+            self.best.append(cur)
+
+    def covers(self, count: int, budget: float) -> bool:
+        return count <= self.max_count and (self.unbounded or int(budget // self.unit) <= self.max_units)
+
+    def solve(self, count: int, budget: float) -> Tuple[float, Dict[CropType, int]]:
+        """
+        Returns the best profit and the seeds to buy for it
+        :param count: Most seeds to buy
+        :param budget: Most money to spend
+        :return: (profit, {crop: quantity})
+        """
+        k = min(count, self.max_count)
+        u = min(int(budget // self.unit), self.max_units)
+        best = self.best
+        profit = best[k][u]
+        res: Dict[CropType, int] = {}
+        while k > 0 and best[k][u] > 0:
+            if best[k - 1][u] >= best[k][u]:
+                k -= 1
+                continue
+            for crop, weight, item_profit in self.items:
+                if weight <= u and abs(best[k - 1][u - weight] + item_profit - best[k][u]) <= 1e-9 * best[k][u]:
+                    res[crop] = res.get(crop, 0) + 1
+                    u -= weight
+                    break
+            k -= 1
+        return profit, res
+
+
+class SeedPlanner:
+    """
+    Chooses what to buy at the Green Grocer. A seed is worth what its crop
+    fetches when ripe, planted on the best row it can reach from the grocer and
+    following the band as it passes over that row, as long as it ripens and can
+    be carried back before the game ends; its profit is that minus the price.
+    The purchase maximises the total profit within the player's money, free
+    carrying capacity and the free fertile tiles there are to plant on, with the
+    loyalty card discount applied when the purchase qualifies for it.
+
+    Seed values are computed once per turn and the knapsack table once per turn
+    and limit, so a query at the grocer is a lookup. prepare() builds them ahead
+    of time, e.g. during the move that reaches the grocer.
+    """
+
+    def __init__(self, schedule: Optional[FertilitySchedule] = None, constants: Optional[Constants] = None,
+                 max_turns: int = MAX_TURNS) -> None:
+        self.schedule = schedule if schedule is not None else default_schedule
+        self.constants = constants if constants is not None else game_util.constants
+        self.max_turns = max_turns
+        self.prices = {crop: crop.get_seed_price() for crop in SEEDS}
+        self._values: Dict[Tuple[int, int, Optional[int]], Dict[CropType, float]] = {}
+        self._tables: Dict[Tuple, KnapsackTable] = {}
+
+    def seed_values(self, turn: int, max_movement: int, max_growth_time: Optional[int] = None) -> Dict[CropType, float]:
+        """
+        Returns the expected sale value of one seed of each type bought on a turn
+        :param turn: Turn the seeds are bought, at the grocer
+        :param max_movement: Tiles the player moves per turn
+        :param max_growth_time: Longest growth time the caller will wait for, no limit if None
+        :return: {crop: value}, 0 for seeds that can't ripen and be sold in time
+        """
+        key = (turn, max_movement, max_growth_time)
+        res = self._values.get(key)
+        if res is None:
+            res = dict.fromkeys(SEEDS, 0.0)
+            crops = [crop for crop in SEEDS if max_growth_time is None or crop.get_growth_time() <= max_growth_time]
+            for y in range(self.constants.GRASS_ROWS, self.constants.BOARD_HEIGHT):
+                # The grocer is on the first row, so the trip is the same both ways
+                trip = turns_to_cover(y, max_movement)
+                plant_turn = turn + trip
+                for crop in crops:
+                    if plant_turn + crop.get_growth_time() + trip > self.max_turns:
+                        continue
+                    value = planted_value(crop, y, plant_turn, schedule=self.schedule)
+                    if value > res[crop]:
+                        res[crop] = value
+            self._values[key] = res
+        return res
+
+    def _table(self, turn: int, max_movement: int, max_growth_time: Optional[int], count: int, budget: float,
+               discount: float) -> KnapsackTable:
+        key = (turn, max_movement, max_growth_time, discount)
+        table = self._tables.get(key)
+        if table is None or not table.covers(count, budget):
+            values = self.seed_values(turn, max_movement, max_growth_time)
+            prices = {crop: price * (1 - discount) for crop, price in self.prices.items()}
+            profits = {crop: values[crop] - prices[crop] for crop in SEEDS}
+            # Costs stay in undiscounted prices so the table keeps whole units; the budget is scaled instead
+            table = KnapsackTable(profits, self.prices, count, budget)
+            if len(self._tables) >= CACHED_TABLES:
+                self._tables.pop(next(iter(self._tables)))
+            self._tables[key] = table
+        return table
+
+    def prepare(self, turn: int, money: float, capacity: int, discount: float = 0.0,
+                max_movement: Optional[int] = None, max_growth_time: Optional[int] = None) -> None:
+        """
+        Builds the tables best_purchase will need for a turn, so the query itself is a lookup
+        """
+        self.best_purchase(turn, money, capacity, capacity, discount, max_movement, max_growth_time)
+
+    def best_purchase(self, turn: int, money: float, capacity: int, plantable: int, discount: float = 0.0,
+                      max_movement: Optional[int] = None, max_growth_time: Optional[int] = None) -> Dict[CropType, int]:
+        """
+        Returns the seeds to buy for the most expected profit
+        :param turn: Current turn
+        :param money: Money to spend
+        :param capacity: Free carrying capacity
+        :param plantable: Free fertile tiles to plant the seeds on
+        :param discount: Loyalty card discount, 0 without the card
+        :param max_movement: Tiles the player moves per turn, the default if None
+        :param max_growth_time: Longest growth time the caller will wait for, no limit if None
+        :return: {crop: quantity}, empty if nothing is worth buying
+        """
+        max_movement = max_movement if max_movement is not None else self.constants.MAX_MOVEMENT
+        count = max(0, min(capacity, plantable))
+        if count == 0 or money <= 0:
+            return {}
+        profit, res = self._table(turn, max_movement, max_growth_time, count, money, 0.0).solve(count, money)
+        if discount > 0:
+            # The card takes a share off the whole bill, but only from a minimum spend
+            budget = money / (1 - discount)
+            table = self._table(turn, max_movement, max_growth_time, count, budget, discount)
+            discounted_profit, discounted = table.solve(count, budget)
+            spent = sum(self.prices[crop] * quantity for crop, quantity in discounted.items())
+            if discounted_profit > profit and spent >= self.constants.GREEN_GROCER_LOYALTY_CARD_MINIMUM:
+                res = discounted
+        return res
@@ -0,0 +1,443 @@
+from typing import Dict, List, Optional
+from model.game_state import GameState
+from model.tile_map import TileMap
+from model.array_tile_map import ArrayTileMap
+from model.player import Player
+from model.position import Position, position_at
+from model.tile import Tile
+from model.crop import Crop, NO_CROP
+from model.tile_type import TileType
+from model.crop_type import CropType
+from model.item_type import ItemType
+from model.upgrade_type import UpgradeType
+from model.decisions.move_decision import MoveDecision
+from model.decisions.action_decision import ActionDecision
+from model.decisions.buy_decision import BuyDecision
+from model.decisions.harvest_decision import HarvestDecision
+from model.decisions.plant_decision import PlantDecision
+from model.decisions.use_item_decision import UseItemDecision
+from api import game_util
+from api.constants import Constants
+from api.config import config
+from api.reach import reach
+from api.zobrist import Zobrist, zobrist as default_zobrist
+
+import random
+
+# Number of turns the engine plays before the game ends
+MAX_TURNS = 180
+
+# Tiles nothing can be planted on
+UNPLANTABLE_TILES = (TileType.GREEN_GROCER, TileType.GRASS)
+
+
+def grocer_columns(constants: Constants) -> range:
+    """
+    Returns the x coordinates of the Green Grocer tiles on the first row
+    :param constants: Constants the board was built from
+    :return: range of x coordinates
+    """
+    start = constants.BOARD_WIDTH // 2 - constants.GREENGROCER_LENGTH // 2
+    return range(start, start + constants.GREENGROCER_LENGTH)
+
+
+def new_player_dict(name: str, position: Position, item: ItemType, upgrade: UpgradeType,
+                    constants: Constants) -> Dict:
+    """
+    Builds a player in the engine's JSON shape with the upgrade already applied
+    :param name: Name of the player
+    :param position: Starting position
+    :param item: Item the player chose
+    :param upgrade: Upgrade the player chose
+    :param constants: Constants to take the base stats from
+    :return: Dictionary accepted by Player
+    """
+    player = {
+        'name': name,
+        'position': {'x': position.x, 'y': position.y},
+        'upgrade': upgrade.name,
+        'item': item.name,
+        'money': constants.STARTING_MONEY,
+        'seedInventory': {crop.name: 0 for crop in CropType if crop != CropType.NONE},
+        'harvestedInventory': [],
+        'discount': 0,
+        'protectionRadius': constants.PROTECTION_RADIUS,
+        'harvestRadius': constants.HARVEST_RADIUS,
+        'plantRadius': constants.PLANT_RADIUS,
+        'carryingCapacity': constants.CARRYING_CAPACITY,
+        'maxMovement': constants.MAX_MOVEMENT,
+        'doubleDropChance': 0,
+        'usedItem': False,
+        'hasDeliveryDrone': False,
+        'hasCoffeeThermos': False,
+        'itemTimeExpired': False,
+    }
+    if upgrade.name in config.upgrades:
+        field, value = config.upgrades[upgrade.name]
+        player[field] = value
+    return player
+
+
+def new_tile_dict(tile_type: TileType) -> Dict:
+    """
+    Builds an empty tile in the engine's JSON shape
+    :param tile_type: Type of the tile
+    :return: Dictionary accepted by Tile
+    """
+    return {
+        'type': tile_type.name,
+        'crop': {'type': CropType.NONE.name, 'growthTimer': 0, 'value': 0},
+        'p1_item': ItemType.NONE.name,
+        'p2_item': ItemType.NONE.name,
+        'turnsLeftToGrow': 0,
+        'rainTotemEffect': False,
+        'fertilityIdolEffect': False,
+        'scarecrowEffect': -1,
+    }
+
+
+def base_tile_type(turn: int, x: int, y: int, constants: Constants) -> TileType:
+    """
+    Returns the type a tile has on a given turn, taking the fixed grass rows and
+    Green Grocer into account on top of the fertility bands
+    :param turn: Turn to check for
+    :param x: x coordinate
+    :param y: y coordinate
+    :param constants: Constants the board was built from
+    :return: TileType of the tile
+    """
+    if y < constants.GRASS_ROWS:
+        if y == 0 and x in grocer_columns(constants):
+            return TileType.GREEN_GROCER
+        return TileType.GRASS
+    return game_util.tile_type_on_turn(turn, None, Position(x, y))
+
+
+def new_gamestate_dict(p1_item: ItemType, p1_upgrade: UpgradeType, p2_item: ItemType, p2_upgrade: UpgradeType,
+                       constants: Constants, player_num: int = 1) -> Dict:
+    """
+    Builds the first game state of a game in the engine's JSON shape
+    :param p1_item: Item for player 1
+    :param p1_upgrade: Upgrade for player 1
+    :param p2_item: Item for player 2
+    :param p2_upgrade: Upgrade for player 2
+    :param constants: Constants to build the board from
+    :param player_num: Which player the state is addressed to
+    :return: Dictionary accepted by GameState
+    """
+    columns = grocer_columns(constants)
+    tiles = [[new_tile_dict(base_tile_type(1, x, y, constants)) for x in range(constants.BOARD_WIDTH)]
+             for y in range(constants.BOARD_HEIGHT)]
+    return {
+        'turn': 1,
+        'p1': new_player_dict("player1", Position(columns[0], 0), p1_item, p1_upgrade, constants),
+        'p2': new_player_dict("player2", Position(columns[-1], 0), p2_item, p2_upgrade, constants),
+        'tileMap': {'mapHeight': constants.BOARD_HEIGHT, 'mapWidth': constants.BOARD_WIDTH, 'tiles': tiles},
+        'playerNum': player_num,
+        'feedback': [],
+    }
+
+
+def copy_game_state(game_state: GameState) -> GameState:
+    """
+    Returns a fully independent copy of a game state, every player and tile
+    copied up front. GameState.clone is much cheaper when the copy is only
+    going to be advanced by the simulator.
+    :param game_state: GameState to copy
+    :return: The copy
+    """
+    res = GameState.__new__(GameState)
+    res.turn = game_state.turn
+    res.player1 = game_state.player1.clone()
+    res.player2 = game_state.player2.clone()
+    res.player_num = game_state.player_num
+    res.feedback = list(game_state.feedback)
+    res.dirty_tiles = game_state.dirty_tiles
+    res._raw_players = game_state._raw_players
+    res._owned_players = bytearray(b"\x00\x01\x01")
+    res.zobrist = game_state.zobrist
+
+    if isinstance(game_state.tile_map, ArrayTileMap):
+        # Its clone already copies every array
+        res.tile_map = game_state.tile_map.clone()
+        return res
+    tile_map = TileMap.__new__(TileMap)
+    tile_map.map_height = game_state.tile_map.map_height
+    tile_map.map_width = game_state.tile_map.map_width
+    tile_map.raw_rows = game_state.tile_map.raw_rows
+    tile_map.tiles = [[tile.clone() for tile in row] for row in game_state.tile_map.tiles]
+    tile_map._owned_rows = bytearray(b"\x01" * tile_map.map_height)
+    tile_map._owned_tiles = bytearray(b"\x01" * (tile_map.map_height * tile_map.map_width))
+    res.tile_map = tile_map
+    return res
+
+
+class Simulator:
+    """
+    Headless forward model of the MM27 rules. A turn is a move phase followed by
+    an action phase, mirroring the two decisions the engine asks each bot for.
+
+    All randomness (action order and the rabbit's foot) comes from a seeded RNG,
+    so a game replays identically for the same seed and decisions.
+
+    Players and tiles are only modified through GameState.writable_player and
+    TileMap.writable_tile/writable_row, so a state from GameState.clone can be
+    advanced without touching the one it was cloned from. Tiles go through
+    _writable_tile, which also keeps the Zobrist hash of states that have one
+    up to date.
+    """
+
+    def __init__(self, seed: Optional[int] = None, constants: Optional[Constants] = None,
+                 max_turns: int = MAX_TURNS) -> None:
+        self.constants = constants if constants is not None else game_util.constants
+        self.max_turns = max_turns
+        self.random = random.Random(seed)
+        self.grocer_columns = grocer_columns(self.constants)
+        self.fertility = {tile_type: tile_type.get_fertility() for tile_type in TileType}
+        self.growth = {crop_type.name: (crop_type.get_growth_value(), crop_type.get_fertility_sensitivity())
+                       for crop_type in CropType}
+        self.zobrist = default_zobrist if constants is None else Zobrist(self.constants)
+        # Tiles whose hash term was taken out this phase, to be put back once they are final
+        self._touched = set()
+
+    def new_game(self, p1_item: ItemType, p1_upgrade: UpgradeType,
+                 p2_item: ItemType, p2_upgrade: UpgradeType) -> GameState:
+        """
+        Returns the game state of turn 1 for the given loadouts
+        """
+        return GameState(new_gamestate_dict(p1_item, p1_upgrade, p2_item, p2_upgrade, self.constants))
+
+    def is_game_over(self, game_state: GameState) -> bool:
+        return game_state.turn > self.max_turns
+
+    def step(self, game_state: GameState, p1_move: MoveDecision, p1_action: ActionDecision,
+             p2_move: MoveDecision, p2_action: ActionDecision) -> GameState:
+        """
+        Returns the game state of the next turn, leaving the given one untouched
+        :param game_state: GameState at the start of the turn
+        :param p1_move: Move decision of player 1
+        :param p1_action: Action decision of player 1
+        :param p2_move: Move decision of player 2
+        :param p2_action: Action decision of player 2
+        :return: GameState at the start of the next turn
+        """
+        res = game_state.clone()
+        self.apply_moves(res, p1_move, p2_move)
+        self.apply_actions(res, p1_action, p2_action)
+        return res
+
+    def apply_moves(self, game_state: GameState, p1_move: MoveDecision, p2_move: MoveDecision) -> None:
+        """
+        Resolves the move phase in place, then sells at the Green Grocer
+        """
+        game_state.feedback = []
+        self._unhash_players(game_state)
+        for player_id, decision in ((1, p1_move), (2, p2_move)):
+            self._move(game_state, player_id, game_state.writable_player(player_id), decision)
+        for player in (game_state.player1, game_state.player2):
+            if player.has_delivery_drone or \
+                    game_state.tile_map.get_tile(player.position.x, player.position.y).type == TileType.GREEN_GROCER:
+                self._sell(player)
+        self._rehash(game_state)
+
+    def apply_actions(self, game_state: GameState, p1_action: ActionDecision, p2_action: ActionDecision) -> None:
+        """
+        Resolves the action phase in place, grows every crop and moves on to the next turn
+        """
+        game_state.feedback = []
+        self._unhash_players(game_state)
+        order = [(1, game_state.writable_player(1), p1_action), (2, game_state.writable_player(2), p2_action)]
+        # Neither player gets to act first consistently when both go for the same tile
+        self.random.shuffle(order)
+        for player_id, player, decision in order:
+            self._act(game_state, player_id, player, decision)
+        self._grow(game_state)
+        if game_state.zobrist is not None:
+            game_state.zobrist ^= self.zobrist.turn_term(game_state.turn) ^ self.zobrist.turn_term(game_state.turn + 1)
+        game_state.turn += 1
+        self._update_tile_types(game_state)
+        self._rehash(game_state)
+
+    def _unhash_players(self, game_state: GameState) -> None:
+        if game_state.zobrist is not None:
+            game_state.zobrist ^= self.zobrist.player_term(1, game_state.player1) \
+                ^ self.zobrist.player_term(2, game_state.player2)
+
+    def _writable_tile(self, game_state: GameState, x: int, y: int) -> Tile:
+        """
+        Returns the tile at (x, y) for modification, taking its term out of the
+        state's hash until _rehash puts the final one back
+        """
+        tile = game_state.tile_map.writable_tile(x, y)
+        if game_state.zobrist is not None and (x, y) not in self._touched:
+            self._touched.add((x, y))
+            game_state.zobrist ^= self.zobrist.tile_term(x, y, tile)
+        return tile
+
+    def _rehash(self, game_state: GameState) -> None:
+        """
+        Puts the terms of the players and of the tiles modified this phase back into the state's hash
+        """
+        if game_state.zobrist is None:
+            return
+        tile_map = game_state.tile_map
+        res = game_state.zobrist ^ self.zobrist.player_term(1, game_state.player1) \
+            ^ self.zobrist.player_term(2, game_state.player2)
+        for x, y in self._touched:
+            res ^= self.zobrist.tile_term(x, y, tile_map.tiles[y][x])
+        self._touched.clear()
+        game_state.zobrist = res
+
+    def _move(self, game_state: GameState, player_id: int, player: Player, decision: MoveDecision) -> None:
+        max_movement = player.max_movement
+        if player.has_coffee_thermos:
+            max_movement *= self.constants.COFFEE_THERMOS_MOVEMENT_MULTIPLIER
+            player.has_coffee_thermos = False
+            player.item_time_expired = True
+        if decision is None:
+            return
+        pos = decision.pos
+        if not isinstance(pos.x, int) or not isinstance(pos.y, int) or not game_util.valid_position(pos) \
+                or game_util.distance(player.position, pos) > max_movement:
+            game_state.feedback.append(f"Player {player_id} tried an invalid move to {pos}")
+            return
+        player.position = position_at(pos.x, pos.y)
+
+    def _sell(self, player: Player) -> None:
+        for crop in player.harvested_inventory:
+            player.money += crop['value']
+        player.harvested_inventory = []
+
+    def _act(self, game_state: GameState, player_id: int, player: Player, decision: ActionDecision) -> None:
+        if isinstance(decision, BuyDecision):
+            self._buy(game_state, player_id, player, decision)
+        elif isinstance(decision, HarvestDecision):
+            self._harvest(game_state, player_id, player, decision)
+        elif isinstance(decision, PlantDecision):
+            self._plant(game_state, player_id, player, decision)
+        elif isinstance(decision, UseItemDecision):
+            self._use_item(game_state, player_id, player)
+
+    def _inventory_size(self, player: Player) -> int:
+        return sum(player.seed_inventory.values()) + len(player.harvested_inventory)
+
+    def _buy(self, game_state: GameState, player_id: int, player: Player, decision: BuyDecision) -> None:
+        if game_state.tile_map.get_tile(player.position.x, player.position.y).type != TileType.GREEN_GROCER:
+            game_state.feedback.append(f"Player {player_id} tried to buy away from the Green Grocer")
+            return
+        cost = sum(crop.get_seed_price() * quantity for crop, quantity in zip(decision.crop_types, decision.quantities))
+        if player.discount > 0 and cost >= self.constants.GREEN_GROCER_LOYALTY_CARD_MINIMUM:
+            cost *= 1 - player.discount
+        if cost > player.money or any(quantity < 0 for quantity in decision.quantities):
+            game_state.feedback.append(f"Player {player_id} could not afford {decision}")
+            return
+        if self._inventory_size(player) + sum(decision.quantities) > player.carring_capacity:
+            game_state.feedback.append(f"Player {player_id} cannot carry {decision}")
+            return
+        player.money -= cost
+        for crop, quantity in zip(decision.crop_types, decision.quantities):
+            player.seed_inventory[crop] = player.seed_inventory.get(crop, 0) + quantity
+
+    def _harvest(self, game_state: GameState, player_id: int, player: Player, decision: HarvestDecision) -> None:
+        opponent = game_state.player2 if player_id == 1 else game_state.player1
+        for pos in decision.positions:
+            if not game_util.valid_position(pos) or game_util.distance(player.position, pos) > player.harvest_radius:
+                game_state.feedback.append(f"Player {player_id} cannot reach {pos} to harvest")
+                continue
+            tile = game_state.tile_map.get_tile(pos.x, pos.y)
+            if tile.crop.type == CropType.NONE.name or tile.crop.growth_timer > 0:
+                continue
+            if game_util.distance(opponent.position, pos) <= opponent.protection_radius \
+                    or tile.has_scarecrow_effect(player_id):
+                game_state.feedback.append(f"Player {player_id} cannot harvest protected tile {pos}")
+                continue
+            tile = self._writable_tile(game_state, pos.x, pos.y)
+            drops = 2 if self.random.random() < player.double_drop_chance else 1
+            for _ in range(drops):
+                if self._inventory_size(player) >= player.carring_capacity:
+                    break
+                player.harvested_inventory.append({'type': tile.crop.type, 'growthTimer': 0,
+                                                   'value': tile.crop.value})
+            tile.crop = NO_CROP
+            tile.turns_left_to_grow = 0
+
+    def _plant(self, game_state: GameState, player_id: int, player: Player, decision: PlantDecision) -> None:
+        for crop_type, pos in zip(decision.crop_types, decision.coords):
+            if player.seed_inventory.get(crop_type, 0) <= 0:
+                game_state.feedback.append(f"Player {player_id} has no {crop_type} seeds")
+                continue
+            if not game_util.valid_position(pos) or game_util.distance(player.position, pos) > player.plant_radius:
+                game_state.feedback.append(f"Player {player_id} cannot reach {pos} to plant")
+                continue
+            tile = game_state.tile_map.get_tile(pos.x, pos.y)
+            if tile.type in UNPLANTABLE_TILES or tile.crop.type != CropType.NONE.name:
+                game_state.feedback.append(f"Player {player_id} cannot plant on {pos}")
+                continue
+            player.seed_inventory[crop_type] -= 1
+            tile = self._writable_tile(game_state, pos.x, pos.y)
+            tile.crop = Crop({'type': crop_type.name, 'growthTimer': crop_type.get_growth_time(), 'value': 0})
+            tile.turns_left_to_grow = tile.crop.growth_timer
+
+    def _use_item(self, game_state: GameState, player_id: int, player: Player) -> None:
+        if player.used_item or player.item == ItemType.NONE:
+            game_state.feedback.append(f"Player {player_id} has no item to use")
+            return
+        player.used_item = True
+        item = player.item
+        pos = player.position
+        tile = game_state.tile_map.writable_tile(pos.x, pos.y)
+        if player_id == 1:
+            tile.p1_item = item
+        else:
+            tile.p2_item = item
+
+        if item == ItemType.COFFEE_THERMOS:
+            player.has_coffee_thermos = True
+        elif item == ItemType.DELIVERY_DRONE:
+            player.has_delivery_drone = True
+        elif item == ItemType.RAIN_TOTEM:
+            for tile in self._tiles_within(game_state, pos, self.constants.RAIN_TOTEM_EFFECT_RADIUS):
+                tile.rain_totem_effect = True
+        elif item == ItemType.FERTILITY_IDOL:
+            for tile in self._tiles_within(game_state, pos, self.constants.FERTILITY_IDOL_EFFECT_RADIUS):
+                tile.fertility_idol_effect = True
+        elif item == ItemType.SCARECROW:
+            for tile in self._tiles_within(game_state, pos, self.constants.SCARECROW_EFFECT_RADIUS):
+                tile.scarecrow_effect = player_id - 1
+        elif item == ItemType.PESTICIDE:
+            for tile in self._tiles_within(game_state, pos, self.constants.PESTICIDE_EFFECT_RADIUS):
+                if tile.crop is not NO_CROP:
+                    tile.crop.value *= 1 - self.constants.PESTICIDE_CROP_VALUE_DECREASE
+
+    def _tiles_within(self, game_state: GameState, pos: Position, radius: int) -> List[Tile]:
+        # Only used to apply item effects, so the tiles are returned writable
+        return [self._writable_tile(game_state, x, y) for x, y in reach.coords(pos.x, pos.y, radius)]
+
+    def _grow(self, game_state: GameState) -> None:
+        rain_steps = self.constants.RAIN_TOTEM_GROWTH_MULTIPLIER
+        idol_multiplier = self.constants.FERTILITY_IDOL_FERTILITY_MULTIPLIER
+        tile_map = game_state.tile_map
+        for y, row in enumerate(tile_map.tiles):
+            for x, tile in enumerate(row):
+                if tile.crop.growth_timer <= 0:
+                    continue
+                # Only growing tiles are copied away from a clone's shared storage
+                tile = self._writable_tile(game_state, x, y)
+                crop = tile.crop
+                fertility = self.fertility[tile.type]
+                if tile.fertility_idol_effect:
+                    fertility *= idol_multiplier
+                growth_value, sensitivity = self.growth[crop.type]
+                growth = growth_value * (1 - sensitivity + sensitivity * fertility)
+                steps = min(crop.growth_timer, rain_steps if tile.rain_totem_effect else 1)
+                crop.value += growth * steps
+                crop.growth_timer -= steps
+                tile.turns_left_to_grow = crop.growth_timer
+
+    def _update_tile_types(self, game_state: GameState) -> None:
+        tile_map = game_state.tile_map
+        for y in range(self.constants.GRASS_ROWS, tile_map.map_height):
+            row_type = game_util.tile_type_on_turn(game_state.turn, game_state, Position(0, y))
+            if tile_map.tiles[y][0].type != row_type:
+                for tile in tile_map.writable_row(y):
+                    tile.type = row_type
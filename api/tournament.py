@@ -0,0 +1,218 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+from model.game_state import GameState
+from model.position import Position
+from model.item_type import ItemType
+from model.upgrade_type import UpgradeType
+from model.decisions.move_decision import MoveDecision
+from model.decisions.do_nothing_decision import DoNothingDecision
+from api.simulator import Simulator, MAX_TURNS
+from networking.io import configure_logging, OFF
+
+import argparse
+import importlib.util
+import json
+import math
+import os
+import sys
+
+
+class SimulatedGame:
+    """
+    Stands in for game.Game when a strategy is played against the simulator
+    """
+
+    def __init__(self, game_state: GameState) -> None:
+        self.game_state = game_state
+
+    def get_game_state(self) -> GameState:
+        return self.game_state
+
+    def get_dirty_tiles(self):
+        return self.game_state.dirty_tiles
+
+
+class Strategy:
+    """
+    A bot to play offline: a module with get_move_decision(game) and
+    get_action_decision(game), like bot.py, plus the loadout it picks. If the
+    module also has record_action_decision(game, decision), it is called with
+    every action decision that gets played.
+    Strategies are loaded fresh for every game so module-level state (bot.py
+    keeps plenty) doesn't leak between games or between the two players.
+    """
+
+    def __init__(self, module_name: str, item: ItemType = ItemType.COFFEE_THERMOS,
+                 upgrade: UpgradeType = UpgradeType.LONGER_LEGS) -> None:
+        self.module_name = module_name
+        self.item = item
+        self.upgrade = upgrade
+
+    def load(self) -> Tuple[Callable, Callable, Optional[Callable]]:
+        spec = importlib.util.find_spec(self.module_name)
+        if spec is None:
+            raise ImportError(f"No strategy module named {self.module_name}")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module.get_move_decision, module.get_action_decision, getattr(module, "record_action_decision", None)
+
+    def __str__(self) -> str:
+        return f"{self.module_name}({self.item},{self.upgrade})"
+
+
+class GameResult(NamedTuple):
+    game: int
+    seed: int
+    # Which player strategy A played as, 1 or 2
+    a_player: int
+    a_money: float
+    b_money: float
+    errors: int
+
+
+def _decide(function, game: SimulatedGame, player_num: int, fallback):
+    game.game_state.player_num = player_num
+    try:
+        return function(game), 0
+    except Exception:
+        # The engine would treat a crashed bot as doing nothing this turn
+        return fallback, 1
+
+
+def play_game(strategy_a: Strategy, strategy_b: Strategy, game: int, seed: int, a_player: int = 1,
+              max_turns: int = MAX_TURNS) -> GameResult:
+    """
+    Plays one game between two strategies in the simulator
+    :param strategy_a: First strategy
+    :param strategy_b: Second strategy
+    :param game: Number of the game, only recorded in the result
+    :param seed: Seed for the simulator
+    :param a_player: Whether strategy_a plays as player 1 or 2
+    :param max_turns: Turns before the game ends
+    :return: GameResult
+    """
+    strategies = {a_player: strategy_a, 3 - a_player: strategy_b}
+    functions = {player_num: strategies[player_num].load() for player_num in (1, 2)}
+    simulator = Simulator(seed, max_turns=max_turns)
+    game_state = simulator.new_game(strategies[1].item, strategies[1].upgrade,
+                                    strategies[2].item, strategies[2].upgrade)
+    views = {1: SimulatedGame(game_state), 2: SimulatedGame(game_state)}
+    errors = 0
+    while not simulator.is_game_over(game_state):
+        moves = {}
+        for player_num in (1, 2):
+            pos = (game_state.player1 if player_num == 1 else game_state.player2).position
+            moves[player_num], failed = _decide(functions[player_num][0], views[player_num], player_num,
+                                                MoveDecision(Position(pos.x, pos.y)))
+            errors += failed
+        simulator.apply_moves(game_state, moves[1], moves[2])
+        actions = {}
+        for player_num in (1, 2):
+            actions[player_num], failed = _decide(functions[player_num][1], views[player_num], player_num,
+                                                  DoNothingDecision())
+            errors += failed
+            record = functions[player_num][2]
+            if record is not None:
+                _, failed = _decide(lambda game: record(game, actions[player_num]), views[player_num], player_num,
+                                    None)
+                errors += failed
+        simulator.apply_actions(game_state, actions[1], actions[2])
+
+    money = {1: game_state.player1.money, 2: game_state.player2.money}
+    return GameResult(game, seed, a_player, money[a_player], money[3 - a_player], errors)
+
+
+def _play_game(args) -> GameResult:
+    return play_game(*args)
+
+
+def _quiet_worker() -> None:
+    # Bots log every turn; thousands of games of that would drown the results
+    configure_logging(level=OFF)
+    sys.stderr = open(os.devnull, "w")
+
+
+def run_tournament(strategy_a: Strategy, strategy_b: Strategy, games: int, seed: int = 0,
+                   workers: Optional[int] = None, max_turns: int = MAX_TURNS) -> Iterator[GameResult]:
+    """
+    Plays games between two strategies on a process pool, yielding results as they finish.
+    Strategy A alternates between player 1 and player 2 to cancel out any side advantage.
+    :param strategy_a: First strategy
+    :param strategy_b: Second strategy
+    :param games: Number of games
+    :param seed: Base seed, game i uses seed + i
+    :param workers: Worker processes, all available cores by default
+    :param max_turns: Turns per game
+    :return: Iterator of GameResult, in completion order
+    """
+    args = [(strategy_a, strategy_b, i, seed + i, 1 + i % 2, max_turns) for i in range(games)]
+    with ProcessPoolExecutor(workers or os.cpu_count() or 1, initializer=_quiet_worker) as pool:
+        yield from pool.map(_play_game, args, chunksize=max(1, games // (8 * (workers or os.cpu_count() or 1))))
+
+
+def summarize(results: List[GameResult]) -> dict:
+    """
+    Returns win/draw/loss counts for strategy A with a 95% Wilson interval on its
+    win rate (draws count as half a win) and a 95% normal interval on the mean
+    money difference
+    """
+    n = len(results)
+    if n == 0:
+        return {'games': 0}
+    wins = sum(result.a_money > result.b_money for result in results)
+    draws = sum(result.a_money == result.b_money for result in results)
+    diffs = [result.a_money - result.b_money for result in results]
+    mean = sum(diffs) / n
+    variance = sum((diff - mean) ** 2 for diff in diffs) / (n - 1) if n > 1 else 0.0
+    margin = 1.96 * math.sqrt(variance / n)
+
+    z = 1.96
+    rate = (wins + draws / 2) / n
+    center = (rate + z * z / (2 * n)) / (1 + z * z / n)
+    spread = z * math.sqrt(rate * (1 - rate) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return {
+        'games': n,
+        'wins': wins,
+        'draws': draws,
+        'losses': n - wins - draws,
+        'win_rate': rate,
+        'win_rate_ci95': [center - spread, center + spread],
+        'mean_money_diff': mean,
+        'money_diff_ci95': [mean - margin, mean + margin],
+        'errors': sum(result.errors for result in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play two strategy modules against each other offline")
+    parser.add_argument("strategy_a", help="Module with get_move_decision/get_action_decision, e.g. bot")
+    parser.add_argument("strategy_b")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--a-item", default="COFFEE_THERMOS")
+    parser.add_argument("--a-upgrade", default="LONGER_LEGS")
+    parser.add_argument("--b-item", default="COFFEE_THERMOS")
+    parser.add_argument("--b-upgrade", default="LONGER_LEGS")
+    parser.add_argument("--out", default="tournament.csv", help="Per-game results, one line per game")
+    args = parser.parse_args()
+
+    strategy_a = Strategy(args.strategy_a, ItemType[args.a_item], UpgradeType[args.a_upgrade])
+    strategy_b = Strategy(args.strategy_b, ItemType[args.b_item], UpgradeType[args.b_upgrade])
+    results = []
+    with open(args.out, "w") as f:
+        f.write("game,seed,a_player,a_money,b_money,errors\n")
+        for result in run_tournament(strategy_a, strategy_b, args.games, args.seed, args.workers):
+            results.append(result)
+            f.write(",".join(str(value) for value in result) + "\n")
+            f.flush()
+    summary = summarize(results)
+    summary['a'] = str(strategy_a)
+    summary['b'] = str(strategy_b)
+    with open(os.path.splitext(args.out)[0] + ".summary.json", "w") as f:
+        json.dump(summary, f, indent=2)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
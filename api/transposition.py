@@ -0,0 +1,102 @@
+from collections import OrderedDict
+from typing import List, Optional
+
+# Replacement schemes for a full TranspositionTable
+LRU = "lru"
+DEPTH_PREFERRED = "depth"
+
+
+class Entry:
+    __slots__ = ("key", "depth", "total", "count")
+
+    def __init__(self, key: int, depth: int, total: float, count: int) -> None:
+        self.key = key
+        self.depth = depth
+        self.total = total
+        self.count = count
+
+    @property
+    def value(self) -> float:
+        return self.total / self.count
+
+
+class TranspositionTable:
+    """
+    Size-bounded map from Zobrist hashes to evaluations, so that a search
+    reaching the same state along different paths evaluates it once.
+
+    Each entry keeps the sum and count of the rewards stored for its state and
+    the depth (turns looked ahead) they were evaluated to. When the table is full:
+
+    - LRU evicts the entry looked up or stored least recently;
+    - DEPTH_PREFERRED is a fixed array indexed by the low bits of the hash, where
+      a colliding state only replaces an entry evaluated to at most its own depth.
+    """
+
+    def __init__(self, capacity: int = 1 << 16, replacement: str = LRU) -> None:
+        if capacity <= 0:
+            raise ValueError("TranspositionTable capacity must be positive")
+        if replacement not in (LRU, DEPTH_PREFERRED):
+            raise ValueError(f"Unknown replacement scheme {replacement}")
+        self.capacity = capacity
+        self.replacement = replacement
+        self._lru: "OrderedDict[int, Entry]" = OrderedDict()
+        self._slots: List[Optional[Entry]] = [None] * capacity if replacement == DEPTH_PREFERRED else []
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        if self.replacement == LRU:
+            return len(self._lru)
+        return sum(entry is not None for entry in self._slots)
+
+    def get(self, key: int, depth: int = 0) -> Optional[Entry]:
+        """
+        Returns the entry for a hash if it was evaluated to at least the given depth, None otherwise
+        """
+        if self.replacement == LRU:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+        else:
+            entry = self._slots[key % self.capacity]
+            if entry is not None and entry.key != key:
+                entry = None
+        if entry is None or entry.depth < depth:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def store(self, key: int, depth: int, reward: float) -> None:
+        """
+        Adds a reward for a state, averaging it with the ones already stored for
+        the same state and depth; a deeper evaluation replaces shallower ones
+        """
+        if self.replacement == LRU:
+            entry = self._lru.get(key)
+            if entry is None:
+                if len(self._lru) >= self.capacity:
+                    self._lru.popitem(last=False)
+                self._lru[key] = Entry(key, depth, reward, 1)
+                return
+            self._lru.move_to_end(key)
+        else:
+            index = key % self.capacity
+            entry = self._slots[index]
+            if entry is None or entry.key != key:
+                if entry is None or entry.depth <= depth:
+                    self._slots[index] = Entry(key, depth, reward, 1)
+                return
+        if depth > entry.depth:
+            entry.depth, entry.total, entry.count = depth, reward, 1
+        elif depth == entry.depth:
+            entry.total += reward
+            entry.count += 1
+
+    def clear(self) -> None:
+        self._lru.clear()
+        if self.replacement == DEPTH_PREFERRED:
+            self._slots = [None] * self.capacity
+        self.hits = 0
+        self.misses = 0
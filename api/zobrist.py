@@ -0,0 +1,131 @@
+from typing import Optional
+from model.game_state import GameState
+from model.player import Player
+from model.tile import Tile
+from model.crop_type import CropType
+from api.constants import Constants
+
+import random
+
+MASK64 = (1 << 64) - 1
+
+# Highest growth timer given its own key; longer timers share the last one
+MAX_TIMER = max(crop.get_growth_time() for crop in CropType)
+
+# Highest turn given its own key, past the end of any game
+MAX_TURN = 256
+
+
+def mix64(value: int) -> int:
+    """
+    Scrambles an integer into 64 well spread bits (the splitmix64 finaliser).
+    Used to key features with no small fixed range, like money.
+    """
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+class Zobrist:
+    """
+    Zobrist hashing of game states for search. A state's hash is the XOR of one
+    random 64-bit key per feature: the turn, each tile's crop type and growth
+    timer and item effects, and each player's position, money, inventories and
+    item state. Tile types follow from the turn and are not hashed separately.
+
+    Because XOR undoes itself, a change is applied by XORing the old term of a
+    tile or player out and the new one in. The Simulator does that on every
+    mutation of a hashed state, so after the first full hash() the hash of each
+    successor costs only the tiles and players it touched.
+    """
+
+    def __init__(self, constants: Optional[Constants] = None, seed: int = 27) -> None:
+        constants = constants if constants is not None else Constants()
+        self.width = constants.BOARD_WIDTH
+        self.height = constants.BOARD_HEIGHT
+        rng = random.Random(seed)
+        size = self.width * self.height
+
+        def keys(count):
+            return [rng.getrandbits(64) for _ in range(count)]
+
+        self.turn = keys(MAX_TURN + 1)
+        # An empty tile contributes nothing, so only planted crops need keys
+        self.crop = {crop.name: keys(size) for crop in CropType if crop != CropType.NONE}
+        self.timer = [keys(MAX_TIMER + 1) for _ in range(size)]
+        self.rain_totem = keys(size)
+        self.fertility_idol = keys(size)
+        # Indexed by tile then by the protected player's index (0 or 1)
+        self.scarecrow = [keys(2) for _ in range(size)]
+        # Indexed by player id, then tile
+        self.position = [None, keys(size), keys(size)]
+        self.salt = [0, rng.getrandbits(64), rng.getrandbits(64)]
+        self.seeds = [None] + [{crop: rng.getrandbits(64) for crop in CropType} for _ in range(2)]
+
+    def turn_term(self, turn: int) -> int:
+        return self.turn[min(max(turn, 0), MAX_TURN)]
+
+    def tile_term(self, x: int, y: int, tile: Tile) -> int:
+        """
+        Returns the part of the hash contributed by one tile
+        """
+        index = y * self.width + x
+        crop = tile.crop
+        res = 0
+        if crop.type != CropType.NONE.name:
+            res = self.crop[crop.type][index] ^ self.timer[index][min(max(crop.growth_timer, 0), MAX_TIMER)]
+        if tile.rain_totem_effect:
+            res ^= self.rain_totem[index]
+        if tile.fertility_idol_effect:
+            res ^= self.fertility_idol[index]
+        if tile.scarecrow_effect >= 0:
+            res ^= self.scarecrow[index][tile.scarecrow_effect]
+        return res
+
+    def player_term(self, player_id: int, player: Player) -> int:
+        """
+        Returns the part of the hash contributed by player 1 or 2
+        """
+        salt = self.salt[player_id]
+        pos = player.position
+        res = self.position[player_id][pos.y * self.width + pos.x]
+        # Money and crop values are floats; cents are as fine as the game gets
+        res ^= mix64(salt ^ round(player.money * 100))
+        seeds = self.seeds[player_id]
+        for crop, count in player.seed_inventory.items():
+            if count:
+                res ^= mix64(seeds[crop] + count)
+        harvested = player.harvested_inventory
+        if harvested:
+            res ^= mix64(salt ^ (len(harvested) << 40) ^ round(sum(crop['value'] for crop in harvested) * 100))
+        flags = player.used_item | player.has_coffee_thermos << 1 | player.has_delivery_drone << 2 \
+            | player.item_time_expired << 3
+        return res ^ mix64(salt ^ flags)
+
+    def full_hash(self, game_state: GameState) -> int:
+        """
+        Returns the hash of a state computed from scratch
+        """
+        res = self.turn_term(game_state.turn) ^ self.player_term(1, game_state.player1) \
+            ^ self.player_term(2, game_state.player2)
+        none = CropType.NONE.name
+        for y, row in enumerate(game_state.tile_map.tiles):
+            for x, tile in enumerate(row):
+                if tile.crop.type != none or tile.rain_totem_effect or tile.fertility_idol_effect \
+                        or tile.scarecrow_effect >= 0:
+                    res ^= self.tile_term(x, y, tile)
+        return res
+
+    def hash(self, game_state: GameState) -> int:
+        """
+        Returns the hash of a state, computing and storing it on the state if it
+        has none yet. From then on the Simulator keeps it up to date, and clones
+        of the state start out with it.
+        """
+        if game_state.zobrist is None:
+            game_state.zobrist = self.full_hash(game_state)
+        return game_state.zobrist
+
+
+zobrist = Zobrist()
@@ -0,0 +1,58 @@
+from typing import Callable, List, Tuple
+from model.game_state import GameState
+from api.simulator import Simulator
+from api.mcts import GreedyRolloutPolicy, _rollout
+from benchmarks.fixtures import midgame_gamestate_dict
+
+import argparse
+import sys
+
+
+def check_greedy_rollout_profits(seeds: int = 8) -> str:
+    """
+    Plays greedy rollouts from the midgame fixture to the end of the game and checks
+    that on average they finish with more money than they started with
+    :param seeds: Simulator seeds to average over, since the opponent's greedy play
+        sometimes takes a rollout's crops
+    """
+    root = GameState(midgame_gamestate_dict())
+    start = root.get_my_player().money
+    finals = []
+    for seed in range(seeds):
+        state = root.clone()
+        _rollout(Simulator(seed), state, root.player_num, GreedyRolloutPolicy(), None)
+        finals.append(state.get_my_player().money)
+    mean = sum(finals) / len(finals)
+    assert mean > start, f"greedy rollouts lose money: {start:.0f} -> {mean:.0f} on average"
+    return f"{start:.0f} -> {mean:.0f} on average over {seeds} seeds"
+
+
+def checks() -> List[Tuple[str, Callable[[], str]]]:
+    """
+    Returns (name, function) for every behavioural check. Each function raises
+    AssertionError if the check fails and otherwise describes what it saw.
+    """
+    return [
+        ("greedy_rollout_profits", check_greedy_rollout_profits),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the look-ahead and planning code behaves sensibly")
+    parser.add_argument("only", nargs="*", help="Checks to run, all by default")
+    args = parser.parse_args()
+
+    failed = 0
+    for name, function in checks():
+        if args.only and name not in args.only:
+            continue
+        try:
+            print(f"{name:28s} ok    {function()}")
+        except AssertionError as e:
+            failed += 1
+            print(f"{name:28s} FAIL  {e}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
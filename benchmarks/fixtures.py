@@ -0,0 +1,48 @@
+from typing import Dict
+from model.item_type import ItemType
+from model.upgrade_type import UpgradeType
+from model.crop_type import CropType
+from model.tile_type import TileType
+from api.simulator import new_gamestate_dict, base_tile_type
+from api import game_util
+
+import random
+
+
+def midgame_gamestate_dict(turn: int = 60, crop_density: float = 0.5, seed: int = 0) -> Dict:
+    """
+    Returns a 30x50 game state in the engine's JSON shape as it might look mid-game:
+    the band part way down the board, crops at various stages on and behind it,
+    and both players carrying seeds and crops
+    :param turn: Turn the state is for
+    :param crop_density: Fraction of plantable band and arid tiles holding a crop
+    :param seed: Seed for the layout
+    :return: Dictionary accepted by GameState
+    """
+    rng = random.Random(seed)
+    constants = game_util.constants
+    gamestate = new_gamestate_dict(ItemType.COFFEE_THERMOS, UpgradeType.LONGER_LEGS,
+                                   ItemType.SCARECROW, UpgradeType.SCYTHE, constants)
+    gamestate['turn'] = turn
+    crops = [crop for crop in CropType if crop != CropType.NONE]
+    for y, row in enumerate(gamestate['tileMap']['tiles']):
+        for x, tile in enumerate(row):
+            tile_type = base_tile_type(turn, x, y, constants)
+            tile['type'] = tile_type.name
+            if tile_type in (TileType.GREEN_GROCER, TileType.GRASS, TileType.SOIL) or rng.random() > crop_density:
+                continue
+            crop = rng.choice(crops)
+            timer = rng.randint(0, crop.get_growth_time())
+            tile['crop'] = {'type': crop.name, 'growthTimer': timer,
+                            'value': crop.get_growth_value() * (crop.get_growth_time() - timer)}
+            tile['turnsLeftToGrow'] = timer
+            tile['rainTotemEffect'] = rng.random() < 0.05
+            tile['fertilityIdolEffect'] = rng.random() < 0.05
+
+    for key in ('p1', 'p2'):
+        player = gamestate[key]
+        player['position'] = {'x': rng.randrange(constants.BOARD_WIDTH), 'y': rng.randrange(constants.BOARD_HEIGHT)}
+        player['money'] = rng.randint(100, 5000)
+        player['seedInventory'][CropType.CORN.name] = 3
+        player['harvestedInventory'] = [{'type': CropType.GRAPE.name, 'growthTimer': 0, 'value': 16.5}] * 4
+    return gamestate
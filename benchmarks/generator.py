@@ -0,0 +1,258 @@
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from model.item_type import ItemType
+from model.upgrade_type import UpgradeType
+from model.crop_type import CropType
+from model.tile_type import TileType
+from api.constants import Constants
+from api.config import config, override_config
+from api.reach import diamond_offsets
+from api.simulator import new_gamestate_dict, base_tile_type, UNPLANTABLE_TILES
+
+import argparse
+import json
+import random
+import sys
+
+CROPS = [crop for crop in CropType if crop != CropType.NONE]
+
+
+def scaled_constants(width: Optional[int] = None, height: Optional[int] = None) -> Constants:
+    """
+    Returns Constants for a board of another size, everything else unchanged
+    :param width: Board width, the default width if None
+    :param height: Board height, the default height if None
+    :return: Constants
+    """
+    overrides = {}
+    if width is not None:
+        overrides['board.width'] = width
+    if height is not None:
+        overrides['board.height'] = height
+    return Constants(override_config(config, overrides))
+
+
+class GameStateGenerator:
+    """
+    Builds synthetic game states in the engine's JSON shape for stress and scaling tests.
+
+    generate() returns a single state; turn_sequence() plays a stream of states the
+    way the engine sends them, one before each move and one before each action.
+    States in a sequence share the rows and tiles that did not change since the
+    previous one, as decoding fresh JSON would not, so consumers must treat them as
+    read-only.
+    """
+
+    def __init__(self, width: Optional[int] = None, height: Optional[int] = None, crop_density: float = 0.5,
+                 effect_density: float = 0.05, player_positions: Optional[Sequence[Tuple[int, int]]] = None,
+                 seed: int = 0) -> None:
+        """
+        :param width: Board width, the default width if None
+        :param height: Board height, the default height if None
+        :param crop_density: Fraction of plantable tiles holding a crop
+        :param effect_density: Fraction of the board covered by rain totem, fertility idol and scarecrow effects
+        :param player_positions: (x, y) for player 1 and player 2, random if None
+        :param seed: Seed for the layout and for every move of a sequence
+        """
+        self.constants = scaled_constants(width, height)
+        self.width = self.constants.BOARD_WIDTH
+        self.height = self.constants.BOARD_HEIGHT
+        self.crop_density = crop_density
+        self.effect_density = effect_density
+        self.player_positions = player_positions
+        self.random = random.Random(seed)
+
+        self.gamestate: Dict = {}
+        self.rows: List[List[Dict]] = []
+        # Rows and tiles copied since the last emitted state, which may be modified in place
+        self._fresh_rows: Set[int] = set()
+        self._fresh_tiles: Set[Tuple[int, int]] = set()
+
+    def generate(self, turn: int = 60) -> Dict:
+        """
+        Returns a game state for the given turn with crops, item effects and players laid out at random
+        :param turn: Turn the state is for
+        :return: Dictionary accepted by GameState
+        """
+        rng = self.random
+        gamestate = new_gamestate_dict(ItemType.COFFEE_THERMOS, UpgradeType.LONGER_LEGS,
+                                       ItemType.SCARECROW, UpgradeType.SCYTHE, self.constants)
+        gamestate['turn'] = turn
+        rows = gamestate['tileMap']['tiles']
+        for y, row in enumerate(rows):
+            for x, tile in enumerate(row):
+                tile_type = base_tile_type(turn, x, y, self.constants)
+                tile['type'] = tile_type.name
+                if tile_type in UNPLANTABLE_TILES or rng.random() >= self.crop_density:
+                    continue
+                crop = rng.choice(CROPS)
+                timer = rng.randint(0, crop.get_growth_time())
+                tile['crop'] = {'type': crop.name, 'growthTimer': timer,
+                                'value': crop.get_growth_value() * (crop.get_growth_time() - timer)}
+                tile['turnsLeftToGrow'] = timer
+        self._place_effects(rows)
+
+        for n, key in enumerate(('p1', 'p2')):
+            player = gamestate[key]
+            if self.player_positions is not None:
+                x, y = self.player_positions[n]
+            else:
+                x, y = rng.randrange(self.width), rng.randrange(self.height)
+            player['position'] = {'x': x, 'y': y}
+            player['money'] = rng.randint(100, 5000)
+            player['seedInventory'][rng.choice(CROPS).name] = rng.randint(0, 5)
+            player['harvestedInventory'] = [{'type': CropType.GRAPE.name, 'growthTimer': 0, 'value': 16.5}
+                                            for _ in range(rng.randint(0, 5))]
+
+        self.gamestate = gamestate
+        self.rows = rows
+        self._fresh_rows = set()
+        self._fresh_tiles = set()
+        return gamestate
+
+    def _place_effects(self, rows: List[List[Dict]]) -> None:
+        # Effects come in diamonds around where an item was used, like in a real game
+        effects = [
+            (self.constants.RAIN_TOTEM_EFFECT_RADIUS, 'rainTotemEffect', lambda: True),
+            (self.constants.FERTILITY_IDOL_EFFECT_RADIUS, 'fertilityIdolEffect', lambda: True),
+            (self.constants.SCARECROW_EFFECT_RADIUS, 'scarecrowEffect', lambda: self.random.randint(0, 1)),
+        ]
+        for radius, key, value in effects:
+            area = len(diamond_offsets(radius))
+            for _ in range(round(self.effect_density * self.width * self.height / (len(effects) * area))):
+                cx, cy = self.random.randrange(self.width), self.random.randrange(self.height)
+                effect = value()
+                for dx, dy in diamond_offsets(radius):
+                    if 0 <= cx + dx < self.width and 0 <= cy + dy < self.height:
+                        rows[cy + dy][cx + dx][key] = effect
+
+    def turn_sequence(self, turns: int, start_turn: int = 1, churn: float = 0.01) -> Iterator[Dict]:
+        """
+        Yields the states of a stretch of game: players wander within their movement
+        range, a fraction of the board is planted or harvested every turn, crops grow
+        and the fertility band moves down
+        :param turns: Number of turns to play
+        :param start_turn: Turn of the first state
+        :param churn: Fraction of plantable tiles planted or harvested per turn
+        :return: Iterator of dictionaries accepted by GameState, two per turn
+        """
+        self.generate(start_turn)
+        plantable = [(x, y) for y in range(self.constants.GRASS_ROWS, self.height) for x in range(self.width)]
+        changes = max(1, round(churn * len(plantable)))
+        for _ in range(turns):
+            yield self._snapshot()
+            for key in ('p1', 'p2'):
+                self._move(self.gamestate[key])
+            yield self._snapshot()
+            for x, y in self.random.sample(plantable, min(changes, len(plantable))):
+                self._plant_or_harvest(x, y)
+            self._grow()
+            self.gamestate['turn'] += 1
+            self._update_tile_types()
+
+    def _snapshot(self) -> Dict:
+        gamestate = self.gamestate
+        self._fresh_rows = set()
+        self._fresh_tiles = set()
+        return {
+            'turn': gamestate['turn'],
+            'p1': self._copy_player(gamestate['p1']),
+            'p2': self._copy_player(gamestate['p2']),
+            'tileMap': {'mapHeight': self.height, 'mapWidth': self.width, 'tiles': list(self.rows)},
+            'playerNum': gamestate['playerNum'],
+            'feedback': [],
+        }
+
+    @staticmethod
+    def _copy_player(player: Dict) -> Dict:
+        res = dict(player)
+        res['position'] = dict(player['position'])
+        res['seedInventory'] = dict(player['seedInventory'])
+        res['harvestedInventory'] = list(player['harvestedInventory'])
+        return res
+
+    def _writable_tile(self, x: int, y: int) -> Dict:
+        if y not in self._fresh_rows:
+            self.rows[y] = list(self.rows[y])
+            self._fresh_rows.add(y)
+        if (x, y) not in self._fresh_tiles:
+            tile = dict(self.rows[y][x])
+            tile['crop'] = dict(tile['crop'])
+            self.rows[y][x] = tile
+            self._fresh_tiles.add((x, y))
+        return self.rows[y][x]
+
+    def _move(self, player: Dict) -> None:
+        pos = player['position']
+        movement = self.random.randint(0, player['maxMovement'])
+        dy = self.random.randint(-movement, movement)
+        dx = (movement - abs(dy)) * self.random.choice((-1, 1))
+        player['position'] = {'x': min(max(pos['x'] + dx, 0), self.width - 1),
+                              'y': min(max(pos['y'] + dy, 0), self.height - 1)}
+
+    def _plant_or_harvest(self, x: int, y: int) -> None:
+        tile = self.rows[y][x]
+        if TileType[tile['type']] in UNPLANTABLE_TILES:
+            return
+        if tile['crop']['type'] == CropType.NONE.name:
+            crop = self.random.choice(CROPS)
+            tile = self._writable_tile(x, y)
+            tile['crop'] = {'type': crop.name, 'growthTimer': crop.get_growth_time(), 'value': 0}
+            tile['turnsLeftToGrow'] = crop.get_growth_time()
+        elif tile['crop']['growthTimer'] <= 0:
+            tile = self._writable_tile(x, y)
+            tile['crop'] = {'type': CropType.NONE.name, 'growthTimer': 0, 'value': 0}
+            tile['turnsLeftToGrow'] = 0
+
+    def _grow(self) -> None:
+        growth = {crop.name: crop.get_growth_value() for crop in CROPS}
+        for y, row in enumerate(self.rows):
+            for x, tile in enumerate(row):
+                crop = tile['crop']
+                if crop['type'] == CropType.NONE.name or crop['growthTimer'] <= 0:
+                    continue
+                tile = self._writable_tile(x, y)
+                crop = tile['crop']
+                crop['value'] += growth[crop['type']]
+                crop['growthTimer'] -= 1
+                tile['turnsLeftToGrow'] = crop['growthTimer']
+
+    def _update_tile_types(self) -> None:
+        turn = self.gamestate['turn']
+        for y in range(self.constants.GRASS_ROWS, self.height):
+            tile_type = base_tile_type(turn, 0, y, self.constants).name
+            if self.rows[y][0]['type'] == tile_type:
+                continue
+            for x in range(self.width):
+                self._writable_tile(x, y)['type'] = tile_type
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic game states as JSON lines, as the engine sends them")
+    parser.add_argument("--width", type=int, default=None)
+    parser.add_argument("--height", type=int, default=None)
+    parser.add_argument("--crop-density", type=float, default=0.5)
+    parser.add_argument("--effect-density", type=float, default=0.05)
+    parser.add_argument("--turns", type=int, default=0, help="Turns to play, 0 for a single state")
+    parser.add_argument("--turn", type=int, default=60, help="Turn of the single state or the first of a sequence")
+    parser.add_argument("--churn", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="File to write, stdout by default")
+    args = parser.parse_args()
+
+    generator = GameStateGenerator(args.width, args.height, args.crop_density, args.effect_density, seed=args.seed)
+    if args.turns:
+        states = generator.turn_sequence(args.turns, args.turn, args.churn)
+    else:
+        states = [generator.generate(args.turn)]
+    out = open(args.out, "w") if args.out else sys.stdout
+    try:
+        for state in states:
+            out.write(json.dumps(state))
+            out.write("\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+from typing import Callable, Dict, List, Tuple
+from model.game_state import GameState
+from model.tile_map import TileMap, LazyTileMap
+from model.array_tile_map import ArrayTileMap
+from model.position import Position
+from model.decisions.move_decision import MoveDecision
+from model.decisions.do_nothing_decision import DoNothingDecision
+from api import game_util
+from api.tournament import SimulatedGame
+from api.simulator import Simulator, copy_game_state
+from api.zobrist import zobrist
+from api.harvest_route import HarvestRoutePlanner
+from api.forecast import CropForecast
+from benchmarks.fixtures import midgame_gamestate_dict
+from networking.io import configure_logging, flush_logs
+
+import argparse
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def benchmarks() -> List[Tuple[str, Callable[[], object]]]:
+    """
+    Returns (name, function) for every hot path measured. Each function runs one
+    operation on a fresh-enough fixture; setup happens here, outside the timing.
+    """
+    import bot
+
+    gamestate_dict = midgame_gamestate_dict()
+    gamestate_str = json.dumps(gamestate_dict)
+    game_state = GameState(gamestate_dict)
+    # As after an incremental update with nothing changed, so the decisions don't rescan the board
+    # whether or not gamestate_update_unchanged ran first
+    game_state.dirty_tiles = set()
+    name = game_state.get_my_player().name
+    here = game_state.get_my_player().position
+    game = SimulatedGame(game_state)
+    # A separate state for the look-ahead benchmarks, which reset its ownership flags on every clone
+    root = GameState(gamestate_dict)
+    simulator = Simulator(seed=0)
+    harvest_planner = HarvestRoutePlanner()
+    array_tile_map = ArrayTileMap(gamestate_dict['tileMap'])
+    stay = (MoveDecision(root.player1.position), DoNothingDecision(), MoveDecision(root.player2.position),
+            DoNothingDecision())
+
+    def clone_and_mutate():
+        state = root.clone()
+        state.tile_map.writable_tile(here.x, here.y).turns_left_to_grow += 1
+        state.writable_player(root.player_num).money += 1
+        return state
+
+    return [
+        ("json_decode", lambda: json.loads(gamestate_str)),
+        ("gamestate_construct", lambda: GameState(gamestate_dict)),
+        ("tilemap_build", lambda: TileMap(gamestate_dict['tileMap'])),
+        ("lazy_tilemap_build", lambda: LazyTileMap(gamestate_dict['tileMap'])),
+        ("array_tilemap_build", lambda: ArrayTileMap(gamestate_dict['tileMap'])),
+        ("array_tilemap_clone", lambda: array_tile_map.clone()),
+        ("gamestate_update_unchanged", lambda: game_state.update(gamestate_dict)),
+        ("within_harvest_range", lambda: game_util.within_harvest_range(game_state, name)),
+        ("within_move_range", lambda: game_util.within_move_range(game_state, name)),
+        ("tile_type_on_turn", lambda: game_util.tile_type_on_turn(60, game_state, here)),
+        ("position_create", lambda: Position(3, 4)),
+        ("copy_game_state", lambda: copy_game_state(root)),
+        ("gamestate_clone", lambda: root.clone()),
+        ("clone_and_mutate", clone_and_mutate),
+        ("simulator_step", lambda: simulator.step(root, *stay)),
+        ("zobrist_full_hash", lambda: zobrist.full_hash(root)),
+        ("harvest_route_plan", lambda: harvest_planner.plan(root, root.player_num)),
+        ("crop_forecast", lambda: CropForecast(root, 30)),
+        ("get_move_decision", lambda: bot.get_move_decision(game)),
+        ("get_action_decision", lambda: bot.get_action_decision(game)),
+    ]
+
+
+def time_function(function: Callable[[], object], min_seconds: float = 0.2, repeats: int = 3) -> float:
+    """
+    Returns the best seconds per call over a few repeats, each long enough to time reliably
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds / repeats:
+            break
+        number *= 2
+    best = elapsed / number
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def measure_allocations(function: Callable[[], object]) -> Tuple[int, int]:
+    """
+    Returns (memory blocks allocated and still alive after the call or freed during it,
+    peak bytes) for one call
+    """
+    function()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    result = function()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del result
+    blocks = sum(max(0, stat.count_diff) for stat in after.compare_to(before, "lineno"))
+    return blocks, peak
+
+
+def run(only: List[str] = None) -> Dict:
+    results = {}
+    # The bot logs every decision; records are still buffered and drained, just not printed
+    configure_logging(stderr=False)
+    try:
+        for name, function in benchmarks():
+            if only and name not in only:
+                continue
+            seconds = time_function(function)
+            blocks, peak = measure_allocations(function)
+            results[name] = {'ops_per_sec': 1 / seconds, 'us_per_op': seconds * 1e6,
+                             'alloc_blocks': blocks, 'peak_bytes': peak}
+    finally:
+        flush_logs()
+        configure_logging(stderr=True)
+    return results
+
+
+def report(results: Dict, baseline: Dict) -> str:
+    lines = [f"{'benchmark':28s} {'ops/sec':>12s} {'us/op':>10s} {'blocks':>8s} {'peak B':>10s} {'vs base':>8s}"]
+    for name, stats in results.items():
+        change = ""
+        if name in baseline:
+            change = f"{stats['ops_per_sec'] / baseline[name]['ops_per_sec'] - 1:+.0%}"
+        lines.append(f"{name:28s} {stats['ops_per_sec']:12.0f} {stats['us_per_op']:10.1f} "
+                     f"{stats['alloc_blocks']:8d} {stats['peak_bytes']:10d} {change:>8s}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the model, networking and api hot paths")
+    parser.add_argument("only", nargs="*", help="Benchmarks to run, all by default")
+    parser.add_argument("--baseline", default=BASELINE, help="JSON file to compare against")
+    parser.add_argument("--save", action="store_true", help="Write the results to the baseline file")
+    args = parser.parse_args()
+
+    results = run(args.only)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('results', {})
+    print(report(results, baseline))
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'results': {**baseline, **results}}, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+from typing import Dict, List
+from model.game_state import GameState
+from model.array_tile_map import ArrayTileMap
+from api.crop_tracker import CropTracker
+from api.distance_field import DistanceField
+from api.fertility_schedule import FertilitySchedule
+from api.simulator import grocer_columns
+from benchmarks.generator import GameStateGenerator
+
+import argparse
+import json
+import time
+
+STAGES = ("json_decode", "gamestate_build", "gamestate_update", "array_tilemap_update", "crop_tracker_update",
+          "distance_field")
+
+
+def measure(scale: int, turns: int = 10, crop_density: float = 0.5, seed: int = 0) -> Dict[str, float]:
+    """
+    Streams a generated game on a board scale times the default in each direction
+    through the parsing, tracking and planning code, the way the bot would see it
+    :param scale: Multiplier on the board width and height
+    :param turns: Turns to play
+    :param crop_density: Fraction of plantable tiles holding a crop
+    :param seed: Seed for the generator
+    :return: Mean milliseconds per state for each stage, plus the tile count
+    """
+    base = GameStateGenerator()
+    generator = GameStateGenerator(base.width * scale, base.height * scale, crop_density, seed=seed)
+    constants = generator.constants
+    lines = [json.dumps(state) for state in generator.turn_sequence(turns, start_turn=30)]
+
+    totals = dict.fromkeys(STAGES, 0.0)
+    game_state = array_map = None
+    tracker = CropTracker(constants, FertilitySchedule(constants=constants))
+    grocer = [(x, 0) for x in grocer_columns(constants)]
+    for line in lines:
+        start = time.perf_counter()
+        gamestate_dict = json.loads(line)
+        decoded = time.perf_counter()
+        totals['json_decode'] += decoded - start
+
+        if game_state is None:
+            game_state = GameState(gamestate_dict)
+            array_map = ArrayTileMap(gamestate_dict['tileMap'])
+            totals['gamestate_build'] += time.perf_counter() - decoded
+            continue
+        game_state.update(gamestate_dict)
+        updated = time.perf_counter()
+        totals['gamestate_update'] += updated - decoded
+        array_map.update(gamestate_dict['tileMap'])
+        arrays = time.perf_counter()
+        totals['array_tilemap_update'] += arrays - updated
+        tracker.update(game_state, game_state.dirty_tiles)
+        tracked = time.perf_counter()
+        totals['crop_tracker_update'] += tracked - arrays
+        pos = game_state.get_my_player().position
+        DistanceField(grocer + [(pos.x, pos.y)], constants)
+        totals['distance_field'] += time.perf_counter() - tracked
+
+    # The first state is built, every later one is an update
+    counts = dict.fromkeys(STAGES, len(lines) - 1)
+    counts['json_decode'] = len(lines)
+    counts['gamestate_build'] = 1
+    res = {stage: 1000 * total / counts[stage] for stage, total in totals.items()}
+    res['tiles'] = generator.width * generator.height
+    return res
+
+
+def report(results: Dict[int, Dict[str, float]]) -> str:
+    scales: List[int] = sorted(results)
+    header = [f"x{scale} ({results[scale]['tiles']} tiles)" for scale in scales]
+    lines = [f"{'ms per state':22s}" + "".join(f"{cell:>18s}" for cell in header)]
+    for stage in STAGES:
+        cells = []
+        for scale in scales:
+            # Growth relative to the smallest board, divided by the growth in tiles: 1.0 means linear
+            ratio = (results[scale][stage] / results[scales[0]][stage]) / (results[scale]['tiles']
+                                                                          / results[scales[0]]['tiles'])
+            cells.append(f"{results[scale][stage]:9.2f} ({ratio:4.2f})")
+        lines.append(f"{stage:22s}" + "".join(f"{cell:>18s}" for cell in cells))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time parsing, tracking and planning on boards of growing size. "
+                                                 "Bracketed numbers are cost per tile relative to the first scale.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 2, 5, 10])
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--crop-density", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = {scale: measure(scale, args.turns, args.crop_density, args.seed) for scale in args.scales}
+    print(report(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
 from networking.io import Logger
 from game import Game
-from api import game_util
 from model.position import Position
 from model.decisions.move_decision import MoveDecision
 from model.decisions.action_decision import ActionDecision
@@ -10,14 +9,21 @@ from model.decisions.plant_decision import PlantDecision
 from model.decisions.do_nothing_decision import DoNothingDecision
 from model.tile_type import TileType
 from model.item_type import ItemType
-from model.crop_type import CropType
 from model.upgrade_type import UpgradeType
 from model.game_state import GameState
 from model.player import Player
 from api.constants import Constants
+from api.fertility_schedule import schedule
+from api.distance_field import RowDistanceField
+from api.crop_tracker import CropTracker
+from api.legal_moves import LegalMoves
+from api.seed_planner import SeedPlanner
+from api.harvest_route import HarvestRoutePlanner
+from api.reach import diamond_offsets
+from api.scheduler import DecisionScheduler, one_shot
 
-import random
 import math
+import os
 
 # "Get" global logger and constant
 logger = Logger()
@@ -26,76 +32,49 @@ constants = Constants()
 # Global Variables
 # Turn we planted
 turn_planted = -1
-# Global list of crops we or the opposition have planted at the y,x value
-# Both lists are a 50 x 30
-# They will be filled with "None" crops at the start of the game
-# Friendly will replace "None" crops with crops that we plan
-# Opposition will replace "None" crops with crops that we didn't plant
-# Neither lists will overlap, the opposing list will have "None" crops in the overlap
-friendly_crops = [[]]
-opposition_crops = [[]]
+# Turns we stay by what we planted before moving on, so we only buy seeds that ripen by then
+PLANT_WAIT = 5
+# Turn we first leave the Green Grocer for the fertility band; seeds bought before then would sit in the inventory
+FIRST_TRIP_TURN = 23
+# Turn after which we only head for the Green Grocer, so crops must be sold by then
+LAST_TRIP_TURN = 150
+# Who planted each crop on the board, updated from the tiles that changed each update
+crop_tracker = CropTracker()
+# Distance to the row we want to plant on, moved along with the fertility band
+ideal_row = RowDistanceField([])
+# What to buy at the Green Grocer, only counting crops we can sell before heading home for good
+seed_planner = SeedPlanner(max_turns=LAST_TRIP_TURN)
+# Most turns a harvest trip may add to going straight to the Green Grocer
+ROUTE_DETOUR = 6
+# Work out the action decision while the engine resolves our move, reusing it if the opponent's move doesn't
+# change it. Off unless MM27_SPECULATE=1: the hit rate against a moving opponent and the slowdown of the main
+# thread still have to be measured, from the speculation counts in the timing summary
+SPECULATE = os.environ.get("MM27_SPECULATE") == "1"
+# Where the timings of every phase of the game loop are written when the game ends
+TIMING_SUMMARY_PATH = os.environ.get("MM27_TIMING_SUMMARY", "timing_summary.json")
+# Which ripe crops to pick up on the way to the Green Grocer
+harvest_planner = HarvestRoutePlanner()
+# Harvest trip being followed, planned again once its next stop is reached or can't be harvested as planned
+harvest_route = None
+# Legal moves in the current game state, kept up to date with the tiles that changed each update
+legal_moves = None
+# Sends a safe decision instead of crashing if deciding fails
+scheduler = DecisionScheduler()
 
 
 def on_better_soil(player, game_state):
     return game_state.tile_map.get_tile(player.pos.x, player.pos.y) >= 5
 
 
-# Get the x value for the line of ideal crop growth
+# Get the y value for the line of ideal crop growth
 def get_ideal_y(game_state):
+    rows = schedule.rows_of_type(game_state.turn, TileType.F_BAND_INNER)
+    if rows:
+        return rows[0]
+    # The inner band isn't on the board, estimate where it is
     return math.floor(game_state.turn / 3) - 5
 
 
-# Check if two crop objects are equal by checking their type, growth_timer, and value
-def crop_equals(one, two):
-    if not one.type == two.type:
-        return False
-    if not one.growth_timer == two.growth_timer:
-        return False
-    if not one.value == two.value:
-        return False
-    # If made it this far, all variables must be equal so return true
-    return True
-
-
-# Populate the two global crop lists at the beginning of the game
-# All crops at the beginning will have crop.type == 9 (the value for no crop type)
-def populate_global_crop_lists(game_state):
-    # Iterate through all tiles
-    for x in range(game_state.tile_map.map_width):
-        for y in range(game_state.tile_map.map_height):
-            # Populate the crop lists with the initial crops
-            friendly_crops[y][x] = game_state.tile_map.get_tile(x, y).crop
-            opposition_crops[y][x] = game_state.tile_map.get_tile(x, y).crop
-
-
-# Check for and update opponent crop list
-# If crops have changed since last turn, and we didn't plant them then the crop must be an a opponents
-def check_for_opp_crops(game_state):
-    # Iterate through all tiles in map
-    for x in range(game_state.tile_map.map_width):
-        for y in range(game_state.tile_map.map_height):
-            # Check that the crop is not one of ours
-            if not (friendly_crops[y][x].type == game_state.tile_map.get_tile(x, y).crop.type):
-                # Check that the crop is not already updated
-                if not (opposition_crops[y][x].type == game_state.tile_map.get_tile(x, y).crop.type):
-                    opposition_crops[y][x] = game_state.tile_map.get_tile(x, y).crop
-
-
-# Update the global crop lists with crop growth
-def update_global_tile_lists(game_state):
-    for x in range(game_state.tile_map.map_width):
-        for y in range(game_state.tile_map.map_height):
-            # Check to update the friendly crop
-            if not friendly_crops[y][x].type == 9:
-                if not crop_equals(friendly_crops[y][x], game_state.tile_map.get_tile(x, y).crop):
-                    friendly_crops[y][x] = game_state.tile_map.get_tile(x, y).crop
-
-            # Check to update the opposition crop
-            if not opposition_crops[y][x].type == 9:
-                if not crop_equals(opposition_crops[y][x], game_state.tile_map.get_tile(x, y).crop):
-                    opposition_crops[y][x] = game_state.tile_map.get_tile(x, y).crop
-
-
 def get_tiles_by_crop(game_state, tiles, crops=[]):
     out_tiles = [[]]
     for x in range(game_state.tile_map.map_width):
@@ -135,117 +114,76 @@ def sort_tiles_by_time(game_state, tiles):
     return crops_time
 
 
-# Determine optimal position to move to in 3 turns
+# Ripe crops we may harvest, most valuable first; those we can't reach this turn count for half
 def sort_tiles_by_harvest_value(game, player_pos_x, player_pos_y):
     crops = {}
     game_state = game.get_game_state()
-    tiles = game_state.tile_map
-    for x in range(game_state.tile_map.map_width):
-        for y in range(game_state.tile_map.map_height):
-            true_pos = x + y
-            near_opp = False
-            opp_offset = game_state.get_opponent_player.protection_radius
-
-            if abs(game_state.get_opponent_player.position.y + game_state.get_opponent_player.position.x - true_pos) <= opp_offset:
-                near_opp = True
-            else:
-                pass
-
-            if tiles[y][x].hasScarecrowEffect or near_opp or tiles[y][x].crop.growth_timer > 0:
-                val = 0
-            else:
-                val = tiles[y][x].crop.value
-                if is_valid_harvest_pos(Player.harvest_radius, Player.max_movement, player_pos_x, player_pos_y, (x, y)):
-                    pass
-                else:
-                    val *= 0.5
-                if tiles[y][x].fertility_idol_effect:
-                    val *= 2
-                else:
-                    pass
-                crops[(y, x)] = {'tile': tiles[y][x], 'value': val}
-
-            crops_value = sorted(crops.items(), key=lambda n: n[1]['value'], reverse=True)
-            return crops_value
-
-
-# Determine if the pos you want to move to from player pos is valid
-def is_valid_movement_pos(max_movement, player_pos_y, player_pos_x, pos_move=[0, 0]):
-    true_pos = distance_to(player_pos_y, player_pos_x, pos_move)
-    if true_pos <= max_movement:
-        return True
-    else:
-        return False
+    my_player = game_state.get_my_player()
+    for x, y, value in harvest_planner.harvestable(game_state, game_state.player_num):
+        if not is_valid_harvest_pos(my_player.harvest_radius, my_player.max_movement, player_pos_x, player_pos_y,
+                                    (x, y)):
+            value *= 0.5
+        crops[(y, x)] = {'tile': game_state.tile_map.get_tile(x, y), 'value': value}
+
+    crops_value = sorted(crops.items(), key=lambda n: n[1]['value'], reverse=True)
+    return crops_value
 
 
 def distance_to(player_pos_x, player_pos_y, pos_move=[0, 0]):
-    true_pos = abs((player_pos_x + player_pos_y) - (pos_move[0] + pos_move[1]))
+    true_pos = abs(player_pos_x - pos_move[0]) + abs(player_pos_y - pos_move[1])
     return true_pos
 
 
-# Move as close to pos_move as possible (within valid space)
-def movement_clamp(max_movement, player_pos_x, player_pos_y, pos_move=[0, 0]):
-    if is_valid_movement_pos(max_movement, player_pos_x, player_pos_y, pos_move):
-        return pos_move[0], pos_move[1]
-    elif abs(player_pos_x - pos_move[0]) < max_movement:
-        if pos_move[0] == player_pos_x:
-            if pos_move[1] > player_pos_y:
-                pos_move[1] = player_pos_y + max_movement
-            else:
-                pos_move[1] = player_pos_y - max_movement
-        elif pos_move[0] > player_pos_x:
-            pos_move[0] = player_pos_x + max_movement - abs(player_pos_y - pos_move[1])
-        else:
-            pos_move[0] = player_pos_x - (max_movement - abs(player_pos_y - pos_move[1]))
-        return pos_move[0], pos_move[1]
-    elif abs(player_pos_y - pos_move[1]) < max_movement:
-        if pos_move[1] == player_pos_y:
-            if pos_move[1] > player_pos_y:
-                pos_move[1] = player_pos_y + max_movement
-            else:
-                pos_move[1] = player_pos_y - max_movement
-        elif pos_move[1] > player_pos_y:
-            pos_move[1] = player_pos_y + max_movement - abs(player_pos_x - pos_move[0])
-        else:
-            pos_move[1] = player_pos_y - (max_movement - abs(player_pos_x - pos_move[0]))
-        return pos_move[0], pos_move[1]
-    else:
-        pos_move[0] = player_pos_x - (max_movement / 2)
-        pos_move[1] = player_pos_y - (max_movement / 2)
-        if pos_move[1] > player_pos_y:
-            pos_move[1] = player_pos_y + max_movement / 2
-
-        if pos_move[0] > player_pos_x:
-            pos_move[0] = player_pos_x + max_movement / 2
-        else:
-            pass
-        return pos_move[0], pos_move[1]
-
-
 def is_valid_harvest_pos(harvest_rad, max_movement, player_pos_x, player_pos_y, pos_move=[0, 0]):
-    if distance_to(player_pos_x, player_pos_y, pos_move) < max_movement + harvest_rad:
+    if distance_to(player_pos_x, player_pos_y, pos_move) <= max_movement + harvest_rad:
         return True
     else:
         return False
 
 
-def is_valid_plant_tiles(game_state: GameState, name: str):
+def update_legal_moves(game_state: GameState) -> LegalMoves:
+    """
+    Brings legal_moves up to date with the game state, rebuilding it if the
+    whole board may have changed
+    :param game_state: GameState containing information for the game
+    :return: LegalMoves for the game state
+    """
+    global legal_moves
+    if legal_moves is None or legal_moves.game_state is not game_state or game_state.dirty_tiles is None:
+        legal_moves = LegalMoves(game_state)
+    else:
+        legal_moves.update(game_state.dirty_tiles)
+    return legal_moves
+
+
+def follow_harvest_route(game_state: GameState, legal: LegalMoves):
     """
-    Returns all tiles for which player of input name can go to
+    Returns where to move along the harvest trip to the Green Grocer, planning a new trip if needed
     :param game_state: GameState containing information for the game
-    :param name: Name of player to get
-    :return: List of positions that the player can harvest
+    :param legal: LegalMoves for the game state
+    :return: (x, y) to move to
     """
-    my_player = game_util.get_player_from_name(game_state, name)
-    radius = my_player.plant_radius
-    res = []
+    global harvest_route
+    my_player = game_state.get_my_player()
+    if harvest_route is None or not harvest_route.holds(game_state, game_state.player_num):
+        harvest_route = harvest_planner.plan(game_state, game_state.player_num, max_detour=ROUTE_DETOUR,
+                                             legal=legal)
+        logger.debug("Moving towards green grocer along %s", harvest_route)
+    return harvest_route.next_move(game_state, my_player.position.x, my_player.position.y, my_player.max_movement)
+
+
+def free_fertile_tiles(game_state: GameState, legal: LegalMoves) -> int:
+    """
+    Returns how many free, plantable tiles are on rows the fertility band has yet to cover or leave
+    :param game_state: GameState containing information for the game
+    :param legal: LegalMoves for the same state
+    :return: Number of tiles
+    """
+    width = game_state.tile_map.map_width
+    free = legal.free
+    return sum(free[y * width:(y + 1) * width].count(1) for y in range(game_state.tile_map.map_height)
+               if schedule.first_fertile_turn(y, game_state.turn) is not None)
 
-    for i in range(my_player.position.y - radius, my_player.position.y + radius + 1):
-        for j in range(my_player.position.x - radius, my_player.position.x + radius + 1):
-            pos = Position(j, i)
-            if game_util.distance(my_player.position, pos) <= my_player.plant_radius and game_util.valid_position(pos):
-                res.append(pos)
-    return res
 
 """
 TOP SECRET CURRENT PLAN(t)
@@ -275,35 +213,44 @@ def get_move_decision(game: Game) -> MoveDecision:
     """
     # Get the game state from the game
     game_state: GameState = game.get_game_state()
-    logger.debug(f"[Turn {game_state.turn}] Feedback received from engine: {game_state.feedback}")
+    logger.debug("[Turn %d] Feedback received from engine: %s", game_state.turn, game_state.feedback)
     global turn_planted
+    crop_tracker.update(game_state, game_state.dirty_tiles)
+    legal = update_legal_moves(game_state)
 
     # Select your decision here!
     my_player: Player = game_state.get_my_player()
     pos: Position = my_player.position
-    logger.info(f"Currently at {my_player.position}")
+    logger.info("Currently at %s", my_player.position)
     turn = int(game_state.turn)
 
+    grocer = harvest_planner.grocer_field(game_state)
+
     # If we have something to sell that we harvested, then try to move towards the green grocer tiles
-    if turn < 23:
-        x, y = movement_clamp(my_player.max_movement, pos.x, pos.y, [15, 0])
+    if turn < FIRST_TRIP_TURN:
+        x, y = grocer.step_toward(pos.x, pos.y, my_player.max_movement)
         logger.debug("Moving towards green grocer")
     # If not, move to lower good band
-    elif turn > 150:
-        x, y = movement_clamp(my_player.max_movement, pos.x, pos.y, [15, 0])
-    elif turn_planted + 5 >= game_state.turn:
+    elif turn > LAST_TRIP_TURN:
+        x, y = follow_harvest_route(game_state, legal)
+    elif turn_planted + PLANT_WAIT >= game_state.turn:
         x, y = pos.x, pos.y
-    # Move toward green grocer if we have harvest, or no seeds
+    # Move toward green grocer if we have harvest, or no seeds, picking up ripe crops on the way
     elif (len(my_player.harvested_inventory)) > 0 or sum(my_player.seed_inventory.values()) == 0:
-        x, y = movement_clamp(my_player.max_movement, pos.x, pos.y, [15, 0])
-
-        logger.debug("Moving towards green grocer")
+        x, y = follow_harvest_route(game_state, legal)
 
     else:
-        x, y = movement_clamp(my_player.max_movement, pos.x, pos.y, [15, get_ideal_y(game_state)+1])
+        ideal_row.update([max(0, get_ideal_y(game_state) + 1)])
+        x, y = ideal_row.step_toward(pos.x, pos.y, my_player.max_movement)
     decision = MoveDecision(Position(x, y))
 
-    logger.debug(f"[Turn {game_state.turn}] Sending MoveDecision: {decision}")
+    # Work out the purchase while the engine moves us, so buying at the grocer is a lookup
+    if turn >= FIRST_TRIP_TURN - 1 and game_state.tile_map.get_tile(x, y).type == TileType.GREEN_GROCER:
+        money = my_player.money + sum(crop['value'] for crop in my_player.harvested_inventory)
+        seed_planner.prepare(turn, money, my_player.carring_capacity - sum(my_player.seed_inventory.values()),
+                             my_player.discount, my_player.max_movement, PLANT_WAIT)
+
+    logger.debug("[Turn %d] Sending MoveDecision: %s", game_state.turn, decision)
     return decision
 
 
@@ -321,46 +268,36 @@ def get_action_decision(game: Game) -> ActionDecision:
     :returns: ActionDecision A decision for the bot to make this turn
     """
     game_state: GameState = game.get_game_state()
-    logger.debug(f"[Turn {game_state.turn}] Feedback received from engine: {game_state.feedback}")
-    global turn_planted
+    logger.debug("[Turn %d] Feedback received from engine: %s", game_state.turn, game_state.feedback)
 
     # Select your decision here!
     my_player: Player = game_state.get_my_player()
     pos: Position = my_player.position
-    # Let the crop of focus be the one we have a seed for, if not just choose a random crop
-    crop = max(my_player.seed_inventory, key=my_player.seed_inventory.get) \
-        if sum(my_player.seed_inventory.values()) > 0 else random.choice(list(CropType))
 
+    # Dearest seeds first, so they get the most fertile of the tiles we plant
     crops_sorted = []
-    for i in my_player.seed_inventory.keys():
+    for i in sorted(my_player.seed_inventory.keys(), key=lambda crop: -crop.get_seed_price()):
         if my_player.seed_inventory[i] > 0:
             for j in range(my_player.seed_inventory[i]):
                 crops_sorted.append(i)
 
-    # Get a list of possible harvest locations for our harvest radius
-    plant_radius = my_player.plant_radius
-    possible_plant_locations = []
-    possible_harvest_locations = []
-    harvest_radius = my_player.harvest_radius
-    for harvest_pos in game_util.within_harvest_range(game_state, my_player.name):
-        if game_state.tile_map.get_tile(harvest_pos.x, harvest_pos.y).crop.value > 0:
-            possible_harvest_locations.append(harvest_pos)
-    for plant_pos in is_valid_plant_tiles(game_state, my_player.name):
-        possible_plant_locations.append(plant_pos)
-    logger.debug(f"Possible harvest locations={possible_harvest_locations}")
-    logger.debug(f"Possible plant locations={possible_plant_locations}")
-    if my_player.money >= CropType.DUCHAM_FRUIT.get_seed_price() and game_state.tile_map.get_tile(pos.x,pos.y).type == TileType.GREEN_GROCER\
-            and game_state.turn < 150:
-        if my_player.money >= CropType.GOLDEN_CORN.get_seed_price():
-            decision = BuyDecision([CropType.GOLDEN_CORN],
-                               [min(int(my_player.money /
-                                   CropType.GOLDEN_CORN.get_seed_price()), 5)])
-        elif sum(my_player.seed_inventory.values()) < 5:
-            decision = BuyDecision([CropType.DUCHAM_FRUIT],
-                               [min(int(my_player.money /
-                                   CropType.DUCHAM_FRUIT.get_seed_price()), 5)])
-        else:
-            decision = DoNothingDecision()
+    # Get the ripe, unprotected crops in our harvest radius and the free tiles in our plant radius
+    legal = LegalMoves(game_state)
+    possible_harvest_locations = legal.harvest_targets(game_state.player_num)
+    possible_plant_locations = legal.plant_targets(game_state.player_num)
+    logger.debug("Possible harvest locations=%s", possible_harvest_locations)
+    logger.debug("Possible plant locations=%s", possible_plant_locations)
+    # At the grocer, buy the seeds expected to make the most profit before the band or the game moves on
+    purchase = {}
+    if game_state.turn >= FIRST_TRIP_TURN - 1 and legal.at_grocer(game_state.player_num):
+        # We plant everything from one spot, so no more seeds than fit in our plant radius with the ones we hold
+        plantable = min(free_fertile_tiles(game_state, legal), len(diamond_offsets(my_player.plant_radius))) \
+            - sum(my_player.seed_inventory.values())
+        purchase = seed_planner.best_purchase(game_state.turn, my_player.money,
+                                              legal.free_capacity(game_state.player_num), plantable,
+                                              my_player.discount, my_player.max_movement, PLANT_WAIT)
+    if purchase:
+        decision = BuyDecision(list(purchase), list(purchase.values()))
     # If we can harvest something, try to harvest it
     elif len(possible_harvest_locations) > 0:
         decision = HarvestDecision(possible_harvest_locations)
@@ -369,38 +306,61 @@ def get_action_decision(game: Game) -> ActionDecision:
             game_state.tile_map.get_tile(pos.x, pos.y).type != TileType.GREEN_GROCER and \
             my_player.position.y == get_ideal_y(game_state)+1 and \
             len(possible_plant_locations) > 0 and len(crops_sorted) > 0:
-        logger.debug(f"Deciding to try to plant at position {pos}")
-        crops = [crop]
+        logger.debug("Deciding to try to plant at position %s", pos)
+        possible_plant_locations = sorted(possible_plant_locations,
+                                          key=lambda p: -schedule.fertility(game_state.turn + 1, p.y))
         decision = PlantDecision(crops_sorted[0:min(len(crops_sorted), len(possible_plant_locations))], possible_plant_locations[0:len(crops_sorted)])
-        turn_planted = game_state.turn
     # If we don't have that seed, but we have the money to buy it, then move towards the
     # green grocer to buy it
     else:
-        logger.debug(f"Couldn't find anything to do, waiting for move step")
+        logger.debug("Couldn't find anything to do, waiting for move step")
         decision = DoNothingDecision()
 
-    logger.debug(f"[Turn {game_state.turn}] Sending ActionDecision: {decision}")
+    logger.debug("[Turn %d] Sending ActionDecision: %s", game_state.turn, decision)
     return decision
 
 
+def record_action_decision(game: Game, decision: ActionDecision) -> None:
+    """
+    Updates our bookkeeping for the action decision sent this turn. get_action_decision
+    leaves this to its caller, so a decision worked out speculatively and then thrown
+    away changes nothing.
+
+    :param: game The object that contains the game state the decision was sent for
+    :param: decision The ActionDecision sent to the engine
+    """
+    game_state: GameState = game.get_game_state()
+    global turn_planted
+    crop_tracker.update(game_state, game_state.dirty_tiles)
+    update_legal_moves(game_state)
+    if isinstance(decision, PlantDecision):
+        turn_planted = game_state.turn
+        crop_tracker.record_plant(decision, game_state.turn)
+
+
 def main():
     """
     Competitor TODO: choose an item and upgrade for your bot
     """
-    game = Game(ItemType.COFFEE_THERMOS, UpgradeType.LONGER_LEGS)
+    game = Game(ItemType.COFFEE_THERMOS, UpgradeType.LONGER_LEGS, incremental=True,
+                timing_summary_path=TIMING_SUMMARY_PATH, speculate=get_action_decision if SPECULATE else None)
 
     while True:
         try:
             game.update_game()
         except IOError:
             exit(-1)
-        game.send_move_decision(get_move_decision(game))
+        game.send_move_decision(scheduler.get_move_decision(game, one_shot(get_move_decision, game)))
 
         try:
             game.update_game()
         except IOError:
             exit(-1)
-        game.send_action_decision(get_action_decision(game))
+        decision = game.speculated_action
+        if decision is None:
+            decision = scheduler.get_action_decision(game, one_shot(get_action_decision, game))
+        game.send_action_decision(decision)
+        record_action_decision(game, decision)
 
 
 if __name__ == "__main__":
@@ -1,32 +1,194 @@
 from model.game_state import GameState
+from model.tile_map import TileMap
 from networking import io
 from model.item_type import ItemType
 from model import upgrade_type
 from model.decisions.move_decision import MoveDecision
 from model.decisions.action_decision import ActionDecision
+from model.player import Player
+from model.position import Position
+from api.instrumentation import PhaseTimer
+from api.simulator import Simulator
+from api.tournament import SimulatedGame
+from api import game_util
+from typing import Callable, Dict, Optional
+
+import json
+import threading
+import time
 
 
 class Game:
 
-    def __init__(self, item: ItemType, upgrade: upgrade_type):
+    def __init__(self, item: ItemType, upgrade: upgrade_type, tile_map_class=TileMap, incremental: bool = False,
+                 timing_summary_path: str = None,
+                 speculate: Optional[Callable[[SimulatedGame], ActionDecision]] = None):
+        # TileMap builds Tile objects, LazyTileMap builds them on first use,
+        # ArrayTileMap keeps the board in flat arrays
+        self.tile_map_class = tile_map_class
+        # Incremental mode keeps one GameState and only mutates what changed between updates
+        self.incremental = incremental
+        self.game_state = None
+        # Every phase of every turn is timed, the summary is written when the engine hangs up
+        self.timer = PhaseTimer()
+        self.timing_summary_path = timing_summary_path
+        self.received_at = time.perf_counter()
+        self.built_at = self.received_at
+        # Speculative mode: while the engine resolves the move phase, speculate(game) works out the
+        # action for the predicted post-move state on a thread, and the result is kept in
+        # speculated_action if the real state matches the prediction. The result is thrown away on a
+        # miss, so speculate must leave the bot's own state alone
+        self.speculate = speculate
+        self.speculated_action: Optional[ActionDecision] = None
+        self._speculation = None
+        self._predictor = Simulator(seed=0)
         io.send_heartbeat()
         self.send_item(item)
         self.send_upgrade(upgrade)
 
     def update_game(self) -> None:
-        self.game_state = io.receive_gamestate()
+        start = time.perf_counter()
+        gamestate_str = io.readline()
+        self.received_at = time.perf_counter()
+        if not gamestate_str:
+            self.write_timing_summary()
+            raise IOError("Engine closed the connection")
+        gamestate_dict = json.loads(gamestate_str)
+        decoded_at = time.perf_counter()
+        if self.incremental and self.game_state is not None:
+            self.game_state.update(gamestate_dict)
+        else:
+            self.game_state = GameState(gamestate_dict, self.tile_map_class)
+        built_at = time.perf_counter()
+        self.finish_speculation()
+        self.built_at = time.perf_counter()
+
+        self.timer.record("stdin_wait", self.received_at - start)
+        self.timer.record("json_decode", decoded_at - self.received_at)
+        self.timer.record("model_build", built_at - decoded_at)
+        self.timer.record("speculation_wait", self.built_at - built_at)
+
+    def get_dirty_tiles(self):
+        """
+        Returns the (x, y) coordinates of the tiles changed by the last update,
+        or None if the whole board was rebuilt
+        """
+        return self.game_state.dirty_tiles
 
     def get_game_state(self) -> GameState:
         return self.game_state
 
     def send_move_decision(self, decision: MoveDecision) -> None:
-        io.send_string(decision.engine_str())
+        self.send_decision(decision)
+        if self.speculate is not None:
+            self.start_speculation(decision)
+
+    def start_speculation(self, decision: MoveDecision) -> None:
+        """
+        Predicts the state the engine will send for the action phase, assuming our
+        move goes through and the opponent stays put, and starts working out the
+        action for it on a thread. The engine already has our move, so this runs
+        while it resolves the move phase.
+        :param decision: Move decision just sent
+        """
+        predicted = self.game_state.clone()
+        opponent = predicted.get_opponent_player().position
+        stay = MoveDecision(Position(opponent.x, opponent.y))
+        if predicted.player_num == 1:
+            self._predictor.apply_moves(predicted, decision, stay)
+        else:
+            self._predictor.apply_moves(predicted, stay, decision)
+        # Moves don't touch the board, so the prediction is that no tile changes
+        predicted.dirty_tiles = set()
+
+        result = {}
+
+        def run():
+            try:
+                result['decision'] = self.speculate(SimulatedGame(predicted))
+            except Exception as e:
+                result['error'] = e
+
+        thread = threading.Thread(target=run, name="speculation", daemon=True)
+        thread.start()
+        self._speculation = (thread, predicted, result)
+
+    def finish_speculation(self) -> None:
+        """
+        Waits for a running speculation and keeps its action in speculated_action if the
+        state that just arrived matches the prediction, None otherwise. The wait ends in time
+        to still decide the usual way before the engine's player timeout.
+        """
+        self.speculated_action = None
+        if self._speculation is None:
+            return
+        thread, predicted, result = self._speculation
+        self._speculation = None
+        # Whatever the wait leaves of the engine's timeout has to cover deciding the usual way
+        spent = time.perf_counter() - self.received_at
+        thread.join(max(0.0, self.timer.timeout - spent - self.timer.percentile("decision", 0.95)
+                        - self.timer.percentile("serialize", 0.95)))
+        if thread.is_alive():
+            # The thread is left to finish on its own and its decision is never looked at
+            self.timer.record_speculation(False, self.game_state.turn, timed_out=True)
+            return
+        hit = 'decision' in result and self.prediction_holds(predicted, self.game_state)
+        self.timer.record_speculation(hit, self.game_state.turn)
+        if hit:
+            self.speculated_action = result['decision']
+
+    def prediction_holds(self, predicted: GameState, real: GameState) -> bool:
+        """
+        Returns whether a decision made for the predicted state is still right for the
+        real one: same turn, same board, our player exactly as predicted, and the
+        opponent either where we expected or too far away to matter. The opponent only
+        counts through its protection radius stopping our harvests; a strategy that
+        looks at the opponent any other way should override this.
+        :param predicted: State the speculative decision was made for
+        :param real: State the engine sent
+        :return: True if the speculative decision can be sent as is
+        """
+        if predicted.turn != real.turn or predicted.player_num != real.player_num:
+            return False
+        if real.dirty_tiles is not None:
+            if real.dirty_tiles:
+                return False
+        elif real.tile_map.raw_rows != predicted.tile_map.raw_rows:
+            return False
+        me = real.get_my_player()
+        if _player_fields(predicted.get_my_player()) != _player_fields(me):
+            return False
+
+        opponent = real.get_opponent_player()
+        expected = predicted.get_opponent_player()
+        if opponent.position == expected.position:
+            return True
+        radius = opponent.protection_radius + max(me.harvest_radius, me.plant_radius)
+        return game_util.distance(me.position, opponent.position) > radius \
+            and game_util.distance(me.position, expected.position) > radius
 
     def send_action_decision(self, decision: ActionDecision) -> None:
+        self.send_decision(decision)
+
+    def send_decision(self, decision) -> None:
+        # Everything between building the model and sending is the bot deciding
+        start = time.perf_counter()
         io.send_string(decision.engine_str())
+        end = time.perf_counter()
+        self.timer.record("decision", start - self.built_at)
+        self.timer.record("serialize", end - start)
+        self.timer.record_response(end - self.received_at, self.game_state.turn)
+
+    def write_timing_summary(self) -> None:
+        if self.timing_summary_path is not None:
+            self.timer.write_summary(self.timing_summary_path)
 
     def send_item(self, item: ItemType) -> None:
         io.send_string(item.engine_str())
 
     def send_upgrade(self, upgrade: upgrade_type) -> None:
         io.send_string(upgrade.engine_str())
+
+
+def _player_fields(player: Player) -> Dict:
+    return {name: getattr(player, name) for name in Player.__slots__}
@@ -0,0 +1,285 @@
+from array import array
+from typing import Dict, Iterable, List, Set, Tuple
+from model.tile_type import TileType
+from model.crop_type import CropType
+from model.item_type import ItemType
+
+# Integer codes stored in the arrays are the enum values
+TILE_CODES = {tile_type.name: tile_type.value for tile_type in TileType}
+CROP_CODES = {crop_type.name: crop_type.value for crop_type in CropType}
+ITEM_CODES = {item_type.name: item_type.value for item_type in ItemType}
+CROP_NAMES = {crop_type.value: crop_type.name for crop_type in CropType}
+# ArrayTileMap attributes holding one entry per tile
+ARRAY_FIELDS = ("tile_type", "crop_type", "growth_timer", "crop_value", "p1_item", "p2_item", "turns_left_to_grow",
+                "rain_totem_effect", "fertility_idol_effect", "scarecrow_effect")
+
+
+def and_masks(*masks: bytes) -> bytes:
+    """
+    Returns the tiles set in every one of the masks. Masks hold one 0/1 byte per
+    tile, so they can be combined as big integers in a single C-level operation.
+    """
+    res = int.from_bytes(masks[0], "little")
+    for mask in masks[1:]:
+        res &= int.from_bytes(mask, "little")
+    return res.to_bytes(len(masks[0]), "little")
+
+
+def or_masks(*masks: bytes) -> bytes:
+    """
+    Returns the tiles set in any of the masks
+    """
+    res = int.from_bytes(masks[0], "little")
+    for mask in masks[1:]:
+        res |= int.from_bytes(mask, "little")
+    return res.to_bytes(len(masks[0]), "little")
+
+
+def and_not_mask(mask: bytes, exclude: bytes) -> bytes:
+    """
+    Returns the tiles set in mask but not in exclude
+    """
+    res = int.from_bytes(mask, "little") & ~int.from_bytes(exclude, "little")
+    return res.to_bytes(len(mask), "little")
+
+
+def mask_indices(mask: bytes) -> List[int]:
+    """
+    Returns the indices set in a mask, in increasing order
+    """
+    res = []
+    find = mask.find
+    index = find(1)
+    while index >= 0:
+        res.append(index)
+        index = find(1, index + 1)
+    return res
+
+
+class CropView:
+    """
+    Read-only stand-in for a Crop backed by an ArrayTileMap cell
+    """
+    __slots__ = ("_tile_map", "_index")
+
+    def __init__(self, tile_map, index: int) -> None:
+        self._tile_map = tile_map
+        self._index = index
+
+    @property
+    def type(self) -> str:
+        return CROP_NAMES[self._tile_map.crop_type[self._index]]
+
+    @property
+    def growth_timer(self) -> int:
+        return self._tile_map.growth_timer[self._index]
+
+    @property
+    def value(self) -> float:
+        return self._tile_map.crop_value[self._index]
+
+
+class TileView:
+    """
+    Read-only stand-in for a Tile backed by an ArrayTileMap cell, so that code
+    written against TileMap.get_tile keeps working
+    """
+    __slots__ = ("_tile_map", "_index")
+
+    def __init__(self, tile_map, index: int) -> None:
+        self._tile_map = tile_map
+        self._index = index
+
+    @property
+    def type(self) -> TileType:
+        return TileType(self._tile_map.tile_type[self._index])
+
+    @property
+    def crop(self) -> CropView:
+        return CropView(self._tile_map, self._index)
+
+    @property
+    def p1_item(self) -> ItemType:
+        return ItemType(self._tile_map.p1_item[self._index])
+
+    @property
+    def p2_item(self) -> ItemType:
+        return ItemType(self._tile_map.p2_item[self._index])
+
+    @property
+    def turns_left_to_grow(self) -> int:
+        return self._tile_map.turns_left_to_grow[self._index]
+
+    @property
+    def rain_totem_effect(self) -> bool:
+        return bool(self._tile_map.rain_totem_effect[self._index])
+
+    @property
+    def fertility_idol_effect(self) -> bool:
+        return bool(self._tile_map.fertility_idol_effect[self._index])
+
+    @property
+    def scarecrow_effect(self) -> int:
+        return self._tile_map.scarecrow_effect[self._index]
+
+    def has_scarecrow_effect(self, player_id: int):
+        return self.scarecrow_effect >= 0 and self.scarecrow_effect + 1 != player_id
+
+
+class ArrayTileMap:
+    """
+    Structure-of-arrays tile map. Every tile field lives in its own flat array
+    indexed by y * map_width + x, so whole-board questions become a single pass
+    over one array instead of a walk over Tile objects.
+
+    Masks are bytearrays with one 0/1 entry per tile, laid out like the arrays.
+    """
+    __slots__ = ("map_height", "map_width", "raw_rows", "_owns_arrays") + ARRAY_FIELDS
+
+    def __init__(self, tilemap_dict) -> None:
+        self.map_height = tilemap_dict['mapHeight']
+        self.map_width = tilemap_dict['mapWidth']
+        self.tile_type = array('b')
+        self.crop_type = array('b')
+        self.growth_timer = array('i')
+        self.crop_value = array('d')
+        self.p1_item = array('b')
+        self.p2_item = array('b')
+        self.turns_left_to_grow = array('i')
+        self.rain_totem_effect = array('b')
+        self.fertility_idol_effect = array('b')
+        self.scarecrow_effect = array('b')
+        for row_list in tilemap_dict['tiles']:
+            self._append_row(row_list)
+        # Raw rows from the engine, kept to diff the next update against
+        self.raw_rows = tilemap_dict['tiles']
+        self._owns_arrays = True
+
+    def clone(self) -> "ArrayTileMap":
+        """
+        Returns a copy sharing every array and the engine's raw rows with this map
+        until one of them writes to it
+        """
+        res = ArrayTileMap.__new__(ArrayTileMap)
+        res.map_height = self.map_height
+        res.map_width = self.map_width
+        for name in ARRAY_FIELDS:
+            setattr(res, name, getattr(self, name))
+        res.raw_rows = self.raw_rows
+        res._owns_arrays = False
+        # The arrays are now shared both ways, so this map has to copy before writing too
+        self._owns_arrays = False
+        return res
+
+    def _own_arrays(self) -> None:
+        # Every write goes through _set_tile, which touches all the fields at once
+        if not self._owns_arrays:
+            for name in ARRAY_FIELDS:
+                setattr(self, name, getattr(self, name)[:])
+            self._owns_arrays = True
+
+    def _append_row(self, row_list: List[Dict]) -> None:
+        self.tile_type.extend([TILE_CODES[tile['type']] for tile in row_list])
+        self.crop_type.extend([CROP_CODES[tile['crop']['type']] for tile in row_list])
+        self.growth_timer.extend([tile['crop']['growthTimer'] for tile in row_list])
+        self.crop_value.extend([tile['crop']['value'] for tile in row_list])
+        self.p1_item.extend([ITEM_CODES[tile['p1_item']] for tile in row_list])
+        self.p2_item.extend([ITEM_CODES[tile['p2_item']] for tile in row_list])
+        self.turns_left_to_grow.extend([tile['turnsLeftToGrow'] for tile in row_list])
+        self.rain_totem_effect.extend([tile['rainTotemEffect'] for tile in row_list])
+        self.fertility_idol_effect.extend([tile['fertilityIdolEffect'] for tile in row_list])
+        self.scarecrow_effect.extend([tile['scarecrowEffect'] for tile in row_list])
+
+    def _set_tile(self, index: int, tile: Dict) -> None:
+        self.tile_type[index] = TILE_CODES[tile['type']]
+        self.crop_type[index] = CROP_CODES[tile['crop']['type']]
+        self.growth_timer[index] = tile['crop']['growthTimer']
+        self.crop_value[index] = tile['crop']['value']
+        self.p1_item[index] = ITEM_CODES[tile['p1_item']]
+        self.p2_item[index] = ITEM_CODES[tile['p2_item']]
+        self.turns_left_to_grow[index] = tile['turnsLeftToGrow']
+        self.rain_totem_effect[index] = tile['rainTotemEffect']
+        self.fertility_idol_effect[index] = tile['fertilityIdolEffect']
+        self.scarecrow_effect[index] = tile['scarecrowEffect']
+
+    def update(self, tilemap_dict) -> Set[Tuple[int, int]]:
+        """
+        Brings the arrays up to date with a newer tileMap from the engine,
+        rewriting only the cells that differ
+        :param tilemap_dict: tileMap from the engine
+        :return: Set of (x, y) coordinates of the tiles that changed
+        """
+        dirty = set()
+        for y, row_list in enumerate(tilemap_dict['tiles']):
+            old_row = self.raw_rows[y]
+            if row_list == old_row:
+                continue
+            for x, tile in enumerate(row_list):
+                if tile != old_row[x]:
+                    self._own_arrays()
+                    self._set_tile(y * self.map_width + x, tile)
+                    dirty.add((x, y))
+        self.raw_rows = tilemap_dict['tiles']
+        return dirty
+
+    def index(self, x: int, y: int) -> int:
+        return y * self.map_width + x
+
+    def coords(self, index: int) -> Tuple[int, int]:
+        return index % self.map_width, index // self.map_width
+
+    def get_tile(self, x: int, y: int) -> TileView:
+        return TileView(self, y * self.map_width + x)
+
+    def mask_tile_types(self, tile_types: Iterable[TileType]) -> bytearray:
+        """
+        Returns a mask of the tiles whose type is one of tile_types
+        """
+        codes = {tile_type.value for tile_type in tile_types}
+        return bytearray([code in codes for code in self.tile_type])
+
+    def mask_crop_types(self, crop_types: Iterable[CropType]) -> bytearray:
+        """
+        Returns a mask of the tiles holding a crop of one of crop_types
+        """
+        codes = {crop_type.value for crop_type in crop_types}
+        return bytearray([code in codes for code in self.crop_type])
+
+    def mask_planted(self) -> bytearray:
+        """
+        Returns a mask of the tiles holding any crop
+        """
+        none = CropType.NONE.value
+        return bytearray([code != none for code in self.crop_type])
+
+    def mask_ripe(self) -> bytearray:
+        """
+        Returns a mask of the tiles holding a crop that can be harvested
+        """
+        none = CropType.NONE.value
+        return bytearray([code != none and timer <= 0 for code, timer in zip(self.crop_type, self.growth_timer)])
+
+    def mask_and(self, mask1: bytearray, mask2: bytearray) -> bytearray:
+        return bytearray(and_masks(mask1, mask2))
+
+    def mask_or(self, mask1: bytearray, mask2: bytearray) -> bytearray:
+        return bytearray(or_masks(mask1, mask2))
+
+    def count(self, mask: bytearray) -> int:
+        return mask.count(1)
+
+    def total_value(self, mask: bytearray) -> float:
+        """
+        Returns the summed crop value over the tiles in mask
+        """
+        return sum([value for value, bit in zip(self.crop_value, mask) if bit])
+
+    def indices(self, mask: bytearray) -> List[int]:
+        return mask_indices(mask)
+
+    def positions(self, mask: bytearray) -> List[Tuple[int, int]]:
+        """
+        Returns the (x, y) coordinates of the tiles in mask
+        """
+        width = self.map_width
+        return [(i % width, i // width) for i in mask_indices(mask)]
@@ -1,5 +1,24 @@
+from model.crop_type import CropType
+
+
 class Crop:
+    __slots__ = ("type", "growth_timer", "value")
+
     def __init__(self, crop_dict) -> None:
         self.type = crop_dict['type']
         self.growth_timer = crop_dict['growthTimer']
-        self.value = crop_dict['value']
\ No newline at end of file
+        self.value = crop_dict['value']
+
+    @staticmethod
+    def from_dict(crop_dict) -> "Crop":
+        """
+        Returns a Crop for an engine crop dict, sharing NO_CROP for empty tiles.
+        Callers must replace a tile's crop rather than modify NO_CROP.
+        """
+        if crop_dict['type'] == CropType.NONE.name and crop_dict['growthTimer'] == 0 and crop_dict['value'] == 0:
+            return NO_CROP
+        return Crop(crop_dict)
+
+
+# Shared by every tile without a crop, which is most of the board
+NO_CROP = Crop({'type': CropType.NONE.name, 'growthTimer': 0, 'value': 0})
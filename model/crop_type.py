@@ -1,7 +1,5 @@
 from enum import Enum
-from pathlib import Path
-import os
-import configparser
+from api.config import config
 
 class CropType(Enum):
     NONE = 0
@@ -15,11 +13,8 @@ class CropType(Enum):
     GOLDEN_CORN = 8
 
     def __init__(self, *args, **kwargs):
-        with open(Path(os.path.dirname(os.path.dirname(__file__))) / "resources" / "mm27.properties") as f:
-            file_content = '[dummy_section]\n' + f.read()
-        config_parser = configparser.RawConfigParser()
-        config_parser.read_string(file_content)
-        self.config = config_parser['dummy_section']
+        # Typed values from the shared config, so lookups don't parse strings
+        self.stats = config.crops[self.name]
 
     def __str__(self):
         return f"{self.name}"
@@ -28,14 +23,14 @@ class CropType(Enum):
         return f"{self.name}"
 
     def get_seed_price(self) -> float:
-        return float(self.config[f"croptype.{self.name.lower()}.seedprice"])
+        return self.stats.seed_price
 
     def get_growth_time(self) -> int:
-        return int(self.config[f"croptype.{self.name.lower()}.growthtime"])
+        return self.stats.growth_time
 
     def get_fertility_sensitivity(self) -> float:
-        return float(self.config[f"croptype.{self.name.lower()}.fertilitysens"])
+        return self.stats.fertility_sensitivity
 
     def get_growth_value(self) -> float:
-        return float(self.config[f"croptype.{self.name.lower()}.growthvalue"])
+        return self.stats.growth_value
 
@@ -1,6 +1,8 @@
 from abc import ABCMeta, abstractmethod
 
 class ActionDecision(metaclass=ABCMeta):
+    __slots__ = ()
+
     def __init__(self) -> None:
         pass
     
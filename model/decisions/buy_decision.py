@@ -2,6 +2,7 @@ from model.decisions.action_decision import ActionDecision
 from model.decisions.move_decision import MoveDecision
 
 class BuyDecision(ActionDecision):
+    __slots__ = ("crop_types", "quantities")
 
     def __init__(self, crop_types: list, quantities: list) -> None:
         assert(len(crop_types) == len(quantities))
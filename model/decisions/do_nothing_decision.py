@@ -2,6 +2,7 @@ from model.decisions.action_decision import ActionDecision
 
 
 class DoNothingDecision(ActionDecision):
+    __slots__ = ()
 
     def __init__(self) -> None:
         pass
@@ -4,6 +4,8 @@ from typing import List
 
 
 class HarvestDecision(ActionDecision):
+    __slots__ = ("positions",)
+
     def __init__(self, positions: List[Position]) -> None:
         self.positions = positions
     
@@ -2,6 +2,8 @@ from model.position import Position
 
 
 class MoveDecision:
+    __slots__ = ("pos",)
+
     def __init__(self, pos: Position) -> None:
         self.pos = pos
 
@@ -2,6 +2,8 @@ from model.decisions.action_decision import ActionDecision
 
 
 class PlantDecision(ActionDecision):
+    __slots__ = ("crop_types", "coords")
+
     def __init__(self, crop_types: list, coords: list) -> None:
         self.crop_types = crop_types
         self.coords = coords
@@ -2,6 +2,8 @@ from model.decisions.action_decision import ActionDecision
 from model.position import Position
 
 class UseItemDecision(ActionDecision):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -1,16 +1,81 @@
 from model.player import Player
 from model.tile_map import TileMap
-from typing import Dict
+from typing import Dict, Set, Tuple
 
 
 class GameState:
-    def __init__(self, gamestate_dict: Dict) -> None:
+    __slots__ = ("turn", "player1", "player2", "tile_map", "player_num", "feedback", "dirty_tiles", "_raw_players",
+                 "_owned_players", "zobrist")
+
+    def __init__(self, gamestate_dict: Dict, tile_map_class=TileMap) -> None:
         self.turn = gamestate_dict['turn']
         self.player1 = Player(gamestate_dict['p1'])
         self.player2 = Player(gamestate_dict['p2'])
-        self.tile_map = TileMap(gamestate_dict['tileMap'])
+        self.tile_map = tile_map_class(gamestate_dict['tileMap'])
+        self.player_num = gamestate_dict['playerNum']
+        self.feedback = gamestate_dict['feedback']
+        # Coordinates of the tiles changed by the last update, every tile is new on construction
+        self.dirty_tiles = None
+        # Raw players from the engine, kept to diff the next update against
+        self._raw_players = (gamestate_dict['p1'], gamestate_dict['p2'])
+        # Indexed by player id, 1 if only this state holds that Player and may modify it in place
+        self._owned_players = bytearray(b"\x00\x01\x01")
+        # Search hash from api.zobrist, None until first asked for
+        self.zobrist = None
+
+    def clone(self) -> "GameState":
+        """
+        Returns a hypothetical copy of this state. The players and the tile rows are
+        shared copy-on-write: nothing is copied until one of the two states modifies
+        it through writable_player or the tile map's writable_tile/writable_row, and
+        then only that player or row. Players and tiles reached any other way are
+        read-only, and a Player reference taken before a write may belong to the other state.
+        :return: GameState
+        """
+        res = GameState.__new__(GameState)
+        res.turn = self.turn
+        res.player1 = self.player1
+        res.player2 = self.player2
+        res.tile_map = self.tile_map.clone()
+        res.player_num = self.player_num
+        res.feedback = list(self.feedback)
+        res.dirty_tiles = self.dirty_tiles
+        res._raw_players = self._raw_players
+        res._owned_players = bytearray(3)
+        res.zobrist = self.zobrist
+        self._owned_players = bytearray(3)
+        return res
+
+    def writable_player(self, player_id: int) -> Player:
+        """
+        Returns player 1 or 2 for modification, copying it first if it is shared with a clone
+        """
+        if not self._owned_players[player_id]:
+            if player_id == 1:
+                self.player1 = self.player1.clone()
+            else:
+                self.player2 = self.player2.clone()
+            self._owned_players[player_id] = 1
+        return self.player1 if player_id == 1 else self.player2
+
+    def update(self, gamestate_dict: Dict) -> Set[Tuple[int, int]]:
+        """
+        Brings this state up to date with a newer game state from the engine,
+        mutating only the players and tiles that changed instead of rebuilding
+        :param gamestate_dict: Game state from the engine
+        :return: Set of (x, y) coordinates of the tiles that changed
+        """
+        self.turn = gamestate_dict['turn']
         self.player_num = gamestate_dict['playerNum']
         self.feedback = gamestate_dict['feedback']
+        if gamestate_dict['p1'] != self._raw_players[0]:
+            self.writable_player(1).update(gamestate_dict['p1'])
+        if gamestate_dict['p2'] != self._raw_players[1]:
+            self.writable_player(2).update(gamestate_dict['p2'])
+        self._raw_players = (gamestate_dict['p1'], gamestate_dict['p2'])
+        self.zobrist = None
+        self.dirty_tiles = self.tile_map.update(gamestate_dict['tileMap'])
+        return self.dirty_tiles
 
     def get_my_player(self) -> Player:
         if self.player_num == 1:
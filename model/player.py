@@ -1,4 +1,4 @@
-from model.position import Position
+from model.position import position_at
 from model.crop_type import CropType
 from model.item_type import ItemType
 from model.upgrade_type import UpgradeType
@@ -6,11 +6,14 @@ from api.constants import Constants
 
 
 class Player:
+    __slots__ = ("name", "position", "upgrade", "item", "money", "seed_inventory", "harvested_inventory", "discount",
+                 "protection_radius", "harvest_radius", "plant_radius", "carring_capacity", "max_movement",
+                 "double_drop_chance", "used_item", "has_delivery_drone", "has_coffee_thermos", "item_time_expired")
     constants = Constants()
 
     def __init__(self, player_dict) -> None:
         self.name = player_dict['name']
-        self.position = Position(0, 0).from_dict(player_dict['position'])
+        self.position = position_at(player_dict['position']['x'], player_dict['position']['y'])
         self.upgrade = UpgradeType[player_dict['upgrade']]
         self.item = ItemType[player_dict['item']]
         self.money = player_dict['money']
@@ -29,3 +32,18 @@ class Player:
         self.has_delivery_drone = player_dict['hasDeliveryDrone']
         self.has_coffee_thermos = player_dict['hasCoffeeThermos']
         self.item_time_expired = player_dict['itemTimeExpired']
+
+    def update(self, player_dict) -> None:
+        # Mutate in place so references held by callers stay valid
+        self.__init__(player_dict)
+
+    def clone(self) -> "Player":
+        """
+        Returns an independent copy; the inventories are copied, the Position is shared
+        """
+        res = Player.__new__(Player)
+        for name in Player.__slots__:
+            setattr(res, name, getattr(self, name))
+        res.seed_inventory = dict(self.seed_inventory)
+        res.harvested_inventory = list(self.harvested_inventory)
+        return res
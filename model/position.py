@@ -2,10 +2,16 @@ from typing import Dict
 
 
 class Position:
-    def from_dict(self, pos_dict: Dict):
-        self.x = pos_dict['x']
-        self.y = pos_dict['y']
-        return self
+    """
+    A board coordinate. Positions compare and hash by their coordinates, so they
+    work as set members and dict keys; treat them as immutable, since the ones
+    from position_at are shared.
+    """
+    __slots__ = ("x", "y")
+
+    @staticmethod
+    def from_dict(pos_dict: Dict) -> "Position":
+        return position_at(pos_dict['x'], pos_dict['y'])
 
     def __init__(self, x, y) -> None:
         self.x = x
@@ -15,14 +21,47 @@ class Position:
         return x, y
 
     def __eq__(self, o: object) -> bool:
-        if object is None:
-            return False
-        if type(object) != type(self):
-            return False
-        return (self.x, self.y) == object.getpos()
+        if not isinstance(o, Position):
+            return NotImplemented
+        return self.x == o.x and self.y == o.y
+
+    def __hash__(self) -> int:
+        return hash((self.x, self.y))
 
     def __str__(self) -> str:
         return f"({self.x},{self.y})"
 
+    def __repr__(self) -> str:
+        return f"Position({self.x}, {self.y})"
+
     def engine_str(self) -> str:
         return f"{self.x} {self.y}"
+
+
+# One shared Position per board coordinate, indexed by y * width + x
+_pool_width = 0
+_pool_height = 0
+_pool = []
+
+
+def init_position_pool(width: int, height: int) -> None:
+    """
+    Builds the shared Positions for a board of the given size; api.config does
+    this for the configured board when it is loaded. Until then position_at
+    returns new Positions.
+    """
+    global _pool_width, _pool_height, _pool
+    _pool_width = width
+    _pool_height = height
+    _pool = [Position(x, y) for y in range(height) for x in range(width)]
+
+
+def position_at(x: int, y: int) -> Position:
+    """
+    Returns the shared Position for a board coordinate, or a new one off the board.
+    The result must not be modified.
+    """
+    if 0 <= x < _pool_width and 0 <= y < _pool_height:
+        return _pool[y * _pool_width + x]
+    return Position(x, y)
+
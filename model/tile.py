@@ -1,13 +1,16 @@
 from model.item_type import ItemType
 from model.player import Player
 from model.tile_type import TileType
-from model.crop import Crop
+from model.crop import Crop, NO_CROP
 
 
 class Tile:
+    __slots__ = ("type", "crop", "p1_item", "p2_item", "turns_left_to_grow", "rain_totem_effect",
+                 "fertility_idol_effect", "scarecrow_effect")
+
     def __init__(self, tile_dict) -> None:
         self.type = TileType[tile_dict['type']]
-        self.crop = Crop(tile_dict['crop'])
+        self.crop = Crop.from_dict(tile_dict['crop'])
         self.p1_item = ItemType[tile_dict['p1_item']]
         self.p2_item = ItemType[tile_dict['p2_item']]
         self.turns_left_to_grow = tile_dict['turnsLeftToGrow']
@@ -15,5 +18,30 @@ class Tile:
         self.fertility_idol_effect = tile_dict['fertilityIdolEffect']
         self.scarecrow_effect = tile_dict['scarecrowEffect']
 
+    def update(self, tile_dict) -> None:
+        # Mutate in place so references held by callers stay valid
+        self.__init__(tile_dict)
+
+    def clone(self) -> "Tile":
+        """
+        Returns an independent copy; the crop is copied too unless it is the shared NO_CROP
+        """
+        res = Tile.__new__(Tile)
+        res.type = self.type
+        crop = self.crop
+        if crop is not NO_CROP:
+            crop = Crop.__new__(Crop)
+            crop.type = self.crop.type
+            crop.growth_timer = self.crop.growth_timer
+            crop.value = self.crop.value
+        res.crop = crop
+        res.p1_item = self.p1_item
+        res.p2_item = self.p2_item
+        res.turns_left_to_grow = self.turns_left_to_grow
+        res.rain_totem_effect = self.rain_totem_effect
+        res.fertility_idol_effect = self.fertility_idol_effect
+        res.scarecrow_effect = self.scarecrow_effect
+        return res
+
     def has_scarecrow_effect(self, player_id: int):
         return self.scarecrow_effect >= 0 and self.scarecrow_effect + 1 != player_id
@@ -1,6 +1,17 @@
+from typing import Set, Tuple
 from model.tile import Tile
 
 class TileMap:
+    """
+    Grid of Tiles, tiles[y][x].
+
+    Maps can be cloned copy-on-write: a clone shares every row and tile with the
+    map it came from, and whichever of them changes a tile first gets its own copy
+    of that tile and of the row list holding it. Code that modifies tiles must
+    therefore get them through writable_tile or writable_row; get_tile is for reading.
+    """
+    __slots__ = ("map_height", "map_width", "tiles", "raw_rows", "_owned_rows", "_owned_tiles")
+
     def __init__(self, tilemap_dict) -> None:
         self.map_height = tilemap_dict['mapHeight']
         self.map_width = tilemap_dict['mapWidth']
@@ -10,6 +21,160 @@ class TileMap:
             for tile in row_list:
                 tile_row.append(Tile(tile))
             self.tiles.append(tile_row)
+        # Raw rows from the engine, kept to diff the next update against
+        self.raw_rows = tilemap_dict['tiles']
+        # 1 for the row lists and tiles (index y * map_width + x) only this map holds,
+        # which can be modified in place
+        self._owned_rows = bytearray(b"\x01" * self.map_height)
+        self._owned_tiles = bytearray(b"\x01" * (self.map_height * self.map_width))
+
+    def clone(self) -> "TileMap":
+        """
+        Returns a copy sharing every row with this map until one of them writes to it
+        """
+        res = TileMap.__new__(TileMap)
+        res.map_height = self.map_height
+        res.map_width = self.map_width
+        res.tiles = list(self.tiles)
+        res.raw_rows = self.raw_rows
+        res._owned_rows = bytearray(self.map_height)
+        res._owned_tiles = bytearray(len(self._owned_tiles))
+        # Everything is now shared both ways, so this map has to copy before writing too
+        self._owned_rows = bytearray(self.map_height)
+        self._owned_tiles = bytearray(len(self._owned_tiles))
+        return res
+
+    def _own_row(self, y: int) -> list:
+        if not self._owned_rows[y]:
+            self.tiles[y] = list(self.tiles[y])
+            self._owned_rows[y] = 1
+        return self.tiles[y]
+
+    def writable_tile(self, x: int, y: int) -> Tile:
+        """
+        Returns the tile at (x, y) for modification, copying it first if it is shared with a clone
+        """
+        index = y * self.map_width + x
+        if self._owned_tiles[index]:
+            return self.tiles[y][x]
+        row = self._own_row(y)
+        tile = row[x] = row[x].clone()
+        self._owned_tiles[index] = 1
+        return tile
+
+    def writable_row(self, y: int) -> list:
+        """
+        Returns row y with every tile writable, copying the ones shared with a clone
+        """
+        start = y * self.map_width
+        owned = self._owned_tiles
+        if owned[start:start + self.map_width].count(0):
+            row = self._own_row(y)
+            for x in range(self.map_width):
+                if not owned[start + x]:
+                    row[x] = row[x].clone()
+            owned[start:start + self.map_width] = b"\x01" * self.map_width
+        return self.tiles[y]
+
+    def update(self, tilemap_dict) -> Set[Tuple[int, int]]:
+        """
+        Brings the map up to date with a newer tileMap from the engine, mutating
+        only the tiles that differ
+        :param tilemap_dict: tileMap from the engine
+        :return: Set of (x, y) coordinates of the tiles that changed
+        """
+        dirty = set()
+        for y, row_list in enumerate(tilemap_dict['tiles']):
+            old_row = self.raw_rows[y]
+            # Rows compare as plain lists of dicts, so unchanged rows cost no Python work per tile
+            if row_list == old_row:
+                continue
+            for x, tile in enumerate(row_list):
+                if tile != old_row[x]:
+                    self.writable_tile(x, y).update(tile)
+                    dirty.add((x, y))
+        self.raw_rows = tilemap_dict['tiles']
+        return dirty
         
     def get_tile(self, x: int, y: int) -> Tile:
-        return self.tiles[y][x]
\ No newline at end of file
+        return self.tiles[y][x]
+
+class LazyTileMap(TileMap):
+    """
+    TileMap that keeps the engine's raw rows and only builds a Tile the first
+    time get_tile touches its coordinate. Bots that look at a small part of the
+    board each turn skip building the rest of it.
+
+    Clones share the raw rows and the tiles built so far copy-on-write, like TileMap.
+    """
+    __slots__ = ("cache",)
+
+    def __init__(self, tilemap_dict) -> None:
+        self.map_height = tilemap_dict['mapHeight']
+        self.map_width = tilemap_dict['mapWidth']
+        self.raw_rows = tilemap_dict['tiles']
+        # Tiles built so far this turn, indexed by y * map_width + x
+        self.cache = [None] * (self.map_height * self.map_width)
+        # 1 for the built tiles only this map holds; tiles not built yet will be this map's own
+        self._owned_tiles = bytearray(b"\x01" * (self.map_height * self.map_width))
+
+    def clone(self) -> "LazyTileMap":
+        """
+        Returns a copy sharing the raw rows and every tile built so far with this map
+        until one of them writes to it
+        """
+        res = LazyTileMap.__new__(LazyTileMap)
+        res.map_height = self.map_height
+        res.map_width = self.map_width
+        res.raw_rows = self.raw_rows
+        res.cache = list(self.cache)
+        res._owned_tiles = bytearray(len(self._owned_tiles))
+        self._owned_tiles = bytearray(len(self._owned_tiles))
+        return res
+
+    def writable_tile(self, x: int, y: int) -> Tile:
+        index = y * self.map_width + x
+        tile = self.cache[index]
+        if tile is None:
+            tile = self.cache[index] = Tile(self.raw_rows[y][x])
+        elif not self._owned_tiles[index]:
+            tile = self.cache[index] = tile.clone()
+        self._owned_tiles[index] = 1
+        return tile
+
+    def writable_row(self, y: int) -> list:
+        return [self.writable_tile(x, y) for x in range(self.map_width)]
+
+    @property
+    def tiles(self):
+        # Callers walking the whole board get every tile built
+        return [[self.get_tile(x, y) for x in range(self.map_width)] for y in range(self.map_height)]
+
+    def get_tile(self, x: int, y: int) -> Tile:
+        index = y * self.map_width + x
+        tile = self.cache[index]
+        if tile is None:
+            tile = self.cache[index] = Tile(self.raw_rows[y][x])
+        return tile
+
+    def update(self, tilemap_dict) -> Set[Tuple[int, int]]:
+        dirty = set()
+        for y, row_list in enumerate(tilemap_dict['tiles']):
+            old_row = self.raw_rows[y]
+            if row_list == old_row:
+                continue
+            for x, tile in enumerate(row_list):
+                if tile != old_row[x]:
+                    # Tiles that were never built, or are shared with a clone, will be built
+                    # from the new row when asked for
+                    index = y * self.map_width + x
+                    cached = self.cache[index]
+                    if cached is not None:
+                        if self._owned_tiles[index]:
+                            cached.update(tile)
+                        else:
+                            self.cache[index] = None
+                            self._owned_tiles[index] = 1
+                    dirty.add((x, y))
+        self.raw_rows = tilemap_dict['tiles']
+        return dirty
@@ -1,4 +1,5 @@
 from enum import Enum
+from api.config import config
 
 class TileType(Enum):
     GREEN_GROCER = 1
@@ -9,8 +10,11 @@ class TileType(Enum):
     F_BAND_MID = 6
     F_BAND_INNER = 7
 
+    def __init__(self, *args, **kwargs):
+        self.fertility = config.tile_fertility[self.name]
+
     def __str__(self) -> str:
         return f"{self.name}"
 
     def get_fertility(self) -> float:
-        return float(self.config[f"tiletype.{self.name.lower()}.fertility"])
+        return self.fertility
@@ -1,14 +1,24 @@
 from model.game_state import GameState
+from model.tile_map import TileMap
+from collections import deque
+from typing import Optional
+import atexit
+import os
 import sys
 import json
+import threading
+import time
 
 
-def receive_gamestate():
-    gamestate_bytes = sys.stdin.readline()
-    gamestate_dict = json.loads(gamestate_bytes)
-    a = GameState(gamestate_dict)
+def receive_gamestate(tile_map_class=TileMap):
+    gamestate_dict = receive_gamestate_dict()
+    a = GameState(gamestate_dict, tile_map_class)
     return a
 
+def receive_gamestate_dict():
+    gamestate_bytes = sys.stdin.readline()
+    return json.loads(gamestate_bytes)
+
 def readline() -> str:
     return sys.stdin.readline()
 
@@ -19,12 +29,180 @@ def send_heartbeat():
     print("heartbeat")
 
 
+# Log levels, lowest first; a message is written if its level is at least the configured one
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARNING: "warning", ERROR: "error"}
+LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR, "OFF": OFF}
+
+
+class LogSink:
+    """
+    Writes log records off the decision path. Loggers format each record on the
+    calling thread as it is emitted, so arguments logged may change afterwards,
+    and append it to a bounded ring buffer; a background thread drains the buffer
+    to stderr and, optionally, a JSON-lines file, so only the I/O happens off the
+    caller's thread. If the buffer fills up faster than it drains the oldest
+    records are dropped and counted rather than blocking the bot.
+
+    Two locks: _buffer_lock guards the buffer and the dropped count and is only
+    held for a few operations, so emitting never waits for a write; _lock
+    serialises flushes and the start of the writer thread.
+    """
+
+    def __init__(self, capacity: int = 10000) -> None:
+        self.records = deque(maxlen=capacity)
+        self.capacity = capacity
+        self.dropped = 0
+        self.stderr = True
+        self.json_file = None
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._buffer_lock = threading.Lock()
+        self._thread = None
+
+    def emit(self, level: int, name: Optional[str], message: str, args: tuple) -> None:
+        if args:
+            try:
+                message = message % args
+            except (TypeError, ValueError):
+                message = f"{message} {args!r}"
+        else:
+            message = str(message)
+        line = f"{LEVEL_NAMES[level]}: {message}\n" if self.stderr else None
+        json_line = None
+        if self.json_file is not None:
+            json_line = json.dumps({'time': time.time(), 'level': LEVEL_NAMES[level], 'logger': name,
+                                    'message': message}) + "\n"
+        with self._buffer_lock:
+            if len(self.records) == self.capacity:
+                self.dropped += 1
+            self.records.append((line, json_line))
+        if self._thread is None:
+            with self._lock:
+                # Two threads logging the first record at once must not both start a writer
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                    self._thread.start()
+        self._wakeup.set()
+
+    def after_fork(self) -> None:
+        # A forked child inherits the buffer but not the writer thread, and possibly a held lock
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._buffer_lock = threading.Lock()
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes out every buffered record; safe to call from any thread
+        """
+        with self._lock:
+            with self._buffer_lock:
+                if not self.records:
+                    return
+                records = list(self.records)
+                self.records.clear()
+                dropped = self.dropped
+                self.dropped = 0
+            lines = [line for line, _ in records if line is not None]
+            json_lines = [json_line for _, json_line in records if json_line is not None]
+            if dropped:
+                lines.append(f"warning: {dropped} log records dropped, the buffer was full\n")
+            try:
+                if lines:
+                    sys.stderr.write("".join(lines))
+                    sys.stderr.flush()
+                if json_lines and self.json_file is not None:
+                    self.json_file.write("".join(json_lines))
+                    self.json_file.flush()
+            except (OSError, ValueError):
+                # Nowhere left to report to, e.g. stderr closed during shutdown
+                pass
+
+
+_sink = LogSink()
+_level = LEVELS[os.environ.get("MM27_LOG_LEVEL", "DEBUG").upper()]
+
+
+def configure_logging(level: Optional[int] = None, json_path: Optional[str] = None,
+                      stderr: Optional[bool] = None) -> None:
+    """
+    Changes logging for every Logger in the process
+    :param level: Lowest level written, e.g. INFO; OFF disables logging
+    :param json_path: File to also write records to as JSON lines
+    :param stderr: Whether to write records to stderr
+    """
+    global _level
+    if level is not None:
+        _level = level
+    if stderr is not None:
+        _sink.stderr = stderr
+    if json_path is not None:
+        _sink.flush()
+        if _sink.json_file is not None:
+            _sink.json_file.close()
+        _sink.json_file = open(json_path, "a")
+
+
+def flush_logs() -> None:
+    _sink.flush()
+
+
+def _flush_on_crash(exc_type, exc, traceback) -> None:
+    _sink.flush()
+    _previous_excepthook(exc_type, exc, traceback)
+
+
+# Whatever is still buffered gets written when the bot exits or dies with an exception
+_previous_excepthook = sys.excepthook
+sys.excepthook = _flush_on_crash
+atexit.register(flush_logs)
+os.register_at_fork(after_in_child=_sink.after_fork)
+if os.environ.get("MM27_LOG_JSON"):
+    configure_logging(json_path=os.environ["MM27_LOG_JSON"])
+
+
 class Logger:
-    def __init__(self) -> None:
-        pass
+    """
+    Leveled logger. Messages take %-style arguments, which are only formatted if
+    the level is enabled:
+
+        logger.debug("Possible plant locations=%s", locations)
+
+    A disabled call costs a comparison. Call enabled() first to skip building
+    expensive arguments altogether.
+    """
+
+    def __init__(self, name: Optional[str] = None) -> None:
+        self.name = name
+
+    @staticmethod
+    def enabled(level: int) -> bool:
+        return level >= _level
+
+    def debug(self, message, *args) -> None:
+        if DEBUG >= _level:
+            _sink.emit(DEBUG, self.name, message, args)
+
+    def info(self, message, *args) -> None:
+        if INFO >= _level:
+            _sink.emit(INFO, self.name, message, args)
 
-    def info(self, message) -> None:
-        print(f"info: {str(message)}", file=sys.stderr, flush=True)
+    def warning(self, message, *args) -> None:
+        if WARNING >= _level:
+            _sink.emit(WARNING, self.name, message, args)
 
-    def debug(self, message: str) -> None:
-        print(f"debug: {str(message)}", file=sys.stderr, flush=True)
+    def error(self, message, *args) -> None:
+        if ERROR >= _level:
+            _sink.emit(ERROR, self.name, message, args)
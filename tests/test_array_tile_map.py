@@ -0,0 +1,40 @@
+from model.array_tile_map import ArrayTileMap, ARRAY_FIELDS
+from model.crop_type import CropType
+from benchmarks.fixtures import midgame_gamestate_dict
+
+import copy
+
+
+def planted_copy(tilemap_dict, x, y):
+    """
+    Returns the engine tileMap with a fresh corn crop on (x, y)
+    """
+    res = copy.deepcopy(tilemap_dict)
+    res['tiles'][y][x]['crop'] = {'type': CropType.CORN.name, 'growthTimer': 3, 'value': 1.5}
+    return res
+
+
+def test_clone_shares_arrays_until_written():
+    tilemap_dict = midgame_gamestate_dict()['tileMap']
+    original = ArrayTileMap(tilemap_dict)
+    clone = original.clone()
+    assert all(getattr(clone, name) is getattr(original, name) for name in ARRAY_FIELDS)
+
+    # An update with nothing new keeps sharing
+    assert clone.update(copy.deepcopy(tilemap_dict)) == set()
+    assert all(getattr(clone, name) is getattr(original, name) for name in ARRAY_FIELDS)
+
+    before = original.get_tile(3, 20).crop.type
+    assert clone.update(planted_copy(tilemap_dict, 3, 20)) == {(3, 20)}
+    assert clone.get_tile(3, 20).crop.type == CropType.CORN.name
+    assert original.get_tile(3, 20).crop.type == before
+
+
+def test_original_writes_do_not_leak_into_clone():
+    tilemap_dict = midgame_gamestate_dict()['tileMap']
+    original = ArrayTileMap(tilemap_dict)
+    clone = original.clone()
+    before = clone.get_tile(7, 30).crop.type
+    original.update(planted_copy(tilemap_dict, 7, 30))
+    assert original.get_tile(7, 30).crop.type == CropType.CORN.name
+    assert clone.get_tile(7, 30).crop.type == before
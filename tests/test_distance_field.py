@@ -0,0 +1,17 @@
+from api.distance_field import DistanceField, UNREACHABLE
+
+
+def test_field_without_targets_is_built_unreachable():
+    field = DistanceField([])
+    assert field.distance_at(3, 4) == UNREACHABLE
+    assert field.nearest_target(3, 4) is None
+
+
+def test_update_rebuilds_only_for_new_targets():
+    field = DistanceField([(0, 0)])
+    distance = field.distance
+    field.update([(0, 0)])
+    assert field.distance is distance
+    field.update([(5, 5)])
+    assert field.distance_at(5, 7) == 2
+    assert field.nearest_target(0, 0) == (5, 5)
@@ -0,0 +1,50 @@
+from model.game_state import GameState
+from model.crop_type import CropType
+from model.array_tile_map import ArrayTileMap
+from model.decisions.move_decision import MoveDecision
+from model.decisions.do_nothing_decision import DoNothingDecision
+from api.forecast import CropForecast
+from api.simulator import Simulator
+from benchmarks.fixtures import midgame_gamestate_dict
+
+import random
+
+import pytest
+
+
+def gamestate_with_effects(seed):
+    gamestate = midgame_gamestate_dict(seed=seed)
+    rng = random.Random(seed)
+    for row in gamestate['tileMap']['tiles']:
+        for tile in row:
+            tile['rainTotemEffect'] = rng.random() < 0.2
+            tile['fertilityIdolEffect'] = rng.random() < 0.2
+    return gamestate
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_forecast_matches_simulated_turns(seed):
+    horizon = 12
+    state = GameState(gamestate_with_effects(seed))
+    forecast = CropForecast(state, horizon)
+    simulator = Simulator(seed)
+    stay = (MoveDecision(state.player1.position), DoNothingDecision(), MoveDecision(state.player2.position),
+            DoNothingDecision())
+    for k in range(horizon + 1):
+        tile_map = state.tile_map
+        for y in range(tile_map.map_height):
+            for x in range(tile_map.map_width):
+                crop = tile_map.get_tile(x, y).crop
+                expected = crop.value if crop.type != CropType.NONE.name else 0
+                assert forecast.value_at(x, y, k) == pytest.approx(expected), (x, y, k)
+                if crop.type != CropType.NONE.name and crop.growth_timer <= 0:
+                    assert forecast.ripe_in(x, y) <= k
+        state = simulator.step(state, *stay)
+
+
+def test_forecast_reads_array_tile_maps_the_same():
+    gamestate = gamestate_with_effects(0)
+    objects = CropForecast(GameState(gamestate), 20)
+    arrays = CropForecast(GameState(gamestate, ArrayTileMap), 20)
+    assert [list(values) for values in objects.values] == [list(values) for values in arrays.values]
+    assert list(objects.ripe_turn) == list(arrays.ripe_turn)
@@ -0,0 +1,38 @@
+from networking.io import LogSink, DEBUG
+
+import io
+import sys
+import threading
+
+
+def test_every_record_is_written_or_counted_as_dropped(monkeypatch):
+    sink = LogSink(capacity=100)
+    stderr = io.StringIO()
+    monkeypatch.setattr(sys, "stderr", stderr)
+
+    def log():
+        for i in range(5000):
+            sink.emit(DEBUG, None, "record %d", (i,))
+
+    threads = [threading.Thread(target=log) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    sink.flush()
+
+    lines = stderr.getvalue().splitlines()
+    written = sum(line.startswith("debug:") for line in lines)
+    dropped = sum(int(line.split()[1]) for line in lines if line.startswith("warning:"))
+    assert written + dropped == 4 * 5000
+
+
+def test_records_are_formatted_when_emitted(monkeypatch):
+    sink = LogSink()
+    stderr = io.StringIO()
+    monkeypatch.setattr(sys, "stderr", stderr)
+    locations = [1, 2]
+    sink.emit(DEBUG, None, "locations=%s", (locations,))
+    locations.append(3)
+    sink.flush()
+    assert "debug: locations=[1, 2]\n" in stderr.getvalue()
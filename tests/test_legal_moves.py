@@ -0,0 +1,67 @@
+from model.game_state import GameState
+from model.position import Position
+from model.crop import Crop
+from model.crop_type import CropType
+from model.array_tile_map import ArrayTileMap
+from api.legal_moves import LegalMoves
+from api.simulator import UNPLANTABLE_TILES
+from api import game_util
+from benchmarks.fixtures import midgame_gamestate_dict
+
+import pytest
+
+
+def old_plant_tiles(game_state, player):
+    """
+    The tiles bot.is_valid_plant_tiles used to scan: every valid position in the
+    plant radius. It left checking the tiles themselves to the caller.
+    """
+    radius = player.plant_radius
+    res = []
+    for i in range(player.position.y - radius, player.position.y + radius + 1):
+        for j in range(player.position.x - radius, player.position.x + radius + 1):
+            pos = Position(j, i)
+            if game_util.distance(player.position, pos) <= radius and game_util.valid_position(pos):
+                res.append(pos)
+    return res
+
+
+def expected_plant_targets(game_state, player):
+    none = CropType.NONE.name
+    return {(pos.x, pos.y) for pos in old_plant_tiles(game_state, player)
+            if game_state.tile_map.get_tile(pos.x, pos.y).type not in UNPLANTABLE_TILES
+            and game_state.tile_map.get_tile(pos.x, pos.y).crop.type == none}
+
+
+def states(radius):
+    for seed in range(4):
+        gamestate = midgame_gamestate_dict(seed=seed)
+        gamestate['p1']['plantRadius'] = radius
+        gamestate['p1']['position'] = {'x': seed * 9 % 30, 'y': 5 + seed * 13}
+        for tile_map_class in (None, ArrayTileMap):
+            yield GameState(gamestate) if tile_map_class is None else GameState(gamestate, ArrayTileMap)
+
+
+# Radius 1 checks its tiles directly, radius 6 reaches past DIRECT_LOOKUP_TILES and uses the masks
+@pytest.mark.parametrize("radius", [1, 2, 6])
+@pytest.mark.parametrize("masks_first", [False, True])
+def test_plant_targets_match_the_old_plant_tiles(radius, masks_first):
+    for state in states(radius):
+        legal = LegalMoves(state)
+        if masks_first:
+            legal.free
+        got = [(pos.x, pos.y) for pos in legal.plant_targets(1)]
+        assert len(got) == len(set(got))
+        assert set(got) == expected_plant_targets(state, state.player1)
+
+
+def test_plant_targets_follow_update():
+    state = next(states(2))
+    legal = LegalMoves(state)
+    legal.free
+    x, y = next((p.x, p.y) for p in legal.plant_targets(1))
+    tile = state.tile_map.writable_tile(x, y)
+    tile.crop = Crop({'type': CropType.CORN.name, 'growthTimer': 2, 'value': 0})
+    legal.update([(x, y)])
+    assert (x, y) not in {(p.x, p.y) for p in legal.plant_targets(1)}
+    assert {(p.x, p.y) for p in legal.plant_targets(1)} == expected_plant_targets(state, state.player1)
@@ -0,0 +1,24 @@
+from api import loadout_sweep
+
+import importlib
+import os
+
+
+def test_strategy_sources_follow_repository_imports():
+    sources = {os.path.relpath(path, loadout_sweep.REPO_ROOT) for path in loadout_sweep.strategy_sources("bot")}
+    assert {"bot.py", "game.py", "api/seed_planner.py", "model/position.py", "networking/io.py"} <= sources
+    assert all(not path.startswith("..") for path in sources)
+
+
+def test_strategy_version_changes_with_an_imported_module(tmp_path, monkeypatch):
+    (tmp_path / "sweep_helpers").mkdir()
+    (tmp_path / "sweep_helpers" / "__init__.py").write_text("")
+    (tmp_path / "sweep_helpers" / "tuning.py").write_text("AGGRESSION = 1\n")
+    (tmp_path / "sweep_strategy.py").write_text("import json\nfrom sweep_helpers import tuning\n")
+    monkeypatch.setattr(loadout_sweep, "REPO_ROOT", str(tmp_path))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    importlib.invalidate_caches()
+
+    before = loadout_sweep.strategy_version("sweep_strategy")
+    (tmp_path / "sweep_helpers" / "tuning.py").write_text("AGGRESSION = 2\n")
+    assert loadout_sweep.strategy_version("sweep_strategy") != before
@@ -0,0 +1,62 @@
+from model.game_state import GameState
+from model.item_type import ItemType
+from model.upgrade_type import UpgradeType
+from model.tile_type import TileType
+from model.crop_type import CropType
+from api.simulator import Simulator, new_tile_dict
+from api.fertility_schedule import schedule
+from api.mcts import GreedyRolloutPolicy, RandomRolloutPolicy, PLANT, _apply_macro, _rollout
+from benchmarks.fixtures import midgame_gamestate_dict
+
+import pytest
+
+
+class GreedyAgainstRandom:
+    """
+    Greedy rollout policy for player 1 against uniformly random play for player 2
+    """
+
+    def __init__(self) -> None:
+        self.greedy = GreedyRolloutPolicy()
+        self.random = RandomRolloutPolicy()
+
+    def _policy(self, player_id: int):
+        return self.greedy if player_id == 1 else self.random
+
+    def reset(self) -> None:
+        self.greedy.reset()
+        self.random.reset()
+
+    def move(self, simulator, game_state, player_id):
+        return self._policy(player_id).move(simulator, game_state, player_id)
+
+    def action(self, simulator, game_state, player_id):
+        return self._policy(player_id).action(simulator, game_state, player_id)
+
+    def record_action(self, player_id, decision):
+        self._policy(player_id).record_action(player_id, decision)
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_greedy_rollout_from_turn_one_keeps_its_money(seed):
+    simulator = Simulator(seed)
+    state = simulator.new_game(ItemType.NONE, UpgradeType.NONE, ItemType.NONE, UpgradeType.NONE)
+    start = state.player1.money
+    _rollout(simulator, state, 1, GreedyAgainstRandom(), None)
+    assert state.player1.money >= start
+
+
+def test_apply_macro_records_our_plants():
+    gamestate = midgame_gamestate_dict()
+    row = schedule.rows_of_type(gamestate['turn'], TileType.F_BAND_INNER)[0]
+    for tile_row in gamestate['tileMap']['tiles']:
+        for x, tile in enumerate(tile_row):
+            tile_row[x] = new_tile_dict(TileType[tile['type']])
+    gamestate['p1']['position'] = {'x': 10, 'y': row}
+    state = GameState(gamestate)
+    policy = GreedyRolloutPolicy()
+
+    _apply_macro(Simulator(0), state, 1, ((10, row), PLANT), policy)
+
+    assert policy.planted[1]
+    assert all(state.tile_map.get_tile(x, y).crop.type != CropType.NONE.name for x, y in policy.planted[1])
@@ -0,0 +1,14 @@
+from model.position import Position, position_at
+from api.config import config
+
+
+def test_from_dict_returns_the_shared_position_without_changing_others():
+    shared = position_at(1, 2)
+    pos = Position.from_dict({'x': 3, 'y': 4})
+    assert pos is position_at(3, 4)
+    assert (shared.x, shared.y) == (1, 2)
+
+
+def test_from_dict_off_the_board():
+    pos = Position.from_dict({'x': int(config.properties['board.width']), 'y': 0})
+    assert pos == Position(int(config.properties['board.width']), 0)
@@ -0,0 +1,53 @@
+from model.game_state import GameState
+from model.decisions.do_nothing_decision import DoNothingDecision
+from model.decisions.harvest_decision import HarvestDecision
+from api.instrumentation import PhaseTimer
+from api.scheduler import DecisionScheduler, one_shot
+from benchmarks.fixtures import midgame_gamestate_dict
+
+import pytest
+
+
+def timer_with(**phases):
+    timer = PhaseTimer(timeout_ms=1000)
+    for phase, seconds in phases.items():
+        timer.record(phase, seconds)
+    return timer
+
+
+def test_deadline_takes_out_the_serialize_time():
+    scheduler = DecisionScheduler(max_seconds=0.5)
+    timer = timer_with(json_decode=0.1, serialize=0.05)
+    assert scheduler.deadline(10.0) == pytest.approx(10.5)
+    assert scheduler.deadline(10.0, timer) == pytest.approx(10.45)
+
+
+def test_deadline_from_now_also_takes_out_the_parse_time(monkeypatch):
+    monkeypatch.setattr("api.scheduler.time.perf_counter", lambda: 10.0)
+    scheduler = DecisionScheduler(max_seconds=0.5)
+    timer = timer_with(json_decode=0.1, model_build=0.02, serialize=0.05)
+    assert scheduler.deadline(None, timer) == pytest.approx(10.33)
+
+
+def test_search_stops_at_the_deadline_with_its_best_decision():
+    game_state = GameState(midgame_gamestate_dict())
+    scheduler = DecisionScheduler(max_seconds=0.0)
+    best = HarvestDecision([])
+
+    def search(state):
+        yield best
+        raise AssertionError("searched past the deadline")
+
+    assert scheduler.run(search, game_state, DoNothingDecision()) is best
+
+
+def test_one_shot_search_falls_back_when_deciding_fails():
+    game_state = GameState(midgame_gamestate_dict())
+    fallback = DoNothingDecision()
+
+    def decide(game):
+        raise ValueError("no decision")
+
+    assert DecisionScheduler().run(one_shot(decide, None), game_state, fallback) is fallback
+    decision = HarvestDecision([])
+    assert DecisionScheduler().run(one_shot(lambda game: decision, None), game_state, fallback) is decision
@@ -0,0 +1,63 @@
+from itertools import combinations_with_replacement
+from model.crop_type import CropType
+from api.seed_planner import KnapsackTable, SeedPlanner, SEEDS
+
+import pytest
+
+
+def brute_force(profits, prices, count, budget):
+    """
+    Returns the best total profit of at most count seeds costing at most budget, by trying every multiset
+    """
+    best = 0.0
+    for k in range(count + 1):
+        for seeds in combinations_with_replacement(SEEDS, k):
+            if sum(prices[crop] for crop in seeds) <= budget + 1e-9:
+                best = max(best, sum(profits[crop] for crop in seeds))
+    return best
+
+
+PRICES = {crop: crop.get_seed_price() for crop in SEEDS}
+
+
+@pytest.mark.parametrize("count, budget", [(1, 20), (3, 45), (4, 130), (5, 1100), (5, 2500)])
+def test_knapsack_table_matches_brute_force(count, budget):
+    profits = {crop: value for crop, value in zip(SEEDS, [3.0, 1.5, 0.5, 6.0, -1.0, 12.0, 40.0, 1200.0])}
+    table = KnapsackTable(profits, PRICES, count, budget)
+    profit, purchase = table.solve(count, budget)
+    assert profit == pytest.approx(brute_force(profits, PRICES, count, budget))
+    # The purchase it backtracks to is feasible and worth what it says
+    assert sum(purchase.values()) <= count
+    assert sum(PRICES[crop] * quantity for crop, quantity in purchase.items()) <= budget
+    assert sum(profits[crop] * quantity for crop, quantity in purchase.items()) == pytest.approx(profit)
+
+
+def test_knapsack_table_answers_smaller_queries():
+    profits = {crop: value for crop, value in zip(SEEDS, [3.0, 1.5, 0.5, 6.0, 0.0, 12.0, 40.0, 1200.0])}
+    table = KnapsackTable(profits, PRICES, 6, 3000)
+    for count, budget in [(0, 3000), (2, 40), (6, 100), (3, 1000)]:
+        assert table.covers(count, budget)
+        assert table.solve(count, budget)[0] == pytest.approx(brute_force(profits, PRICES, count, budget))
+
+
+@pytest.mark.parametrize("turn, money, capacity", [(30, 300, 4), (60, 1200, 5), (120, 2000, 3), (170, 500, 5)])
+def test_best_purchase_is_optimal_for_the_seed_values(turn, money, capacity):
+    planner = SeedPlanner()
+    values = planner.seed_values(turn, 10)
+    profits = {crop: values[crop] - PRICES[crop] for crop in SEEDS}
+    purchase = planner.best_purchase(turn, money, capacity, capacity, max_movement=10)
+    got = sum(profits[crop] * quantity for crop, quantity in purchase.items())
+    assert sum(purchase.values()) <= capacity
+    assert sum(PRICES[crop] * quantity for crop, quantity in purchase.items()) <= money
+    assert got == pytest.approx(brute_force(profits, PRICES, capacity, money))
+
+
+def test_best_purchase_uses_the_loyalty_discount():
+    planner = SeedPlanner()
+    values = planner.seed_values(60, 10)
+    # Just short of one Ducham Fruit without the card, enough with it
+    price = PRICES[CropType.DUCHAM_FRUIT]
+    money = price * 0.97
+    assert values[CropType.DUCHAM_FRUIT] > price
+    assert CropType.DUCHAM_FRUIT not in planner.best_purchase(60, money, 1, 1, max_movement=10)
+    assert planner.best_purchase(60, money, 1, 1, discount=0.05, max_movement=10) == {CropType.DUCHAM_FRUIT: 1}
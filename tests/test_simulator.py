@@ -0,0 +1,145 @@
+from model.game_state import GameState
+from model.item_type import ItemType
+from model.upgrade_type import UpgradeType
+from model.tile_type import TileType
+from model.crop_type import CropType
+from model.position import Position
+from model.decisions.move_decision import MoveDecision
+from model.decisions.buy_decision import BuyDecision
+from model.decisions.harvest_decision import HarvestDecision
+from model.decisions.plant_decision import PlantDecision
+from model.decisions.do_nothing_decision import DoNothingDecision
+from api.simulator import Simulator, new_gamestate_dict, grocer_columns, base_tile_type
+from api.fertility_schedule import schedule
+from api import game_util
+
+import pytest
+
+constants = game_util.constants
+GROCER_X = grocer_columns(constants)[0]
+NOTHING = DoNothingDecision()
+
+
+def make_state(turn=1, p1=(GROCER_X, 0), p2=(0, 0), p1_upgrade=UpgradeType.NONE, tiles=None, **p1_fields):
+    """
+    Builds a small hand-made state: both players where asked, an empty board of the
+    turn's tile types, and the given tiles changed
+    :param tiles: {(x, y): {tile field: value}} to apply on top of the board
+    :param p1_fields: Player 1 fields to set, in the engine's JSON names
+    """
+    gamestate = new_gamestate_dict(ItemType.NONE, p1_upgrade, ItemType.NONE, UpgradeType.NONE, constants)
+    gamestate['turn'] = turn
+    gamestate['p1']['position'] = {'x': p1[0], 'y': p1[1]}
+    gamestate['p2']['position'] = {'x': p2[0], 'y': p2[1]}
+    gamestate['p1'].update(p1_fields)
+    for y, row in enumerate(gamestate['tileMap']['tiles']):
+        for x, tile in enumerate(row):
+            tile['type'] = base_tile_type(turn, x, y, constants).name
+    for (x, y), fields in (tiles or {}).items():
+        gamestate['tileMap']['tiles'][y][x].update(fields)
+    return GameState(gamestate)
+
+
+def ripe(crop_type, value):
+    return {'crop': {'type': crop_type.name, 'growthTimer': 0, 'value': value}}
+
+
+def act(state, p1_action, p2_action=NOTHING, seed=0):
+    Simulator(seed).apply_actions(state, p1_action, p2_action)
+
+
+def test_buy_at_grocer_pays_the_seed_price():
+    state = make_state()
+    act(state, BuyDecision([CropType.CORN, CropType.GRAPE], [2, 1]))
+    player = state.player1
+    assert player.money == constants.STARTING_MONEY - 2 * CropType.CORN.get_seed_price() \
+        - CropType.GRAPE.get_seed_price()
+    assert player.seed_inventory[CropType.CORN] == 2
+    assert player.seed_inventory[CropType.GRAPE] == 1
+
+
+def test_buy_away_from_grocer_is_rejected():
+    state = make_state(p1=(GROCER_X, 5))
+    act(state, BuyDecision([CropType.CORN], [1]))
+    assert state.player1.money == constants.STARTING_MONEY
+    assert state.player1.seed_inventory[CropType.CORN] == 0
+
+
+def test_buy_beyond_capacity_is_rejected():
+    state = make_state()
+    act(state, BuyDecision([CropType.CORN], [constants.CARRYING_CAPACITY + 1]))
+    assert state.player1.money == constants.STARTING_MONEY
+    assert state.player1.seed_inventory[CropType.CORN] == 0
+
+
+def test_loyalty_card_discounts_purchases_from_the_minimum():
+    discount = constants.GREEN_GROCER_LOYALTY_CARD_DISCOUNT
+    state = make_state(p1_upgrade=UpgradeType.LOYALTY_CARD)
+    # Two grapes cost at least the minimum, one corn less
+    assert CropType.GRAPE.get_seed_price() * 2 >= constants.GREEN_GROCER_LOYALTY_CARD_MINIMUM
+    assert CropType.CORN.get_seed_price() < constants.GREEN_GROCER_LOYALTY_CARD_MINIMUM
+    act(state, BuyDecision([CropType.GRAPE], [2]))
+    assert state.player1.money == pytest.approx(constants.STARTING_MONEY
+                                                - 2 * CropType.GRAPE.get_seed_price() * (1 - discount))
+    money = state.player1.money
+    act(state, BuyDecision([CropType.CORN], [1]))
+    assert state.player1.money == pytest.approx(money - CropType.CORN.get_seed_price())
+
+
+def test_harvest_takes_ripe_crops_in_reach():
+    state = make_state(p1=(5, 10), p2=(20, 40), tiles={(5, 11): ripe(CropType.CORN, 7.5)})
+    act(state, HarvestDecision([Position(5, 11)]))
+    assert state.player1.harvested_inventory == [{'type': CropType.CORN.name, 'growthTimer': 0, 'value': 7.5}]
+    assert state.tile_map.get_tile(5, 11).crop.type == CropType.NONE.name
+
+
+def test_harvest_inside_opponent_protection_radius_is_rejected():
+    radius = constants.PROTECTION_RADIUS
+    state = make_state(p1=(5, 10), p2=(5, 11 + radius), tiles={(5, 11): ripe(CropType.CORN, 7.5)})
+    act(state, HarvestDecision([Position(5, 11)]))
+    assert state.player1.harvested_inventory == []
+    assert state.tile_map.get_tile(5, 11).crop.type == CropType.CORN.name
+
+    # One tile further and the crop is fair game
+    state = make_state(p1=(5, 10), p2=(5, 12 + radius), tiles={(5, 11): ripe(CropType.CORN, 7.5)})
+    act(state, HarvestDecision([Position(5, 11)]))
+    assert len(state.player1.harvested_inventory) == 1
+
+
+def test_scarecrow_protects_its_owner_only():
+    # An effect of 1 was placed by player 2
+    tiles = {(5, 11): dict(ripe(CropType.CORN, 7.5), scarecrowEffect=1)}
+    state = make_state(p1=(5, 10), p2=(20, 40), tiles=tiles)
+    act(state, HarvestDecision([Position(5, 11)]))
+    assert state.player1.harvested_inventory == []
+
+    state = make_state(p1=(20, 40), p2=(5, 10), tiles=tiles)
+    act(state, NOTHING, HarvestDecision([Position(5, 11)]))
+    assert len(state.player2.harvested_inventory) == 1
+
+
+def test_crops_grow_by_the_fertility_of_their_tile():
+    turn = 60
+    row = schedule.rows_of_type(turn, TileType.F_BAND_INNER)[0]
+    state = make_state(turn=turn, p1=(5, row), p2=(20, 0), seedInventory={CropType.CORN.name: 1})
+    act(state, PlantDecision([CropType.CORN], [Position(5, row)]))
+    crop = state.tile_map.get_tile(5, row).crop
+    sensitivity = CropType.CORN.get_fertility_sensitivity()
+    growth = CropType.CORN.get_growth_value() * (1 - sensitivity + sensitivity * TileType.F_BAND_INNER.get_fertility())
+    assert crop.growth_timer == CropType.CORN.get_growth_time() - 1
+    assert crop.value == pytest.approx(growth)
+
+
+def test_band_shifts_with_the_turn():
+    simulator = Simulator(0)
+    turn = 60
+    state = make_state(turn=turn, p1=(GROCER_X, 0), p2=(0, 0))
+    stay = MoveDecision(Position(GROCER_X, 0)), MoveDecision(Position(0, 0))
+    for _ in range(constants.FBAND_MOVE_DELAY):
+        simulator.apply_moves(state, *stay)
+        simulator.apply_actions(state, NOTHING, NOTHING)
+    assert state.turn > turn
+    assert schedule.rows_of_type(state.turn, TileType.F_BAND_INNER) != schedule.rows_of_type(turn, TileType.F_BAND_INNER)
+    for y in range(constants.GRASS_ROWS, constants.BOARD_HEIGHT):
+        expected = game_util.tile_type_on_turn(state.turn, state, Position(0, y))
+        assert all(state.tile_map.get_tile(x, y).type == expected for x in range(constants.BOARD_WIDTH))
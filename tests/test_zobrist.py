@@ -0,0 +1,35 @@
+from model.game_state import GameState
+from api.simulator import Simulator
+from api.zobrist import zobrist
+from api.mcts import GreedyRolloutPolicy, RandomRolloutPolicy
+from benchmarks.fixtures import midgame_gamestate_dict
+
+import pytest
+
+
+@pytest.mark.parametrize("policy", [GreedyRolloutPolicy(), RandomRolloutPolicy()], ids=["greedy", "random"])
+@pytest.mark.parametrize("seed", range(3))
+def test_incremental_hash_matches_full_hash(policy, seed):
+    simulator = Simulator(seed)
+    state = GameState(midgame_gamestate_dict(seed=seed))
+    zobrist.hash(state)
+    policy.reset()
+    for _ in range(40):
+        simulator.apply_moves(state, policy.move(simulator, state, 1), policy.move(simulator, state, 2))
+        assert state.zobrist == zobrist.full_hash(state)
+        simulator.apply_actions(state, policy.action(simulator, state, 1), policy.action(simulator, state, 2))
+        assert state.zobrist == zobrist.full_hash(state)
+
+
+def test_clones_keep_their_own_hash():
+    simulator = Simulator(0)
+    policy = RandomRolloutPolicy()
+    root = GameState(midgame_gamestate_dict())
+    root_hash = zobrist.hash(root)
+    for _ in range(5):
+        state = root.clone()
+        for _ in range(10):
+            simulator.apply_moves(state, policy.move(simulator, state, 1), policy.move(simulator, state, 2))
+            simulator.apply_actions(state, policy.action(simulator, state, 1), policy.action(simulator, state, 2))
+        assert state.zobrist == zobrist.full_hash(state)
+        assert root.zobrist == root_hash == zobrist.full_hash(root)